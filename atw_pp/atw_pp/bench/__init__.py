@@ -0,0 +1,30 @@
+"""
+Reproducible performance benchmarks (python -m atw_pp.bench run / compare).
+
+Times safe_parse_structure, build_chain_map / build_roles, every built-in plugin,
+contact_stats_between_atom_sets and build_all_metadata_wide on the bundled AF2 examples
+and on synthetic complexes of configurable size, and writes the results as JSON; two
+result files can be compared to spot throughput and memory regressions.
+
+golden.py checks the same fast paths against simple reference implementations
+(python -m atw_pp.bench golden / diff), column by column within tolerances.
+"""
+
+from .synthetic import SyntheticSpec, synthetic_complex, write_synthetic_set
+from .suite import bench_dataset, compare_results, load_results, prepare_datasets, run_suite
+from .golden import Tolerance, compare_output_dirs, compare_tables, run_golden
+
+__all__ = [
+    "SyntheticSpec",
+    "synthetic_complex",
+    "write_synthetic_set",
+    "bench_dataset",
+    "run_suite",
+    "load_results",
+    "compare_results",
+    "prepare_datasets",
+    "Tolerance",
+    "compare_tables",
+    "compare_output_dirs",
+    "run_golden",
+]
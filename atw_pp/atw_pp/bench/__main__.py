@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import argparse
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+from .golden import KERNELS, Tolerance, compare_output_dirs, run_golden
+from .suite import EXAMPLES_DIR, compare_results, load_results, prepare_datasets, run_suite
+from .synthetic import SyntheticSpec
+from ..config import MetadataConfig
+from ..io.paragraph import load_paragraph_preds
+
+def main() -> int:
+    ap = argparse.ArgumentParser("atw_pp.bench")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="Run the benchmarks and write a JSON result file")
+    run.add_argument("--out", default="bench_results.json", help="Result file (JSON)")
+    run.add_argument(
+        "--examples_dir",
+        default=str(EXAMPLES_DIR),
+        help="Structures benchmarked as they are (default: the bundled AF2 antibody-antigen models)",
+    )
+    run.add_argument("--no_examples", action="store_true", help="Only benchmark synthetic complexes")
+    run.add_argument(
+        "--synthetic",
+        nargs="*",
+        default=["3x200x0.2", "3x600x0.2"],
+        help="Synthetic complex sizes as CHAINSxRESIDUESxDENSITY (interface density 0-1)",
+    )
+    run.add_argument("--n_synthetic", type=int, default=10, help="Structures per synthetic size")
+    run.add_argument("--repeat", type=int, default=3, help="Timed repetitions per benchmark (best is compared)")
+    run.add_argument("--wide_copies", type=int, default=100, help="Copies of the long tables fed to the wide build")
+    run.add_argument("--seed", type=int, default=0)
+
+    cmp = sub.add_parser("compare", help="Compare two result files (exit status 1 on regressions)")
+    cmp.add_argument("old")
+    cmp.add_argument("new")
+    cmp.add_argument("--time_threshold", type=float, default=0.10, help="Relative slowdown reported as 'slower'")
+    cmp.add_argument("--mem_threshold", type=float, default=0.10, help="Relative growth reported as 'more_memory'")
+
+    gold = sub.add_parser(
+        "golden", help="Check fast paths against reference implementations (exit status 1 on differences)"
+    )
+    gold.add_argument("--examples_dir", default=str(EXAMPLES_DIR), help="Structures to check (PAE JSON is synthesised)")
+    gold.add_argument("--no_examples", action="store_true", help="Only check synthetic complexes")
+    gold.add_argument("--synthetic", nargs="*", default=["3x200x0.2"], help="Synthetic complex sizes (CHAINSxRESIDUESxDENSITY)")
+    gold.add_argument("--n_synthetic", type=int, default=3, help="Structures per synthetic size")
+    gold.add_argument("--kernels", nargs="*", default=list(KERNELS), choices=list(KERNELS))
+    gold.add_argument("--paragraph_preds", default=None, help="Paragraph predictions (default: synthetic)")
+    gold.add_argument("--work_dir", default=None, help="Where inputs are written (default: a temp directory)")
+    gold.add_argument("--out", default=None, help="Also write the full report as CSV")
+    gold.add_argument("--seed", type=int, default=0)
+
+    diff = sub.add_parser("diff", help="Compare the output tables of two runs (exit status 1 on differences)")
+    diff.add_argument("ref_dir")
+    diff.add_argument("cand_dir")
+    diff.add_argument("--rtol", type=float, default=1e-9)
+    diff.add_argument("--atol", type=float, default=0.0)
+    diff.add_argument("--out", default=None, help="Also write the full report as CSV")
+
+    args = ap.parse_args()
+
+    if args.command == "run":
+        report = run_suite(
+            Path(args.out).resolve(),
+            examples_dir=None if args.no_examples else Path(args.examples_dir).resolve(),
+            synthetic=tuple(SyntheticSpec.parse(s) for s in args.synthetic),
+            n_synthetic=args.n_synthetic,
+            repeat=args.repeat,
+            wide_copies=args.wide_copies,
+            seed=args.seed,
+        )
+        df = pd.DataFrame(report["results"])
+        with pd.option_context("display.width", 160, "display.float_format", "{:.4g}".format):
+            print(df[["dataset", "benchmark", "items", "min_s", "items_per_s", "peak_mb"]].to_string(index=False))
+        print("Saved:", args.out)
+        return 0
+
+    if args.command in ("golden", "diff"):
+        if args.command == "golden":
+            report = _golden(args)
+        else:
+            report = compare_output_dirs(
+                Path(args.ref_dir), Path(args.cand_dir), tol=Tolerance(rtol=args.rtol, atol=args.atol)
+            )
+        if args.out:
+            report.to_csv(args.out, index=False)
+        failed = report[report["status"].isin(["diff", "missing"])]
+        with pd.option_context("display.width", 200, "display.max_colwidth", 120, "display.float_format", "{:.3g}".format):
+            print(failed.to_string(index=False) if len(failed) else f"{len(report)} columns compared, no differences")
+        return 1 if len(failed) else 0
+
+    df = compare_results(
+        load_results(Path(args.old)),
+        load_results(Path(args.new)),
+        time_threshold=args.time_threshold,
+        mem_threshold=args.mem_threshold,
+    )
+    with pd.option_context("display.width", 160, "display.float_format", "{:.4g}".format):
+        print(df.to_string(index=False))
+    regressions = df["status"].isin(["slower", "more_memory"])
+    if regressions.any():
+        print(f"{int(regressions.sum())} regression(s)")
+        return 1
+    return 0
+
+def _golden(args) -> pd.DataFrame:
+    cfg = MetadataConfig()
+    work = Path(args.work_dir or tempfile.mkdtemp(prefix="atw_pp_golden_"))
+    try:
+        datasets = prepare_datasets(
+            work,
+            examples_dir=None if args.no_examples else Path(args.examples_dir).resolve(),
+            synthetic=tuple(SyntheticSpec.parse(s) for s in args.synthetic),
+            n_synthetic=args.n_synthetic,
+            cfg=cfg,
+            seed=args.seed,
+            variants=True,
+        )
+        paths = [p.resolve() for ps in datasets.values() for p in ps]
+        preds = load_paragraph_preds(Path(args.paragraph_preds)) if args.paragraph_preds else None
+        print(f"Checking {', '.join(args.kernels)} on {len(paths)} structures")
+        return run_golden(paths, cfg=cfg, paragraph_df=preds, kernels=args.kernels)
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(work, ignore_errors=True)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,426 @@
+"""
+Golden-output checks: reference implementations and the fast paths run on the same
+structures, and their rows are compared table by table, column by column.
+
+References are deliberately simple and independent of the optimised code:
+  - selection:  boolean chain masks over the AtomArray (vs core.selection AtomViews)
+  - contacts:   brute-force pairwise distances (vs the interface_contacts plugin, i.e. the
+                per-chain KD-tree index, and contact_stats_between_atom_sets)
+  - paragraph:  the original per-structure pandas summaries (vs ParagraphIndex + the plugin)
+  - ipsae:      externals/ipsae/ipsae.py run as a script on a copy of the inputs (vs the
+                in-process ipsae plugin; compared to the precision the script prints), on
+                AF2, AF3 and Boltz inputs with chains in and out of alphabetical order
+compare_tables / compare_output_dirs also diff any two runs' Parquet outputs.
+"""
+
+from __future__ import annotations
+
+import shutil
+import subprocess
+import sys
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator
+
+import numpy as np
+import pandas as pd
+from scipy.spatial.distance import cdist
+
+from ..config import MetadataConfig
+from ..core.annotations import ensure_unit_id_annotation
+from ..core.contacts import contact_stats_between_atom_sets
+from ..core.epitope import points_repr_from_points
+from ..core.ipsae import SCORE_COLS
+from ..core.selection import build_chain_map, build_roles
+from ..io.cif import safe_parse_structure, structure_stem
+from ..io.paragraph import ParagraphIndex
+from ..plugins import BUILTIN_PLUGINS
+from ..plugins.base import Context
+from ..plugins.ipsae import find_pae_file
+from ..run import TABLE_FILES
+from .synthetic import synthetic_paragraph_preds
+
+IPSAE_SCRIPT = Path(__file__).resolve().parents[1] / "externals" / "ipsae" / "ipsae.py"
+
+# columns that identify a row, in every table that has them
+KEY_COLS = ("path", "assembly_id", "chain_id", "role", "pair", "agg", "ipsae__agg", "pae_cutoff", "dist_cutoff")
+
+# half a unit of the precision ipsae.py prints each score with (integers are exact)
+IPSAE_TEXT_ATOL = {
+    "ipSAE": 5e-7, "ipSAE_d0chn": 5e-7, "ipSAE_d0dom": 5e-7, "ipTM_af": 5e-4, "ipTM_d0chn": 5e-7,
+    "pDockQ": 5e-5, "pDockQ2": 5e-5, "LIS": 5e-5, "d0res": 5e-3, "d0chn": 5e-3, "d0dom": 5e-3,
+}
+
+IPSAE_PAE_RTOL = float(np.finfo(np.float32).eps)
+
+REPORT_COLS = [
+    "table", "column", "status", "n_compared", "n_diff", "max_abs_diff", "max_rel_diff", "example",
+]
+
+@dataclass(frozen=True, slots=True)
+class Tolerance:
+    """``|cand - ref| <= atol + rtol * |ref|`` for numeric columns; ``columns`` overrides (rtol, atol) per column."""
+    rtol: float = 1e-9
+    atol: float = 0.0
+    columns: dict[str, tuple[float, float]] = field(default_factory=dict)
+
+    def of(self, column: str) -> tuple[float, float]:
+        return self.columns.get(column, (self.rtol, self.atol))
+
+# ----- column-wise comparison -----
+
+def _is_numeric(s: pd.Series) -> bool:
+    return pd.api.types.is_numeric_dtype(s.dtype) or pd.api.types.is_bool_dtype(s.dtype)
+
+def _numeric_equal(a: np.ndarray, b: np.ndarray, rtol: float, atol: float) -> np.ndarray:
+    """Elementwise match: NaN == NaN, +-inf only equal to itself, finite values within tolerance."""
+    nan_a, nan_b = np.isnan(a), np.isnan(b)
+    both_finite = np.isfinite(a) & np.isfinite(b)
+    with np.errstate(invalid="ignore"):
+        close = np.abs(a - b) <= atol + rtol * np.abs(a)
+    return (nan_a & nan_b) | (a == b) | (both_finite & close)
+
+def _align(ref: pd.DataFrame, cand: pd.DataFrame, keys: list[str]) -> pd.DataFrame:
+    """Outer-join on ``keys`` (repeated keys are matched in order of appearance)."""
+    ref = ref.assign(__n=ref.groupby(keys, dropna=False, sort=False).cumcount()) if keys else ref.assign(__n=np.arange(len(ref)))
+    cand = cand.assign(__n=cand.groupby(keys, dropna=False, sort=False).cumcount()) if keys else cand.assign(__n=np.arange(len(cand)))
+    on = [*keys, "__n"]
+    return ref.merge(cand, on=on, how="outer", suffixes=("__ref", "__cand"), indicator=True)
+
+def compare_tables(
+    ref: pd.DataFrame,
+    cand: pd.DataFrame,
+    *,
+    table: str = "",
+    keys: Iterable[str] | None = None,
+    tol: Tolerance = Tolerance(),
+) -> pd.DataFrame:
+    """
+    One report row per column of ``ref`` / ``cand``: "ok", "diff" (values differ beyond ``tol``),
+    "missing" (not in the candidate) or "extra" (only in the candidate), with the number of differing
+    rows, the largest absolute / relative difference and one example. Rows are matched on ``keys``
+    (default: the KEY_COLS both tables have); a "<rows>" entry reports unmatched rows.
+    """
+    keys = [k for k in (keys if keys is not None else KEY_COLS) if k in ref.columns and k in cand.columns]
+    for k in keys:  # match keys by value, whatever dtype each side stored them as
+        ref = ref.assign(**{k: ref[k].astype(str)})
+        cand = cand.assign(**{k: cand[k].astype(str)})
+    m = _align(ref, cand, keys)
+    both = (m["_merge"] == "both").to_numpy()
+    report = []
+
+    n_only_ref = int((m["_merge"] == "left_only").sum())
+    n_only_cand = int((m["_merge"] == "right_only").sum())
+    example = ""
+    if n_only_ref or n_only_cand:
+        row = m.loc[m["_merge"] != "both", keys].iloc[0] if keys else None
+        example = f"{n_only_ref} reference-only, {n_only_cand} candidate-only rows" + (
+            f"; e.g. {dict(row)}" if row is not None else ""
+        )
+    report.append({
+        "table": table, "column": "<rows>", "status": "diff" if example else "ok",
+        "n_compared": int(both.sum()), "n_diff": n_only_ref + n_only_cand,
+        "max_abs_diff": np.nan, "max_rel_diff": np.nan, "example": example,
+    })
+
+    for col in [c for c in dict.fromkeys([*ref.columns, *cand.columns]) if c not in keys]:
+        in_ref, in_cand = col in ref.columns, col in cand.columns
+        if not (in_ref and in_cand):
+            report.append({
+                "table": table, "column": col, "status": "missing" if in_ref else "extra",
+                "n_compared": 0, "n_diff": 0, "max_abs_diff": np.nan, "max_rel_diff": np.nan, "example": "",
+            })
+            continue
+        a_s, b_s = m.loc[both, f"{col}__ref"], m.loc[both, f"{col}__cand"]
+        max_abs = max_rel = np.nan
+        if _is_numeric(ref[col]) and _is_numeric(cand[col]):
+            a = a_s.to_numpy(dtype=np.float64, na_value=np.nan)
+            b = b_s.to_numpy(dtype=np.float64, na_value=np.nan)
+            rtol, atol = tol.of(col)
+            equal = _numeric_equal(a, b, rtol, atol)
+            finite = np.isfinite(a) & np.isfinite(b)
+            if finite.any():
+                d = np.abs(a[finite] - b[finite])
+                max_abs = float(d.max())
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    rel = np.where(d > 0, d / np.abs(a[finite]), 0.0)
+                max_rel = float(np.nanmax(rel))
+        else:
+            a, b = a_s.to_numpy(dtype=object), b_s.to_numpy(dtype=object)
+            na_a, na_b = pd.isna(a_s).to_numpy(), pd.isna(b_s).to_numpy()
+            equal = (na_a & na_b) | (~na_a & ~na_b & (a_s.astype(str).to_numpy() == b_s.astype(str).to_numpy()))
+
+        n_diff = int((~equal).sum())
+        example = ""
+        if n_diff:
+            i = int(np.flatnonzero(~equal)[0])
+            where = {k: m.loc[both, k].iloc[i] for k in keys}
+            example = f"{where}: reference={a[i]!r} candidate={b[i]!r}"
+        report.append({
+            "table": table, "column": col, "status": "diff" if n_diff else "ok",
+            "n_compared": len(equal), "n_diff": n_diff,
+            "max_abs_diff": max_abs, "max_rel_diff": max_rel, "example": example,
+        })
+    return pd.DataFrame(report, columns=REPORT_COLS)
+
+def compare_output_dirs(ref_dir: Path, cand_dir: Path, *, tol: Tolerance = Tolerance()) -> pd.DataFrame:
+    """compare_tables over the Parquet tables of two build_metadata output directories."""
+    files = [*TABLE_FILES.values(), "all_metadata.parquet"]
+    reports = []
+    for name in files:
+        rf, cf = ref_dir / name, cand_dir / name
+        if not rf.exists() and not cf.exists():
+            continue
+        if not (rf.exists() and cf.exists()):
+            reports.append(pd.DataFrame([{
+                "table": name, "column": "<file>", "status": "missing" if rf.exists() else "extra",
+                "n_compared": 0, "n_diff": 0, "max_abs_diff": np.nan, "max_rel_diff": np.nan, "example": "",
+            }], columns=REPORT_COLS))
+            continue
+        reports.append(compare_tables(pd.read_parquet(rf), pd.read_parquet(cf), table=name, tol=tol))
+    return pd.concat(reports, ignore_index=True) if reports else pd.DataFrame(columns=REPORT_COLS)
+
+# ----- reference implementations -----
+
+def _polymer_mask(aa, chain_ids: Iterable[str]) -> np.ndarray:
+    chains = np.asarray(aa.chain_id).astype(str)
+    return np.isin(chains, list(chain_ids)) & np.asarray(aa.is_polymer, dtype=bool)
+
+def _selection_row(coord: np.ndarray, res_id: np.ndarray) -> dict[str, Any]:
+    c = np.asarray(coord, dtype=np.float64)
+    return {
+        "n_atoms": int(len(c)),
+        "x_sum": float(c[:, 0].sum()) if len(c) else 0.0,
+        "y_sum": float(c[:, 1].sum()) if len(c) else 0.0,
+        "z_sum": float(c[:, 2].sum()) if len(c) else 0.0,
+        "res_id_sum": int(np.asarray(res_id, dtype=np.int64).sum()),
+    }
+
+def reference_selection(ctx: Context, cfg: MetadataConfig) -> Iterator[dict[str, Any]]:
+    chains = sorted(set(np.asarray(ctx.aa.chain_id).astype(str).tolist()))
+    for cid in chains:
+        sel = ctx.aa[_polymer_mask(ctx.aa, [cid])]
+        yield {"__table__": "chains", "path": ctx.path, "chain_id": cid, **_selection_row(sel.coord, sel.res_id)}
+    for role, spec in cfg.roles.items():
+        sel = ctx.aa[_polymer_mask(ctx.aa, spec.chain_ids)]
+        yield {"__table__": "roles", "path": ctx.path, "role": role, **_selection_row(sel.coord, sel.res_id)}
+
+def candidate_selection(ctx: Context, cfg: MetadataConfig) -> Iterator[dict[str, Any]]:
+    for cid in ctx.chains:
+        yield {
+            "__table__": "chains", "path": ctx.path, "chain_id": cid,
+            **_selection_row(ctx.chains.coord(cid), ctx.chains[cid].res_id),
+        }
+    for role in ctx.roles:
+        yield {
+            "__table__": "roles", "path": ctx.path, "role": role,
+            **_selection_row(ctx.roles.coord(role), ctx.roles[role].res_id),
+        }
+
+def _brute_force_contacts(c1: np.ndarray, c2: np.ndarray, contact_cutoff: float, clash_cutoff: float, block: int = 2048):
+    c1 = c1[~np.isnan(c1).any(axis=1)].astype(np.float64)
+    c2 = c2[~np.isnan(c2).any(axis=1)].astype(np.float64)
+    if len(c1) == 0 or len(c2) == 0:
+        return {"n_contact_atoms": 0, "n_clash_atoms": 0, "min_dist": float("inf")}
+    d = np.full(len(c1), np.inf)
+    for i in range(0, len(c2), block):
+        d = np.minimum(d, cdist(c1, c2[i:i + block]).min(axis=1))
+    return {
+        "n_contact_atoms": int(np.count_nonzero(d <= contact_cutoff)),
+        "n_clash_atoms": int(np.count_nonzero(d <= clash_cutoff)),
+        "min_dist": float(d.min()),
+    }
+
+def _interface_pairs(ctx: Context, cfg: MetadataConfig) -> Iterator[tuple[str, str, np.ndarray, np.ndarray]]:
+    """Role pairs the interface_contacts plugin scores, with the role coordinates from plain masks."""
+    for left, right in cfg.interface_pairs:
+        if left not in cfg.roles or right not in cfg.roles:
+            continue
+        c1 = ctx.aa.coord[_polymer_mask(ctx.aa, cfg.roles[left].chain_ids)]
+        c2 = ctx.aa.coord[_polymer_mask(ctx.aa, cfg.roles[right].chain_ids)]
+        if len(c1) == 0 or len(c2) == 0:
+            continue
+        yield left, right, c1, c2
+
+def reference_contacts(ctx: Context, cfg: MetadataConfig) -> Iterator[dict[str, Any]]:
+    for left, right, c1, c2 in _interface_pairs(ctx, cfg):
+        yield {"path": ctx.path, "pair": f"{left}__{right}", **_brute_force_contacts(c1, c2, 5.0, 1.0)}
+
+def candidate_contact_kernel(ctx: Context, cfg: MetadataConfig) -> Iterator[dict[str, Any]]:
+    for left, right, c1, c2 in _interface_pairs(ctx, cfg):
+        stats = contact_stats_between_atom_sets(c1, c2, contact_cutoff=5.0, clash_cutoff=1.0)
+        yield {"path": ctx.path, "pair": f"{left}__{right}", **stats}
+
+def _paragraph_summary(g: pd.DataFrame, cutoff: float) -> dict[str, Any] | None:
+    """Summary of one chain / role as the original plugin computed it (pandas, row by row labels)."""
+    g = g.copy()
+    for c in ("pred", "x", "y", "z"):
+        g[c] = pd.to_numeric(g[c], errors="coerce")
+    g = g.dropna(subset=["pred", "x", "y", "z", "IMGT", "chain_id"])
+    if g.empty:
+        return None
+    hit = g[g["pred"] >= cutoff]
+    base = {
+        "cutoff": float(cutoff),
+        "n_res_scored": int(len(g)),
+        "score_mean_all_scored": float(g["pred"].astype(np.float64).mean()),
+        "score_max": float(g["pred"].max()),
+    }
+    if hit.empty:
+        return {
+            **base, "paratope_size": 0, "paratope_labels": "", "paratope_centroid_x": np.nan,
+            "paratope_centroid_y": np.nan, "paratope_centroid_z": np.nan, "paratope_rg": np.nan,
+            "paratope_score_mean": np.nan,
+        }
+    labels = [f"{r['chain_id']}:{r['IMGT']}" for _, r in hit.iterrows()]
+    reprd = points_repr_from_points(hit[["x", "y", "z"]].to_numpy(dtype=float), labels, label_prefix="paratope")
+    return {**base, **reprd, "paratope_score_mean": float(hit["pred"].astype(np.float64).mean())}
+
+def reference_paragraph(ctx: Context, cfg: MetadataConfig) -> Iterator[dict[str, Any]]:
+    df: pd.DataFrame | None = ctx.data.get("paragraph_df")
+    if df is None or df.empty:
+        return
+    if cfg.paragraph_id_mode == "path":
+        sub = df[df["path"].astype(str) == str(ctx.path)] if "path" in df.columns else df.iloc[:0]
+    else:
+        sub = df[df["pdb"].astype(str) == structure_stem(ctx.path)]
+    cutoff = float(cfg.paragraph_cutoff)
+    for chain_id, grp in sub.groupby("chain_id", sort=False):
+        if ctx.chains and str(chain_id) not in ctx.chains:
+            continue
+        s = _paragraph_summary(grp, cutoff)
+        if s is not None:
+            yield {"__table__": "chains", "path": ctx.path, "assembly_id": ctx.assembly_id, "chain_id": str(chain_id), **s}
+    for role in cfg.role_paratope_summaries:
+        spec = cfg.roles.get(role)
+        if spec is None or not spec.chain_ids:
+            continue
+        grp = sub[sub["chain_id"].astype(str).isin(set(map(str, spec.chain_ids)))]
+        s = _paragraph_summary(grp, cutoff) if not grp.empty else None
+        if s is not None:
+            yield {"__table__": "roles", "path": ctx.path, "assembly_id": ctx.assembly_id, "role": str(role), **s}
+
+def _ipsae_side_files(pae_path: Path) -> list[Path]:
+    """Files ipsae.py reads next to ``pae_path``: Boltz pLDDT / confidence, AF3 summary confidences."""
+    name = pae_path.name
+    if pae_path.suffix == ".npz":
+        names = [name.replace("pae", "plddt"), name.replace("pae", "confidence").replace(".npz", ".json")]
+    elif "full_data" in name:
+        names = [name.replace("full_data", "summary_confidences")]
+    elif "confidences" in name:
+        names = [name.replace("confidences", "summary_confidences")]
+    else:
+        names = []
+    return [f for f in (pae_path.with_name(n) for n in names) if f.exists()]
+
+def reference_ipsae(ctx: Context, cfg: MetadataConfig) -> Iterator[dict[str, Any]]:
+    """Rows the plugin would emit, read from ipsae.py's ``{stem}_{pae}_{dist}.txt`` (run on a temp copy)."""
+    structure = Path(ctx.path)
+    pae_path = find_pae_file(structure)
+    if pae_path is None:
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        s_copy = Path(shutil.copy2(structure, Path(tmp) / structure.name))
+        for f in (pae_path, *_ipsae_side_files(pae_path)):
+            shutil.copy2(f, Path(tmp) / f.name)
+        for pae_cutoff, dist_cutoff in cfg.ipsae_cutoffs:
+            # bare file names: the script derives side-file paths by string replacement on the whole path
+            subprocess.run(
+                [sys.executable, str(IPSAE_SCRIPT), pae_path.name, s_copy.name, str(pae_cutoff), str(dist_cutoff)],
+                check=True, cwd=tmp, capture_output=True,
+            )
+            out = Path(tmp) / f"{s_copy.stem}_{int(pae_cutoff):02d}_{int(dist_cutoff):02d}.txt"
+            df = pd.read_csv(out, sep=r"\s+")
+            df["Chn1"], df["Chn2"] = df["Chn1"].astype(str), df["Chn2"].astype(str)
+            asym = {(r["Chn1"], r["Chn2"]): r for _, r in df[df["Type"] == "asym"].iterrows()}
+            for _, r in df[df["Type"] == "max"].iterrows():
+                base = {
+                    "__table__": "interfaces", "path": ctx.path, "assembly_id": ctx.assembly_id,
+                    "pair": f"{r['Chn1']}-{r['Chn2']}",
+                    "pae_cutoff": pae_cutoff, "dist_cutoff": dist_cutoff,
+                }
+                yield {**base, "agg": "max", **{c: r[c] for c in SCORE_COLS}}
+                yield {**base, "agg": "min", **{c: asym[(r["Chn1"], r["Chn2"])][c] for c in SCORE_COLS}}
+
+def _plugin(name: str) -> Callable[[Context, MetadataConfig], Iterable[dict[str, Any]]]:
+    plg = BUILTIN_PLUGINS[name]
+    return lambda ctx, cfg: plg.run(ctx)
+
+# kernel -> (reference, {candidate name: candidate}, tolerance)
+KERNELS: dict[str, tuple[Callable, dict[str, Callable], Tolerance]] = {
+    "selection": (reference_selection, {"AtomViews": candidate_selection}, Tolerance(rtol=1e-9)),
+    "contacts": (
+        reference_contacts,
+        {"interface_contacts": _plugin("interface_contacts"), "contact_stats_between_atom_sets": candidate_contact_kernel},
+        Tolerance(rtol=1e-9),
+    ),
+    # Paragraph scores / coordinates are held as float32 by ParagraphIndex
+    "paragraph": (reference_paragraph, {"paragraph_paratope": _plugin("paragraph_paratope")}, Tolerance(rtol=1e-5, atol=1e-6)),
+    "ipsae": (
+        reference_ipsae,
+        {"ipsae": _plugin("ipsae")},
+        # plus float32 round-off: PAE is stored as float32 by default (MetadataConfig.pae_dtype)
+        Tolerance(rtol=0.0, atol=0.0, columns={c: (IPSAE_PAE_RTOL, a) for c, a in IPSAE_TEXT_ATOL.items()}),
+    ),
+}
+
+def _tables(rows: Iterable[dict[str, Any]], default: str) -> dict[str, list[dict[str, Any]]]:
+    out: dict[str, list[dict[str, Any]]] = {}
+    for row in rows:
+        row = dict(row)
+        out.setdefault(row.pop("__table__", default), []).append(row)
+    return out
+
+def run_golden(
+    paths: list[Path],
+    *,
+    cfg: MetadataConfig | None = None,
+    paragraph_df: pd.DataFrame | None = None,
+    kernels: Iterable[str] = tuple(KERNELS),
+) -> pd.DataFrame:
+    """
+    Run each kernel's reference and candidates on every structure in ``paths`` and compare
+    their rows (compare_tables, per kernel tolerance). Without ``paragraph_df``, synthetic
+    predictions are used. Returns one report with a ``kernel`` ("kernel:candidate") column.
+    """
+    cfg = cfg or MetadataConfig()
+    structures = {}
+    for path in paths:
+        aa = safe_parse_structure(path, assembly_id=cfg.assembly_id)
+        if aa is not None:
+            structures[Path(path).resolve()] = ensure_unit_id_annotation(aa)
+    if paragraph_df is None:
+        antibody = tuple(c for role in cfg.role_paratope_summaries if role in cfg.roles for c in cfg.roles[role].chain_ids)
+        paragraph_df = synthetic_paragraph_preds(structures, antibody)
+    index = ParagraphIndex(paragraph_df, by="path" if cfg.paragraph_id_mode == "path" else "pdb")
+    rows: dict[tuple[str, str], list[dict[str, Any]]] = {}
+
+    for path, aa in structures.items():
+        for kernel in kernels:
+            reference, candidates, _ = KERNELS[kernel]
+            for side, fn in [("<reference>", reference), *candidates.items()]:
+                ctx = Context(path=str(path), assembly_id=cfg.assembly_id, aa=aa)
+                ctx.data["cfg"] = cfg
+                ctx.data["params"] = None
+                ctx.data["paragraph_df"] = paragraph_df
+                ctx.data["paragraph_index"] = index
+                ctx.chains = build_chain_map(aa)
+                ctx.roles = build_roles(cfg, ctx.chains)
+                rows.setdefault((kernel, side), []).extend(fn(ctx, cfg))
+
+    reports = []
+    for kernel in kernels:
+        _, candidates, tol = KERNELS[kernel]
+        ref_tables = _tables(rows.get((kernel, "<reference>"), []), kernel)
+        for name in candidates:
+            cand_tables = _tables(rows.get((kernel, name), []), kernel)
+            for table in dict.fromkeys([*ref_tables, *cand_tables]):
+                rep = compare_tables(
+                    pd.DataFrame(ref_tables.get(table, [])), pd.DataFrame(cand_tables.get(table, [])), table=table, tol=tol
+                )
+                reports.append(rep.assign(kernel=f"{kernel}:{name}"))
+    if not reports:
+        return pd.DataFrame(columns=["kernel", *REPORT_COLS])
+    report = pd.concat(reports, ignore_index=True)
+    return report[["kernel", *REPORT_COLS]]
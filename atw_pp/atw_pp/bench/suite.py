@@ -0,0 +1,315 @@
+from __future__ import annotations
+
+import gc
+import json
+import os
+import platform
+import shutil
+import statistics
+import time
+import tracemalloc
+from dataclasses import replace
+from datetime import datetime, timezone
+from importlib import metadata
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+
+from ..config import MetadataConfig
+from ..core.annotations import ensure_unit_id_annotation
+from ..core.contacts import contact_stats_between_atom_sets
+from ..core.selection import build_chain_map, build_roles
+from ..io.cif import list_structures, safe_parse_structure
+from ..io.paragraph import ParagraphIndex
+from ..plugins import BUILTIN_PLUGINS
+from ..plugins.base import Context
+from ..run import TABLES, column_names, output_schema
+from ..tables.sink import ColumnBuilder, arrow_type
+from ..tables.wide import build_all_metadata_wide
+from .synthetic import SyntheticSpec, rotated_chain_ids, synthetic_paragraph_preds, write_af2_pae, write_synthetic_set
+
+EXAMPLES_DIR = Path(__file__).resolve().parents[1] / "examples" / "default_input" / "antibody_antigen_pdb"
+RESULT_COLS = ["dataset", "benchmark", "items", "rows", "repeat", "min_s", "median_s", "items_per_s", "peak_mb"]
+_VERSIONED = ("atw_pp", "numpy", "pandas", "pyarrow", "scipy", "biotite", "atomworks")
+
+def _measure(fn: Callable[[Any], int | None], *, repeat: int, setup: Callable[[], Any] | None = None) -> dict[str, Any]:
+    """
+    ``repeat`` timed calls of ``fn(setup())`` (setup untimed), then one more under tracemalloc
+    for the peak of Python/NumPy allocations. ``fn`` may return the number of rows it produced.
+    """
+    times = []
+    rows = None
+    for _ in range(repeat):
+        arg = setup() if setup is not None else None
+        gc.collect()
+        t0 = time.perf_counter()
+        rows = fn(arg)
+        times.append(time.perf_counter() - t0)
+
+    arg = setup() if setup is not None else None
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn(arg)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"rows": rows, "times": times, "peak_mb": peak / 1024**2}
+
+def _record(dataset: str, benchmark: str, items: int, m: dict[str, Any]) -> dict[str, Any]:
+    best = min(m["times"])
+    return {
+        "dataset": dataset,
+        "benchmark": benchmark,
+        "items": items,
+        "rows": m["rows"],
+        "repeat": len(m["times"]),
+        "min_s": best,
+        "median_s": statistics.median(m["times"]),
+        "items_per_s": items / best if best > 0 else float("inf"),
+        "peak_mb": m["peak_mb"],
+        "times": m["times"],
+    }
+
+def _contexts(structures: dict[Path, Any], cfg: MetadataConfig, paragraph_index: ParagraphIndex | None) -> list[Context]:
+    """Fresh Contexts (empty ctx.cache) as run._process_structure builds them."""
+    out = []
+    for path, aa in structures.items():
+        ctx = Context(path=str(path), assembly_id=cfg.assembly_id, aa=aa)
+        ctx.data["cfg"] = cfg
+        ctx.data["params"] = None
+        if paragraph_index is not None:
+            ctx.data["paragraph_index"] = paragraph_index
+        ctx.chains = build_chain_map(aa)
+        ctx.roles = build_roles(cfg, ctx.chains)
+        out.append(ctx)
+    return out
+
+def _long_tables(ctxs: list[Context], plugins: list) -> dict[str, pd.DataFrame]:
+    """The long tables of one plugin pass, typed as the run writes them."""
+    builders = {t: ColumnBuilder() for t in TABLES}
+    for ctx in ctxs:
+        for plg in plugins:
+            names = column_names(plg.prefix)
+            for raw in plg.run(ctx):
+                builders[raw.get("__table__", plg.table)].append(raw, names)
+    types = {name: arrow_type(t) for name, t in output_schema(plugins).items()}
+    return {t: b.to_table(types).to_pandas() for t, b in builders.items()}
+
+def _tile(df: pd.DataFrame, copies: int) -> pd.DataFrame:
+    """``copies`` renamed copies of a long table (distinct paths), to time the wide build at scale."""
+    if copies <= 1 or df.empty:
+        return df
+    tiled = pd.concat([df] * copies, ignore_index=True)
+    tiled["path"] = tiled["path"].astype(str) + "#" + np.repeat(np.arange(copies), len(df)).astype(str)
+    return tiled
+
+def bench_dataset(
+    name: str,
+    paths: list[Path],
+    *,
+    cfg: MetadataConfig,
+    repeat: int = 3,
+    wide_copies: int = 100,
+    seed: int = 0,
+) -> list[dict[str, Any]]:
+    """Time parsing, chain/role selection, every built-in plugin, the contact kernel and the wide build on ``paths``."""
+    results = []
+
+    safe_parse_structure(paths[0], assembly_id=cfg.assembly_id)  # warm-up (CCD, imports)
+    parsed: dict[Path, Any] = {}
+
+    def parse(_):
+        for p in paths:
+            parsed[p] = safe_parse_structure(p, assembly_id=cfg.assembly_id)
+
+    results.append(_record(name, "safe_parse_structure", len(paths), _measure(parse, repeat=repeat)))
+    structures = {p: ensure_unit_id_annotation(aa) for p, aa in parsed.items() if aa is not None}
+    if not structures:
+        return results
+    aas = list(structures.values())
+
+    def chain_maps(_):
+        for aa in aas:
+            build_chain_map(aa)
+
+    results.append(_record(name, "build_chain_map", len(aas), _measure(chain_maps, repeat=repeat)))
+    maps = [build_chain_map(aa) for aa in aas]
+
+    def roles(_):
+        for cm in maps:
+            build_roles(cfg, cm)
+
+    results.append(_record(name, "build_roles", len(aas), _measure(roles, repeat=repeat)))
+
+    antibody = tuple(c for role in cfg.role_paratope_summaries if role in cfg.roles for c in cfg.roles[role].chain_ids)
+    paragraph_index = ParagraphIndex(synthetic_paragraph_preds(structures, antibody, seed=seed), by="pdb")
+    plugins = list(BUILTIN_PLUGINS.values())
+
+    def setup():
+        return _contexts(structures, cfg, paragraph_index)
+
+    for plg in plugins:
+        def run_plugin(ctxs, plg=plg):
+            return sum(1 for ctx in ctxs for _ in plg.run(ctx))
+
+        results.append(_record(name, f"plugin:{plg.name}", len(aas), _measure(run_plugin, repeat=repeat, setup=setup)))
+
+    def contacts(ctxs):
+        n = 0
+        for ctx in ctxs:
+            for left, right in cfg.interface_pairs:
+                if left in ctx.roles and right in ctx.roles:
+                    contact_stats_between_atom_sets(
+                        ctx.roles.coord(left), ctx.roles.coord(right), contact_cutoff=5.0, clash_cutoff=1.0
+                    )
+                    n += 1
+        return n
+
+    results.append(_record(name, "contact_stats_between_atom_sets", len(aas), _measure(contacts, repeat=repeat, setup=setup)))
+
+    long = {t: _tile(df, wide_copies) for t, df in _long_tables(setup(), plugins).items()}
+    n_wide = len(aas) * max(wide_copies, 1)
+
+    def wide(_):
+        return len(build_all_metadata_wide(*(long[t] for t in TABLES)))
+
+    results.append(_record(name, "build_all_metadata_wide", n_wide, _measure(wide, repeat=repeat)))
+    return results
+
+def _versions() -> dict[str, str]:
+    out = {}
+    for pkg in _VERSIONED:
+        try:
+            out[pkg] = metadata.version(pkg)
+        except metadata.PackageNotFoundError:
+            out[pkg] = "unknown"
+    return out
+
+def prepare_datasets(
+    work: Path,
+    *,
+    examples_dir: Path | None = EXAMPLES_DIR,
+    synthetic: tuple[SyntheticSpec, ...] = (),
+    n_synthetic: int = 10,
+    cfg: MetadataConfig | None = None,
+    seed: int = 0,
+    variants: bool = False,
+) -> dict[str, list[Path]]:
+    """
+    Benchmark inputs under ``work``: a copy of ``examples_dir`` ("af2_examples") with synthetic
+    AF2-style PAE JSON next to each model, and one directory of synthetic complexes per spec.
+    With ``variants``, every spec also gets complexes with chains stored out of alphabetical
+    order and complexes with AF3 / Boltz confidence files (both chain orders).
+    """
+    cfg = cfg or MetadataConfig()
+    datasets: dict[str, list[Path]] = {}
+    if examples_dir is not None and examples_dir.exists():
+        dst = work / "examples"
+        dst.mkdir(parents=True, exist_ok=True)
+        for p in list_structures(examples_dir):
+            copy = Path(shutil.copy2(p, dst / p.name))
+            aa = safe_parse_structure(copy, assembly_id=cfg.assembly_id)
+            if aa is not None:
+                write_af2_pae(copy, int(np.count_nonzero(aa.atom_name == "CA")), seed=seed)
+        datasets["af2_examples"] = list_structures(dst)
+    for spec in synthetic:
+        datasets[spec.label] = write_synthetic_set(work / spec.label, spec, n_structures=n_synthetic, seed=seed)
+        if not variants:
+            continue
+        for source in ("af2", "af3", "boltz"):
+            for order, chain_ids in (("sorted", None), ("rotated", rotated_chain_ids(spec.n_chains))):
+                if source == "af2" and chain_ids is None:
+                    continue  # the plain set above
+                label = f"{spec.label}_{source}_{order}"
+                datasets[label] = write_synthetic_set(
+                    work / label, spec, n_structures=n_synthetic, seed=seed, source=source, chain_ids=chain_ids
+                )
+    return datasets
+
+def run_suite(
+    out_path: Path,
+    *,
+    examples_dir: Path | None = EXAMPLES_DIR,
+    synthetic: tuple[SyntheticSpec, ...] = (SyntheticSpec(3, 200, 0.2), SyntheticSpec(3, 600, 0.2)),
+    n_synthetic: int = 10,
+    repeat: int = 3,
+    wide_copies: int = 100,
+    work_dir: Path | None = None,
+    cfg: MetadataConfig | None = None,
+    seed: int = 0,
+) -> dict[str, Any]:
+    """
+    Benchmark the bundled AF2 examples (copied next to synthetic PAE JSON) and synthetic complexes
+    of the given sizes, and write the results as JSON to ``out_path`` (see compare_results).
+    """
+    cfg = cfg or MetadataConfig()
+    cfg = replace(cfg, plugins=tuple(BUILTIN_PLUGINS))
+    work = work_dir or out_path.parent / ".bench_work"
+    shutil.rmtree(work, ignore_errors=True)
+
+    try:
+        datasets = prepare_datasets(
+            work, examples_dir=examples_dir, synthetic=synthetic, n_synthetic=n_synthetic, cfg=cfg, seed=seed
+        )
+        results = []
+        for name, paths in datasets.items():
+            if not paths:
+                continue
+            print(f"Benchmarking {name} ({len(paths)} structures)")
+            results += bench_dataset(name, paths, cfg=cfg, repeat=repeat, wide_copies=wide_copies, seed=seed)
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "versions": _versions(),
+            "repeat": repeat,
+            "wide_copies": wide_copies,
+            "synthetic": [spec.label for spec in synthetic],
+            "n_synthetic": n_synthetic,
+        },
+        "results": results,
+    }
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(out_path, "w") as fh:
+        json.dump(report, fh, indent=2)
+    return report
+
+def load_results(path: Path) -> pd.DataFrame:
+    with open(path) as fh:
+        return pd.DataFrame(json.load(fh)["results"], columns=RESULT_COLS)
+
+def compare_results(
+    old: pd.DataFrame,
+    new: pd.DataFrame,
+    *,
+    time_threshold: float = 0.10,
+    mem_threshold: float = 0.10,
+) -> pd.DataFrame:
+    """
+    Benchmarks of two result files side by side (matched on dataset + benchmark, best-of-repeat times).
+    ``status`` is "slower" / "more_memory" when the new run is worse by more than the thresholds.
+    """
+    keys = ["dataset", "benchmark"]
+    df = old[[*keys, "min_s", "peak_mb"]].merge(
+        new[[*keys, "min_s", "peak_mb"]], on=keys, how="outer", suffixes=("_old", "_new")
+    )
+    df["time_ratio"] = df["min_s_new"] / df["min_s_old"]
+    df["mem_ratio"] = df["peak_mb_new"] / df["peak_mb_old"]
+
+    status = np.full(len(df), "", dtype=object)
+    status[(df["time_ratio"] < 1.0 - time_threshold).to_numpy()] = "faster"
+    status[(df["mem_ratio"] > 1.0 + mem_threshold).to_numpy()] = "more_memory"
+    status[(df["time_ratio"] > 1.0 + time_threshold).to_numpy()] = "slower"
+    status[df["min_s_old"].isna().to_numpy()] = "new"
+    status[df["min_s_new"].isna().to_numpy()] = "missing"
+    df["status"] = status
+    return df
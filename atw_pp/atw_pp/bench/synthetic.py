@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import json
+import string
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+import biotite.structure as struc
+from biotite.structure.io import pdbx
+from biotite.structure.io.pdb import PDBFile
+
+from ..core.ipsae import Source
+from ..io.cif import structure_stem
+
+# poly-ALA backbone along +z, 3.8 A per residue (C(i) - N(i+1) = 1.3 A); side atoms only move in y
+_RESIDUE_ATOMS = (
+    ("N", "N", (0.0, 0.0, 0.0)),
+    ("CA", "C", (0.0, 0.0, 1.46)),
+    ("C", "C", (0.0, 0.0, 2.5)),
+    ("O", "O", (0.0, 1.23, 2.9)),
+    ("CB", "C", (0.0, -1.53, 1.9)),
+)
+_RISE = 3.8
+_CHAIN_GAP = 12.0      # axis spacing of neighbouring chains: no atom within 5 A
+_INTERFACE_GAP = 4.5   # axis spacing of interface residues: contacts, no clashes
+
+@dataclass(frozen=True, slots=True)
+class SyntheticSpec:
+    """Size of a synthetic complex: ``n_chains`` x ``n_res`` poly-ALA residues, ``interface_density`` of
+    each chain's residues in contact with the previous chain."""
+    n_chains: int = 3
+    n_res: int = 200
+    interface_density: float = 0.2
+
+    @classmethod
+    def parse(cls, text: str) -> SyntheticSpec:
+        """"3x200x0.2" -> SyntheticSpec(3, 200, 0.2)."""
+        try:
+            n_chains, n_res, density = text.lower().split("x")
+            return cls(int(n_chains), int(n_res), float(density))
+        except ValueError:
+            raise ValueError(f"Synthetic size must look like CHAINSxRESIDUESxDENSITY (e.g. 3x200x0.2), got '{text}'")
+
+    @property
+    def label(self) -> str:
+        return f"synthetic_{self.n_chains}x{self.n_res}x{self.interface_density:g}"
+
+def rotated_chain_ids(n_chains: int) -> tuple[str, ...]:
+    """Chain ids stored out of alphabetical order, last letter first: 3 -> ("C", "A", "B")."""
+    ids = string.ascii_uppercase[:n_chains]
+    return tuple(ids[-1:] + ids[:-1])
+
+def synthetic_complex(
+    spec: SyntheticSpec, *, seed: int = 0, chain_ids: Sequence[str] | None = None
+) -> struc.AtomArray:
+    """
+    Straight poly-ALA chains side by side along x, stored with ``chain_ids`` in file order
+    (default A, B, C, ...). The first ``interface_density * n_res`` residues of every chain after
+    the first are moved next to the previous chain, so the number of interface atoms scales with
+    the density.
+    """
+    if not 1 <= spec.n_chains <= len(string.ascii_uppercase):
+        raise ValueError(f"n_chains must be 1-{len(string.ascii_uppercase)}, got {spec.n_chains}")
+    chain_ids = tuple(chain_ids) if chain_ids is not None else tuple(string.ascii_uppercase[: spec.n_chains])
+    if len(chain_ids) != spec.n_chains or len(set(chain_ids)) != spec.n_chains:
+        raise ValueError(f"Need {spec.n_chains} distinct chain ids, got {chain_ids}")
+    rng = np.random.default_rng(seed)
+    n_atoms_res = len(_RESIDUE_ATOMS)
+    n = spec.n_chains * spec.n_res * n_atoms_res
+    aa = struc.AtomArray(n)
+
+    offsets = np.array([xyz for _, _, xyz in _RESIDUE_ATOMS])
+    res = np.arange(spec.n_res)
+    n_iface = int(round(spec.interface_density * spec.n_res))
+    coords = []
+    for i in range(spec.n_chains):
+        x = np.full(spec.n_res, i * _CHAIN_GAP)
+        if i > 0:
+            x[:n_iface] = (i - 1) * _CHAIN_GAP + _INTERFACE_GAP
+        origin = np.stack([x, np.zeros(spec.n_res), res * _RISE], axis=1)
+        coords.append((origin[:, None, :] + offsets[None, :, :]).reshape(-1, 3))
+    aa.coord = np.concatenate(coords).astype(np.float32) + rng.normal(0.0, 0.05, (n, 3)).astype(np.float32)
+
+    aa.chain_id = np.repeat(list(chain_ids), spec.n_res * n_atoms_res)
+    aa.res_id = np.tile(np.repeat(res + 1, n_atoms_res), spec.n_chains)
+    aa.res_name = np.full(n, "ALA")
+    aa.atom_name = np.tile([name for name, _, _ in _RESIDUE_ATOMS], spec.n_chains * spec.n_res)
+    aa.element = np.tile([el for _, el, _ in _RESIDUE_ATOMS], spec.n_chains * spec.n_res)
+    aa.hetero = np.zeros(n, dtype=bool)
+    aa.set_annotation("b_factor", np.repeat(rng.uniform(50.0, 95.0, spec.n_chains * spec.n_res), n_atoms_res))
+    return aa
+
+def write_af2_pae(structure: Path, n_res: int, *, seed: int = 0) -> Path:
+    """AF2-style ``{stem}.json`` (pae, plddt, iptm) next to ``structure``, as ipsae looks it up."""
+    rng = np.random.default_rng(seed)
+    pae = rng.uniform(0.5, 30.0, (n_res, n_res)).round(2)
+    out = structure.with_name(f"{structure_stem(structure)}.json")
+    with open(out, "w") as fh:
+        json.dump({"pae": pae.tolist(), "plddt": rng.uniform(50.0, 95.0, n_res).round(2).tolist(), "iptm": 0.8}, fh)
+    return out
+
+def _iptm_matrix(rng: np.random.Generator, n_chains: int) -> np.ndarray:
+    return rng.uniform(0.2, 0.9, (n_chains, n_chains)).round(3)
+
+def write_af3_confidences(structure: Path, aa: struc.AtomArray, *, seed: int = 0) -> Path:
+    """
+    AF3-style ``*_full_data_*.json`` (pae, atom_plddts) and ``*_summary_confidences_*.json``
+    (chain_pair_iptm) next to a ``*_model_*`` structure of ``aa`` (one token per residue).
+    """
+    rng = np.random.default_rng(seed)
+    n_res = int(np.count_nonzero(aa.atom_name == "CA"))
+    n_chains = len(dict.fromkeys(aa.chain_id.tolist()))
+    stem = structure_stem(structure)
+    out = structure.with_name(f"{stem.replace('_model_', '_full_data_')}.json")
+    with open(out, "w") as fh:
+        json.dump({
+            "pae": rng.uniform(0.5, 30.0, (n_res, n_res)).round(2).tolist(),
+            "atom_plddts": rng.uniform(50.0, 95.0, len(aa)).round(2).tolist(),
+        }, fh)
+    with open(structure.with_name(f"{stem.replace('_model_', '_summary_confidences_')}.json"), "w") as fh:
+        json.dump({"chain_pair_iptm": _iptm_matrix(rng, n_chains).tolist()}, fh)
+    return out
+
+def write_boltz_confidences(structure: Path, n_res: int, n_chains: int, *, seed: int = 0) -> Path:
+    """Boltz-style ``pae_{stem}.npz``, ``plddt_{stem}.npz`` (0-1) and ``confidence_{stem}.json`` (pair_chains_iptm)."""
+    rng = np.random.default_rng(seed)
+    stem = structure_stem(structure)
+    out = structure.with_name(f"pae_{stem}.npz")
+    np.savez(out, pae=rng.uniform(0.5, 30.0, (n_res, n_res)).astype(np.float32))
+    np.savez(structure.with_name(f"plddt_{stem}.npz"), plddt=rng.uniform(0.5, 0.95, n_res).astype(np.float32))
+    iptm = _iptm_matrix(rng, n_chains)
+    with open(structure.with_name(f"confidence_{stem}.json"), "w") as fh:
+        json.dump({"pair_chains_iptm": {str(i): {str(j): float(v) for j, v in enumerate(row)} for i, row in enumerate(iptm)}}, fh)
+    return out
+
+def write_synthetic_set(
+    out_dir: Path,
+    spec: SyntheticSpec,
+    *,
+    n_structures: int = 10,
+    seed: int = 0,
+    source: Source = "af2",
+    chain_ids: Sequence[str] | None = None,
+) -> list[Path]:
+    """
+    ``n_structures`` synthetic complexes under ``out_dir`` with the confidence files of ``source``:
+    PDB + AF2-style PAE JSON, or mmCIF + AF3 / Boltz outputs (see write_af3_confidences,
+    write_boltz_confidences). ``chain_ids`` sets the chain order in the files (synthetic_complex).
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for k in range(n_structures):
+        aa = synthetic_complex(spec, seed=seed + k, chain_ids=chain_ids)
+        if source == "af2":
+            path = out_dir / f"{spec.label}_{k:03d}.pdb"
+            pdb = PDBFile()
+            pdb.set_structure(aa)
+            pdb.write(path)
+            write_af2_pae(path, spec.n_chains * spec.n_res, seed=seed + k)
+        else:
+            path = out_dir / (f"{spec.label}_{k:03d}_model_0.cif" if source == "af3" else f"{spec.label}_{k:03d}.cif")
+            cif = pdbx.CIFFile()
+            pdbx.set_structure(cif, aa)
+            cif.write(path)
+            if source == "af3":
+                write_af3_confidences(path, aa, seed=seed + k)
+            else:
+                write_boltz_confidences(path, spec.n_chains * spec.n_res, spec.n_chains, seed=seed + k)
+        paths.append(path)
+    return paths
+
+def synthetic_paragraph_preds(
+    structures: dict[Path, struc.AtomArray], chain_ids: tuple[str, ...], *, seed: int = 0
+) -> pd.DataFrame:
+    """Paragraph-style predictions (one row per CA of ``chain_ids``) for parsed structures, keyed by stem."""
+    rng = np.random.default_rng(seed)
+    frames = []
+    for path, aa in structures.items():
+        ca = aa[(aa.atom_name == "CA") & np.isin(aa.chain_id, chain_ids)]
+        frames.append(pd.DataFrame({
+            "pdb": structure_stem(path),
+            "chain_id": np.asarray(ca.chain_id).astype(str),
+            "IMGT": np.asarray(ca.res_id).astype(str),
+            "pred": rng.uniform(0.0, 1.0, len(ca)).astype(np.float32),
+            "x": ca.coord[:, 0],
+            "y": ca.coord[:, 1],
+            "z": ca.coord[:, 2],
+        }))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=["pdb", "chain_id", "IMGT", "pred", "x", "y", "z"])
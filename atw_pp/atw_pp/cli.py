@@ -1,9 +1,12 @@
 from __future__ import annotations
 
 import argparse
+import sys
 from pathlib import Path
 
 from .config import MetadataConfig, RoleSpec
+from .io.cif import parse_shard
+from .merge import merge_outputs
 from .run import build_metadata
 
 def _add_role_arg(ap: argparse.ArgumentParser):
@@ -28,10 +31,52 @@ def _add_interface_pair_arg(ap: argparse.ArgumentParser):
         help="Add an interface pair: --iface_pair antibody antigen (repeatable)",
     )
 
-def main() -> None:
+def _shard_arg(spec: str) -> tuple[int, int]:
+    try:
+        return parse_shard(spec)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from None
+
+def merge_main(argv: list[str]) -> None:
+    ap = argparse.ArgumentParser("atw-pp merge", description="Combine the output directories of sharded runs")
+    ap.add_argument("shard_dirs", nargs="+", help="Output directories of the shards (--shard i/N runs)")
+    ap.add_argument("--out_dir", required=True)
+    ap.add_argument(
+        "--wide_batch",
+        type=int,
+        default=0,
+        help="Build all_metadata.parquet in batches of N structures to bound memory (0 = all at once)",
+    )
+    args = ap.parse_args(argv)
+
+    out_dir = Path(args.out_dir).resolve()
+    try:
+        counts = merge_outputs(
+            [Path(d).resolve() for d in args.shard_dirs],
+            out_dir,
+            wide_batch=args.wide_batch,
+        )
+    except ValueError as e:
+        ap.error(str(e))
+    print(f"Merged {len(args.shard_dirs)} shards:")
+    for name, n in counts.items():
+        print("  ", out_dir / name, "rows=", n)
+
+def main(argv: list[str] | None = None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["merge"]:
+        return merge_main(argv[1:])
+
     ap = argparse.ArgumentParser("atw_pp (role + plugin based)")
 
-    ap.add_argument("--cif_dir", required=True)
+    ap.add_argument("--cif_dir", default=None, help="Directory walked for structures (base of relative --input_list paths)")
+    ap.add_argument(
+        "--input_list",
+        default=None,
+        help="Text (one path per line), CSV/TSV or Parquet list of structure paths (+ optional size column); "
+        "skips walking --cif_dir",
+    )
+    ap.add_argument("--scan_workers", type=int, default=8, help="Threads walking --cif_dir")
     ap.add_argument("--out_dir", default="atw_pp_out")
 
     ap.add_argument("--param_csv", nargs="*", default=None)
@@ -60,8 +105,28 @@ def main() -> None:
         help="Which roles to emit role-level paragraph summaries for (default: vh vl antibody)",
     )
 
+    # ipSAE
+    ap.add_argument(
+        "--ipsae_cutoff",
+        action="append",
+        nargs=2,
+        type=float,
+        default=None,
+        metavar=("PAE", "DIST"),
+        help="ipSAE PAE / distance cutoff pair, repeatable; all pairs are scored in one pass (default: 15 15)",
+    )
+    ap.add_argument("--pae_dtype", default="float32", choices=["float32", "float16"], help="Storage dtype of loaded PAE")
+    ap.add_argument("--pae_cache", default=None, help="Directory caching PAE parsed from JSON as .npy")
+
+    ap.add_argument("--param_columns", nargs="*", default=None, help="Param columns to read (default: all)")
     ap.add_argument("--param_prefix", default="param__")
     ap.add_argument("--param_on_conflict", default="keep_row", choices=["keep_row", "overwrite"])
+    ap.add_argument(
+        "--param_attach",
+        default="rows",
+        choices=["rows", "table"],
+        help="Attach param columns to every table row, or write them once to params_metadata.parquet",
+    )
 
     ap.add_argument(
         "--plugins",
@@ -70,15 +135,63 @@ def main() -> None:
         help="Plugin names to run",
     )
 
-    args = ap.parse_args()
+    # Execution
+    ap.add_argument("--workers", type=int, default=1, help="Worker processes (1 = serial, 0 = all CPUs)")
+    ap.add_argument("--chunksize", type=int, default=16, help="Structures per task sent to a worker")
+    ap.add_argument("--flush_every", type=int, default=1000, help="Flush table rows to parquet every N structures")
+    ap.add_argument("--flush_mb", type=float, default=256.0, help="Flush a table once its buffer reaches ~M megabytes")
+    ap.add_argument(
+        "--wide_batch",
+        type=int,
+        default=0,
+        help="Build all_metadata.parquet in batches of N structures to bound memory (0 = all at once)",
+    )
+    ap.add_argument(
+        "--profile",
+        action="store_true",
+        help="Time each stage/plugin per structure into timings.parquet and print the slowest ones",
+    )
+
+    ap.add_argument(
+        "--shard",
+        type=_shard_arg,
+        default=None,
+        metavar="i/N",
+        help="Process only shard i of N (0-based, size-balanced, same split on every invocation); "
+        "combine the shard outputs with 'atw-pp merge'",
+    )
+
+    # Parse cache
+    ap.add_argument("--parse_cache", default=None, help="Directory caching parsed structures across runs")
+    ap.add_argument("--parse_cache_gb", type=float, default=50.0, help="Parse cache size limit (LRU eviction)")
+
+    # Incremental runs
+    ap.add_argument(
+        "--incremental", "--resume",
+        dest="incremental",
+        action="store_true",
+        help="Skip structures unchanged since the last run in --out_dir and merge new results into its tables",
+    )
+    ap.add_argument(
+        "--fingerprint",
+        default="stat",
+        choices=["stat", "sha256"],
+        help="How unchanged files are detected: size+mtime (stat) or size+content hash (sha256)",
+    )
+
+    args = ap.parse_args(argv)
+    if args.cif_dir is None and args.input_list is None:
+        ap.error("one of --cif_dir or --input_list is required")
 
     cfg = MetadataConfig(
         assembly_id=args.assembly_id,
         paragraph_cutoff=args.paragraph_cutoff,
         paragraph_id_mode=args.paragraph_id_mode,
         csv_mode=args.csv_mode,
+        param_columns=tuple(args.param_columns) if args.param_columns is not None else None,
         param_prefix=args.param_prefix,
         param_on_conflict=args.param_on_conflict,
+        param_attach=args.param_attach,
         plugins=tuple(args.plugins),
     )
 
@@ -111,6 +224,11 @@ def main() -> None:
     if args.iface_pair:
         iface_pairs = tuple((a, b) for a, b in args.iface_pair)
 
+    # ipSAE cutoff sweep
+    ipsae_cutoffs = cfg.ipsae_cutoffs
+    if args.ipsae_cutoff:
+        ipsae_cutoffs = tuple((pae, dist) for pae, dist in args.ipsae_cutoff)
+
     # Role-level paratope summaries
     role_summ = cfg.role_paratope_summaries
     if args.role_paratope_summaries is not None:
@@ -124,18 +242,36 @@ def main() -> None:
         paragraph_id_mode=cfg.paragraph_id_mode,
         role_paratope_summaries=role_summ,
         interface_pairs=iface_pairs,
+        ipsae_cutoffs=ipsae_cutoffs,
+        pae_dtype=args.pae_dtype,
+        pae_cache=str(Path(args.pae_cache).resolve()) if args.pae_cache else None,
         csv_mode=cfg.csv_mode,
+        param_columns=cfg.param_columns,
         param_prefix=cfg.param_prefix,
         param_on_conflict=cfg.param_on_conflict,
+        param_attach=cfg.param_attach,
         plugins=cfg.plugins,
     )
 
     build_metadata(
-        cif_dir=Path(args.cif_dir).resolve(),
+        cif_dir=Path(args.cif_dir).resolve() if args.cif_dir else None,
         out_dir=Path(args.out_dir).resolve(),
         cfg=cfg,
         param_csvs=[Path(p).resolve() for p in args.param_csv] if args.param_csv else None,
         paragraph_preds=Path(args.paragraph_preds).resolve() if args.paragraph_preds else None,
+        workers=args.workers,
+        chunksize=args.chunksize,
+        flush_every=args.flush_every,
+        flush_mb=args.flush_mb,
+        incremental=args.incremental,
+        fingerprint=args.fingerprint,
+        parse_cache=Path(args.parse_cache).resolve() if args.parse_cache else None,
+        parse_cache_gb=args.parse_cache_gb,
+        wide_batch=args.wide_batch,
+        profile=args.profile,
+        shard=args.shard,
+        input_list=Path(args.input_list).resolve() if args.input_list else None,
+        scan_workers=args.scan_workers,
     )
 
 if __name__ == "__main__":
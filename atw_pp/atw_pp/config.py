@@ -5,6 +5,7 @@ from typing import Literal, Tuple, Dict, Optional
 
 CsvMode = Literal["merge", "append"]
 Conflict = Literal["keep_row", "overwrite"]
+ParamAttach = Literal["rows", "table"]
 
 @dataclass(frozen=True, slots=True)
 class RoleSpec:
@@ -30,10 +31,23 @@ class MetadataConfig:
     # Each tuple is (left_role, right_role)
     interface_pairs: Tuple[Tuple[str, str], ...] = (("antibody", "antigen"),)
 
+    # ----- ipSAE -----
+    # (pae_cutoff, dist_cutoff) pairs, all scored in one pass
+    ipsae_cutoffs: Tuple[Tuple[float, float], ...] = ((15.0, 15.0),)
+    # storage dtype of loaded PAE matrices ("float16" halves memory again)
+    pae_dtype: Literal["float32", "float16"] = "float32"
+    # directory caching PAE parsed from JSON as .npy (None = no cache)
+    pae_cache: Optional[str] = None
+
     # ----- param CSV behavior -----
     csv_mode: CsvMode = "merge"
+    # only these param columns are read (None = all)
+    param_columns: Optional[Tuple[str, ...]] = None
     param_prefix: str = "param__"
     param_on_conflict: Conflict = "keep_row"
+    # "rows": param columns on every row of every table
+    # "table": one params_metadata.parquet row per structure, joined by path in all_metadata only
+    param_attach: ParamAttach = "rows"
 
     # plugins to run (by name)
     plugins: tuple[str, ...] = (
@@ -1,13 +1,19 @@
 from .annotations import ensure_unit_id_annotation, select_chain_polymer_atoms
 from .epitope import points_repr_from_points
-from .selection import build_chain_map, build_roles
-from .contacts import contact_stats_between_atom_sets
+from .selection import AtomViews, ChainSegments, build_chain_map, build_roles, chain_segments, role_chain_ids
+from .contacts import ChainContactIndex, chain_contact_index, contact_stats_between_atom_sets
 
 __all__ = [
     "ensure_unit_id_annotation",
     "select_chain_polymer_atoms",
     "points_repr_from_points",
+    "AtomViews",
+    "ChainSegments",
+    "chain_segments",
     "build_chain_map",
     "build_roles",
+    "role_chain_ids",
     "contact_stats_between_atom_sets",
+    "ChainContactIndex",
+    "chain_contact_index",
 ]
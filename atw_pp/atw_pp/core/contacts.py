@@ -1,38 +1,135 @@
 from __future__ import annotations
 
+import warnings
+
 import numpy as np
-import biotite.structure as struc
 from scipy.spatial import cKDTree
 
+from .selection import AtomViews
+
+def _valid_coords(coord: np.ndarray) -> np.ndarray:
+    return coord[~np.isnan(coord).any(axis=1)]
+
+def _nearest_within(tree: cKDTree, points: np.ndarray, cutoff: float) -> np.ndarray:
+    """Per point, distance to the closest tree atom if it is <= ``cutoff``, else inf."""
+    # cKDTree drops neighbours at exactly the bound; nudge it so the cutoff is inclusive
+    d, _ = tree.query(points, k=1, distance_upper_bound=np.nextafter(cutoff, np.inf))
+    return d
+
+def _stats_from_nearest(d: np.ndarray, contact_cutoff: float, clash_cutoff: float) -> tuple[int, int, float]:
+    finite = d[np.isfinite(d)]
+    return (
+        int(np.count_nonzero(finite <= contact_cutoff)),
+        int(np.count_nonzero(finite <= clash_cutoff)),
+        float(finite.min()) if len(finite) else float("inf"),
+    )
+
 def contact_stats_between_atom_sets(
     coord1: np.ndarray,
     coord2: np.ndarray,
     *,
     contact_cutoff: float = 5.0,
     clash_cutoff: float = 2.0,
-    cell_size: float = 6.0,
+    cell_size: float | None = None,
 ) -> dict:
-    v1 = ~np.isnan(coord1).any(axis=1)
-    v2 = ~np.isnan(coord2).any(axis=1)
-    c1 = coord1[v1]
-    c2 = coord2[v2]
+    """
+    Atoms of set 1 within ``contact_cutoff`` / ``clash_cutoff`` of set 2, and the minimum
+    inter-set distance. One bounded nearest-neighbour query at the larger cutoff gives all
+    three (memory O(N1), no N1 x N2 masks); only when nothing is in range is an unbounded
+    query needed for ``min_dist``. ``cell_size`` is deprecated and ignored.
+    """
+    if cell_size is not None:
+        warnings.warn(
+            "contact_stats_between_atom_sets: cell_size is deprecated and ignored (KD-tree query)",
+            DeprecationWarning,
+            stacklevel=2,
+        )
+    c1 = _valid_coords(coord1)
+    c2 = _valid_coords(coord2)
 
     if c1.size == 0 or c2.size == 0:
         return {"n_contact_atoms": 0, "n_clash_atoms": 0, "min_dist": float("inf")}
 
-    cl = struc.CellList(c2, cell_size=cell_size)
-    near_c = cl.get_atoms(c1, contact_cutoff, as_mask=True)
-    near_x = cl.get_atoms(c1, clash_cutoff, as_mask=True)
-
-    has_contact = np.any(near_c, axis=1)
-    has_clash = np.any(near_x, axis=1)
-
     t2 = cKDTree(c2)
-    d, _ = t2.query(c1, k=1)
-    min_dist = float(np.min(d)) if len(d) else float("inf")
+    n_contact, n_clash, min_dist = _stats_from_nearest(
+        _nearest_within(t2, c1, max(contact_cutoff, clash_cutoff)), contact_cutoff, clash_cutoff
+    )
+    if not np.isfinite(min_dist):
+        min_dist = float(t2.query(c1, k=1)[0].min())
 
     return {
-        "n_contact_atoms": int(np.count_nonzero(has_contact)),
-        "n_clash_atoms": int(np.count_nonzero(has_clash)),
+        "n_contact_atoms": n_contact,
+        "n_clash_atoms": n_clash,
         "min_dist": min_dist,
     }
+
+class ChainContactIndex:
+    """
+    One KD-tree per chain of a structure. Nearest-atom distances are computed once per
+    (left chain, right chain) and reused by every role pair made of those chains, so the
+    work scales with the number of chains rather than with roles x interface pairs.
+    """
+
+    def __init__(self, chains: AtomViews):
+        self._coords = {cid: _valid_coords(chains.coord(cid)) for cid in chains}
+        self._trees: dict[str, cKDTree] = {}
+        self._nearest: dict[tuple[str, str, float | None], np.ndarray] = {}
+
+    def tree(self, chain_id: str) -> cKDTree:
+        t = self._trees.get(chain_id)
+        if t is None:
+            t = self._trees[chain_id] = cKDTree(self._coords[chain_id])
+        return t
+
+    def nearest(self, left: str, right: str, cutoff: float | None = None) -> np.ndarray:
+        """
+        Distance from every (non-NaN) atom of ``left`` to the closest atom of ``right``;
+        with ``cutoff``, distances beyond it are inf (a bounded, much cheaper query).
+        """
+        key = (left, right, cutoff)
+        d = self._nearest.get(key)
+        if d is None:
+            c1, c2 = self._coords[left], self._coords[right]
+            if len(c1) == 0 or len(c2) == 0:
+                d = np.full(len(c1), np.inf)
+            elif cutoff is None:
+                d, _ = self.tree(right).query(c1, k=1)
+            else:
+                d = _nearest_within(self.tree(right), c1, cutoff)
+            self._nearest[key] = d
+        return d
+
+    def contact_stats(
+        self,
+        left_chains: tuple[str, ...],
+        right_chains: tuple[str, ...],
+        *,
+        contact_cutoff: float = 5.0,
+        clash_cutoff: float = 2.0,
+    ) -> dict:
+        """contact_stats_between_atom_sets for the atoms of ``left_chains`` vs ``right_chains``."""
+        left = [c for c in left_chains if len(self._coords.get(c, ())) > 0]
+        right = [c for c in right_chains if len(self._coords.get(c, ())) > 0]
+        if not left or not right:
+            return {"n_contact_atoms": 0, "n_clash_atoms": 0, "min_dist": float("inf")}
+
+        bound = max(contact_cutoff, clash_cutoff)
+        n_contact = n_clash = 0
+        min_dist = float("inf")
+        for l in left:
+            d = np.min([self.nearest(l, r, bound) for r in right], axis=0)
+            nc, nx, md = _stats_from_nearest(d, contact_cutoff, clash_cutoff)
+            n_contact += nc
+            n_clash += nx
+            min_dist = min(min_dist, md)
+        if not np.isfinite(min_dist):
+            # nothing within the cutoff: fall back to exact nearest distances
+            min_dist = min(float(self.nearest(l, r).min()) for l in left for r in right)
+        return {"n_contact_atoms": n_contact, "n_clash_atoms": n_clash, "min_dist": min_dist}
+
+def chain_contact_index(ctx) -> ChainContactIndex:
+    """The ChainContactIndex of ``ctx.chains``, built once per structure and kept in ``ctx.cache``."""
+    idx = ctx.cache.get("chain_contact_index")
+    if idx is None:
+        idx = ctx.cache["chain_contact_index"] = ChainContactIndex(ctx.chains)
+    return idx
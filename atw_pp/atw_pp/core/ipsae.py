@@ -0,0 +1,389 @@
+"""
+In-process ipSAE / ipTM / pDockQ / pDockQ2 / LIS, ported from
+externals/ipsae/ipsae.py (Dunbrack lab, version 4, MIT license):
+https://www.biorxiv.org/content/10.1101/2025.02.10.637595v2
+
+The script parses the structure text itself and loops over residues in Python;
+here the residue tokens come from the already-parsed AtomArray and every
+per-residue reduction is done with numpy on row chunks of the chain1 x chain2
+PAE block. Distance cutoffs use a per-chain KD-tree neighbour list instead of a
+dense numres x numres distance matrix, so working memory follows the chain
+pair and the interface, not the whole assembly.
+Output rows carry the same columns and values as the script's ``*_PAE_DIST.txt``
+(without the text formatting / rounding). That includes the script's fill order:
+it picks the symmetric "max" values while it is still computing the asymmetric
+ones, so when chain b is stored before chain a (a < b) the a->b side is still 0
+and the max row takes the b->a values.
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import Literal
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+Source = Literal["af2", "af3", "boltz"]
+Cutoff = tuple[float, float]  # (pae_cutoff, dist_cutoff)
+
+RESIDUE_SET = {
+    "ALA", "ARG", "ASN", "ASP", "CYS",
+    "GLN", "GLU", "GLY", "HIS", "ILE",
+    "LEU", "LYS", "MET", "PHE", "PRO",
+    "SER", "THR", "TRP", "TYR", "VAL",
+    "DA", "DC", "DT", "DG", "A", "C", "U", "G",
+}
+NUC_RESIDUE_SET = {"DA", "DC", "DT", "DG", "A", "C", "U", "G"}
+
+PDOCKQ_CUTOFF = 8.0
+LIS_PAE_CUTOFF = 12.0
+CHUNK_ROWS = 512  # chain1 rows of a PAE block processed at once
+
+SCORE_COLS = (
+    "ipSAE", "ipSAE_d0chn", "ipSAE_d0dom", "ipTM_af", "ipTM_d0chn",
+    "pDockQ", "pDockQ2", "LIS",
+    "n0res", "n0chn", "n0dom", "d0res", "d0chn", "d0dom",
+    "nres1", "nres2", "dist1", "dist2",
+)
+
+def ptm_func(x, d0):
+    return 1.0 / (1.0 + (x / d0) ** 2.0)
+
+def calc_d0(L: float, pair_type: str) -> float:
+    """d0 of Yang & Skolnick (2004); minimum 1.0 (2.0 for nucleic acid pairs)."""
+    L = float(L)
+    min_value = 2.0 if pair_type == "nucleic_acid" else 1.0
+    d0 = 1.24 * (L - 15) ** (1.0 / 3.0) - 1.8 if L > 27 else 1.0
+    return max(min_value, d0)
+
+def calc_d0_array(L, pair_type: str) -> np.ndarray:
+    L = np.maximum(26, np.asarray(L, dtype=float))
+    min_value = 2.0 if pair_type == "nucleic_acid" else 1.0
+    return np.maximum(min_value, 1.24 * (L - 15) ** (1.0 / 3.0) - 1.8)
+
+@dataclass(frozen=True, slots=True)
+class IpsaeTokens:
+    """Residue tokens as the reference script sees them (one per CA / C1' atom)."""
+
+    chains: np.ndarray      # (numres,) chain id per residue
+    resnums: np.ndarray     # (numres,) residue number per residue
+    resnames: np.ndarray    # (numres,) residue name per residue
+    cb_coord: np.ndarray    # (numres, 3) CB coords (CA for GLY, C3' for nucleotides), float64
+    ca_atom: np.ndarray     # (numres,) atom index of the CA / C1' atom (AF3 atom_plddts)
+    cb_atom: np.ndarray     # (numres,) atom index of the CB-like atom
+    token_mask: np.ndarray  # (ntokens,) True for tokens kept in the residue PAE matrix (AF3/Boltz)
+
+def tokens_from_atoms(aa) -> IpsaeTokens:
+    names = np.asarray(aa.atom_name).astype(str)
+    res = np.asarray(aa.res_name).astype(str)
+    if "is_polymer" in aa.get_annotation_categories():
+        ligand = ~np.asarray(aa.is_polymer, dtype=bool) | (res == "LIG")
+    else:
+        ligand = res == "LIG"
+
+    is_rep = ~ligand & ((names == "CA") | (np.char.find(names, "C1") >= 0))
+    is_cb = ~ligand & (
+        (names == "CB")
+        | (np.char.find(names, "C3") >= 0)
+        | ((res == "GLY") & (names == "CA"))
+    )
+    if int(is_rep.sum()) != int(is_cb.sum()):
+        raise ValueError(
+            f"ipSAE needs one CB-like atom per residue: {int(is_rep.sum())} CA/C1' vs {int(is_cb.sum())} CB/C3'"
+        )
+
+    # one PAE token per ligand atom, per CA/C1' atom and per other atom of a non-standard residue
+    standard = np.isin(res, list(RESIDUE_SET))
+    has_token = ligand | is_rep | ~standard
+    token_mask = is_rep[has_token]
+
+    if "atom_id" in aa.get_annotation_categories():
+        atom_index = np.asarray(aa.atom_id, dtype=np.int64) - 1
+    else:
+        atom_index = np.arange(len(aa), dtype=np.int64)
+
+    return IpsaeTokens(
+        chains=np.asarray(aa.chain_id).astype(str)[is_rep],
+        resnums=np.asarray(aa.res_id, dtype=np.int64)[is_rep],
+        resnames=res[is_rep],
+        cb_coord=np.asarray(aa.coord, dtype=np.float64)[is_cb],
+        ca_atom=atom_index[is_rep],
+        cb_atom=atom_index[is_cb],
+        token_mask=token_mask,
+    )
+
+def _unique_in_order(a: np.ndarray) -> np.ndarray:
+    _, first = np.unique(a, return_index=True)
+    return a[np.sort(first)]
+
+def _n_unique(a: np.ndarray) -> int:
+    return int(len(np.unique(a)))
+
+def _neighbours(t1: cKDTree, t2: cKDTree, r: float) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(i, j, distance) of every CB pair within ``r``; i / j index into the two chains."""
+    sdm = t1.sparse_distance_matrix(t2, r, output_type="ndarray")
+    return sdm["i"].astype(np.int64), sdm["j"].astype(np.int64), sdm["v"]
+
+def _script_argmax(values: np.ndarray, i1: np.ndarray) -> int | None:
+    """
+    Position in chain1 of the residue the script's np.argmax picks over its
+    full-length by-residue array (zeros outside chain1); None if that is a
+    residue outside chain1 (all values 0 and chain1 does not start the array).
+    """
+    k = int(np.argmax(values))
+    if values[k] > 0 or i1[0] == 0:
+        return k
+    return None
+
+def _masked_row_mean(values: np.ndarray, mask: np.ndarray, cnt: np.ndarray) -> np.ndarray:
+    tot = np.where(mask, values, 0.0).sum(axis=1)
+    return np.divide(tot, cnt, out=np.zeros(len(cnt)), where=cnt > 0)
+
+def _pair_scores(
+    pae: np.ndarray,
+    i1: np.ndarray,
+    i2: np.ndarray,
+    t1: cKDTree,
+    t2: cKDTree,
+    *,
+    resnums: np.ndarray,
+    cb_plddt: np.ndarray,
+    pair_type: str,
+    cutoffs: tuple[Cutoff, ...],
+) -> dict[Cutoff, dict]:
+    """
+    Asymmetric chain1 -> chain2 scores for every (pae_cutoff, dist_cutoff) in ``cutoffs``.
+
+    Works on chain1 row chunks of the chain1 x chain2 PAE block. Each chunk is read
+    and turned into d0chn PTM values once; only the PAE masks and the d0res / d0dom
+    transforms are redone per PAE cutoff. pDockQ, pDockQ2, LIS and ipTM_d0chn do
+    not depend on the cutoffs and are computed once.
+    """
+    n1, n2 = len(i1), len(i2)
+    pae_cutoffs = sorted({pc for pc, _ in cutoffs})
+
+    # CB neighbour list, shared by pDockQ / pDockQ2 (<= 8 A) and the interface residue counts (< dist_cutoff)
+    ni, nj, nd = _neighbours(t1, t2, max([PDOCKQ_CUTOFF] + [dc for _, dc in cutoffs]))
+    pae_nb = np.asarray(pae[i1[ni], i2[nj]], dtype=np.float64)
+
+    close = nd <= PDOCKQ_CUTOFF
+    npairs = int(close.sum())
+    if npairs > 0:
+        iface = np.union1d(i1[ni[close]], i2[nj[close]])
+        mean_plddt = cb_plddt[iface].mean()
+        x = mean_plddt * math.log10(npairs)
+        pdockq = 0.724 / (1 + math.exp(-0.052 * (x - 152.611))) + 0.018
+        mean_ptm = ptm_func(pae_nb[close], 10.0).sum() / npairs
+        x = mean_plddt * mean_ptm
+        pdockq2 = 1.31 / (1 + math.exp(-0.075 * (x - 84.733))) + 0.005
+    else:
+        pdockq = 0.0
+        pdockq2 = 0.0
+
+    n0chn = n1 + n2
+    d0chn = calc_d0(n0chn, pair_type)
+
+    # pass 1: everything that does not need d0dom
+    iptm_chn = np.zeros(n1)
+    ipsae_chn = {pc: np.zeros(n1) for pc in pae_cutoffs}
+    ipsae_res = {pc: np.zeros(n1) for pc in pae_cutoffs}
+    n0res = {pc: np.zeros(n1, dtype=np.int64) for pc in pae_cutoffs}
+    col_valid = {pc: np.zeros(n2, dtype=bool) for pc in pae_cutoffs}
+    lis_sum, lis_n = 0.0, 0
+    for lo in range(0, n1, CHUNK_ROWS):
+        sl = slice(lo, lo + CHUNK_ROWS)
+        block = np.asarray(pae[np.ix_(i1[sl], i2)], dtype=np.float64)
+
+        good = block < LIS_PAE_CUTOFF
+        lis_sum += float(((LIS_PAE_CUTOFF - block) / LIS_PAE_CUTOFF)[good].sum())
+        lis_n += int(good.sum())
+
+        ptm = ptm_func(block, d0chn)
+        iptm_chn[sl] = ptm.mean(axis=1)
+        for pc in pae_cutoffs:
+            valid = block < pc
+            cnt = valid.sum(axis=1)
+            n0res[pc][sl] = cnt
+            col_valid[pc] |= valid.any(axis=0)
+            ipsae_chn[pc][sl] = _masked_row_mean(ptm, valid, cnt)
+            d0res = calc_d0_array(cnt, pair_type)
+            ipsae_res[pc][sl] = _masked_row_mean(ptm_func(block, d0res[:, None]), valid, cnt)
+
+    nres1 = {pc: _n_unique(resnums[i1[n0res[pc] > 0]]) for pc in pae_cutoffs}
+    nres2 = {pc: _n_unique(resnums[i2[col_valid[pc]]]) for pc in pae_cutoffs}
+
+    # pass 2: d0 from the residues with good interchain PAE; only rows with a valid pair contribute
+    n0dom = {pc: nres1[pc] + nres2[pc] for pc in pae_cutoffs}
+    d0dom = {pc: calc_d0(n0dom[pc], pair_type) for pc in pae_cutoffs}
+    ipsae_dom = {pc: np.zeros(n1) for pc in pae_cutoffs}
+    rows = np.flatnonzero(n0res[pae_cutoffs[-1]] > 0)  # the largest cutoff has the most valid rows
+    for lo in range(0, len(rows), CHUNK_ROWS):
+        r = rows[lo:lo + CHUNK_ROWS]
+        block = np.asarray(pae[np.ix_(i1[r], i2)], dtype=np.float64)
+        for pc in pae_cutoffs:
+            valid = block < pc
+            ipsae_dom[pc][r] = _masked_row_mean(ptm_func(block, d0dom[pc]), valid, n0res[pc][r])
+
+    out: dict[Cutoff, dict] = {}
+    for pc, dc in cutoffs:
+        k = _script_argmax(ipsae_res[pc], i1)
+        n0res_k = int(n0res[pc][k]) if k is not None else 0
+        dvalid = (nd < dc) & (pae_nb < pc)
+        out[(pc, dc)] = {
+            "ipSAE": float(ipsae_res[pc][k]) if k is not None else 0.0,
+            "ipSAE_d0chn": float(ipsae_chn[pc].max()),
+            "ipSAE_d0dom": float(ipsae_dom[pc].max()),
+            "ipTM_d0chn": float(iptm_chn.max()),
+            "pDockQ": float(pdockq),
+            "pDockQ2": float(pdockq2),
+            "LIS": lis_sum / lis_n if lis_n else 0.0,
+            "n0res": n0res_k,
+            "n0chn": int(n0chn),
+            "n0dom": int(n0dom[pc]),
+            "d0res": float(calc_d0_array(n0res_k, pair_type)),
+            "d0chn": float(d0chn),
+            "d0dom": float(d0dom[pc]),
+            "nres1": nres1[pc],
+            "nres2": nres2[pc],
+            "dist1": _n_unique(resnums[i1[ni[dvalid]]]),
+            "dist2": _n_unique(resnums[i2[nj[dvalid]]]),
+        }
+    return out
+
+def ipsae_scores(
+    tokens: IpsaeTokens,
+    pae: np.ndarray,
+    cb_plddt: np.ndarray,
+    *,
+    pae_cutoff: float = 15.0,
+    dist_cutoff: float = 15.0,
+    iptm: float | dict[tuple[str, str], float] = -1.0,
+    source: Source = "af2",
+) -> list[dict]:
+    """
+    Score every ordered chain pair.
+
+    Args:
+        tokens: residue tokens from ``tokens_from_atoms``.
+        pae: (numres, numres) residue PAE matrix (already reduced with ``tokens.token_mask`` for AF3/Boltz);
+            may be float32 or memory-mapped, only chain-pair row chunks are read at a time.
+        cb_plddt: (numres,) pLDDT of the CB-like atom of each residue (pDockQ / pDockQ2).
+        pae_cutoff, dist_cutoff: ipSAE PAE cutoff and interface distance cutoff.
+        iptm: AF2 global ipTM, or per ordered chain pair ipTM (AF3 / Boltz).
+        source: "af2", "af3" or "boltz"; decides how ipTM_af is reported on the max rows.
+
+    Returns:
+        Rows in the order of the script's .txt: for every chain pair (a < b) the
+        asym rows a->b and b->a, then the max row. Each row has Chn1, Chn2, Type
+        ("asym" / "max") and the ``SCORE_COLS``.
+    """
+    cutoff = (float(pae_cutoff), float(dist_cutoff))
+    return ipsae_sweep(tokens, pae, cb_plddt, cutoffs=(cutoff,), iptm=iptm, source=source)[cutoff]
+
+def ipsae_sweep(
+    tokens: IpsaeTokens,
+    pae: np.ndarray,
+    cb_plddt: np.ndarray,
+    *,
+    cutoffs: tuple[Cutoff, ...] = ((15.0, 15.0),),
+    iptm: float | dict[tuple[str, str], float] = -1.0,
+    source: Source = "af2",
+) -> dict[Cutoff, list[dict]]:
+    """``ipsae_scores`` for several (pae_cutoff, dist_cutoff) pairs in one pass over the PAE matrix."""
+    chains = tokens.chains
+    numres = len(chains)
+    cb_plddt = np.asarray(cb_plddt, dtype=np.float64)
+    if pae.shape != (numres, numres):
+        raise ValueError(f"PAE matrix shape {pae.shape} does not match {numres} residues")
+    cutoffs = tuple(dict.fromkeys((float(pc), float(dc)) for pc, dc in cutoffs))
+    if not cutoffs:
+        raise ValueError("ipsae_sweep needs at least one (pae_cutoff, dist_cutoff) pair")
+
+    unique_chains = [str(c) for c in _unique_in_order(chains)]
+    idx = {c: np.flatnonzero(chains == c) for c in unique_chains}
+    trees = {c: cKDTree(tokens.cb_coord[idx[c]]) for c in unique_chains}
+    is_nuc = {c: bool(np.isin(tokens.resnames[idx[c]], list(NUC_RESIDUE_SET)).any()) for c in unique_chains}
+
+    def get_iptm(c1: str, c2: str) -> float:
+        if isinstance(iptm, dict):
+            return float(iptm.get((c1, c2), 0.0))
+        return float(iptm)
+
+    asym: dict[tuple[str, str], dict[Cutoff, dict]] = {}
+    for c1 in unique_chains:
+        for c2 in unique_chains:
+            if c1 == c2:
+                continue
+            scores = _pair_scores(
+                pae,
+                idx[c1],
+                idx[c2],
+                trees[c1],
+                trees[c2],
+                resnums=tokens.resnums,
+                cb_plddt=cb_plddt,
+                pair_type="nucleic_acid" if (is_nuc[c1] or is_nuc[c2]) else "protein",
+                cutoffs=cutoffs,
+            )
+            asym[(c1, c2)] = {c: {**v, "ipTM_af": get_iptm(c1, c2)} for c, v in scores.items()}
+
+    pairs = sorted((c1, c2) for c1 in unique_chains for c2 in unique_chains if c1 < c2)
+    order = {c: i for i, c in enumerate(unique_chains)}
+    return {
+        cutoff: _rows_for_cutoff(pairs, {k: v[cutoff] for k, v in asym.items()}, source, order)
+        for cutoff in cutoffs
+    }
+
+def _rows_for_cutoff(
+    pairs: list[tuple[str, str]],
+    asym: dict[tuple[str, str], dict],
+    source: Source,
+    order: dict[str, int],
+) -> list[dict]:
+    """The script's rows for one cutoff; ``order`` is the position of each chain in the file."""
+    rows: list[dict] = []
+    for a, b in pairs:
+        ab, ba = asym[(a, b)], asym[(b, a)]
+        rows.append({"Chn1": a, "Chn2": b, "Type": "asym", **ab})
+        rows.append({"Chn1": b, "Chn2": a, "Type": "asym", **ba})
+
+        # "max" row; written by the script while visiting (b, a), hence the b->a
+        # values for pDockQ, n0chn/d0chn and the AF2/AF3 ipTM. If b comes first in
+        # the file, a->b is not computed yet at that point and the script compares
+        # b->a against 0, i.e. always takes b->a.
+        a_done = order[a] < order[b]
+
+        def pick(key: str, n0_key: str | None = None, d0_key: str | None = None) -> dict:
+            src = ba if not a_done or ba[key] >= ab[key] else ab  # ties go to b->a, as in the script
+            out = {key: src[key]}
+            if n0_key:
+                out[n0_key] = src[n0_key]
+                out[d0_key] = src[d0_key]
+            return out
+
+        if source == "boltz":
+            iptm_max = max(ab["ipTM_af"], ba["ipTM_af"])
+        else:
+            iptm_max = ba["ipTM_af"]
+        rows.append({
+            "Chn1": a,
+            "Chn2": b,
+            "Type": "max",
+            **pick("ipSAE", "n0res", "d0res"),
+            **pick("ipSAE_d0chn"),
+            **pick("ipSAE_d0dom", "n0dom", "d0dom"),
+            "ipTM_af": iptm_max,
+            **pick("ipTM_d0chn"),
+            "pDockQ": ba["pDockQ"],
+            "pDockQ2": max(ab["pDockQ2"], ba["pDockQ2"]),
+            "LIS": (ab["LIS"] + ba["LIS"]) / 2.0,
+            "n0chn": ba["n0chn"],
+            "d0chn": ba["d0chn"],
+            "nres1": max(ba["nres2"], ab["nres1"]),
+            "nres2": max(ba["nres1"], ab["nres2"]),
+            "dist1": max(ba["dist2"], ab["dist1"]),
+            "dist2": max(ba["dist1"], ab["dist2"]),
+        })
+    return [{"Chn1": r["Chn1"], "Chn2": r["Chn2"], "Type": r["Type"], **{k: r[k] for k in SCORE_COLS}} for r in rows]
@@ -1,31 +1,112 @@
 from __future__ import annotations
 
-from typing import Dict
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import Iterator
+
+import numpy as np
 import biotite.structure as struc
 
-from .annotations import select_chain_polymer_atoms
 from ..config import MetadataConfig
 
-def build_chain_map(aa) -> dict[str, struc.AtomArray]:
-    chain_ids = sorted(set(map(str, aa.chain_id)))
-    return {cid: select_chain_polymer_atoms(aa, cid) for cid in chain_ids}
-
-def _concat(arrs: list[struc.AtomArray], template: struc.AtomArray) -> struc.AtomArray:
-    if not arrs:
-        return template[:0]
-    out = arrs[0]
-    for a in arrs[1:]:
-        out = struc.concatenate([out, a])
-    return out
-
-def build_roles(cfg: MetadataConfig, chain_map: dict[str, struc.AtomArray]) -> Dict[str, struc.AtomArray]:
-    roles: Dict[str, struc.AtomArray] = {}
-    template = next(iter(chain_map.values()))
+@dataclass(frozen=True, slots=True)
+class ChainSegments:
+    """
+    Polymer atoms grouped by chain: the atoms of ``chain_ids[i]`` are
+    ``order[offsets[i]:offsets[i + 1]]``, in their original order.
+    """
+    chain_ids: tuple[str, ...]
+    order: np.ndarray
+    offsets: np.ndarray
+
+    def indices(self, i: int) -> np.ndarray:
+        return self.order[self.offsets[i]:self.offsets[i + 1]]
+
+def chain_segments(aa) -> ChainSegments:
+    """Partition polymer atoms by chain in one stable grouping pass (codes + offsets)."""
+    chain_ids = np.asarray(aa.chain_id)
+    n = len(chain_ids)
+    if n == 0:
+        return ChainSegments((), np.zeros(0, dtype=np.int64), np.zeros(1, dtype=np.int64))
+
+    # chains come in runs, so only the run labels need sorting / comparing as strings
+    starts = np.flatnonzero(np.r_[True, chain_ids[1:] != chain_ids[:-1]])
+    names, run_codes = np.unique(chain_ids[starts].astype(str), return_inverse=True)
+    codes = np.repeat(run_codes.astype(np.min_scalar_type(len(names))), np.diff(np.r_[starts, n]))
+
+    polymer = np.flatnonzero(np.asarray(aa.is_polymer, dtype=bool))
+    pcodes = codes[polymer]
+    order = polymer[np.argsort(pcodes, kind="stable")]  # radix sort on small int codes
+    offsets = np.r_[0, np.cumsum(np.bincount(pcodes, minlength=len(names)))]
+    return ChainSegments(tuple(names.tolist()), order, offsets)
+
+class AtomViews(Mapping):
+    """
+    name -> atom indices into one parent AtomArray (chains, roles).
+
+    Mapping access returns an AtomArray, built on first use and cached; coordinate-only
+    consumers should use ``indices`` / ``coord`` / ``n_atoms`` and never copy atoms.
+    """
+
+    def __init__(
+        self,
+        aa: struc.AtomArray,
+        index: dict[str, np.ndarray],
+        segments: ChainSegments | None = None,
+    ):
+        self.aa = aa
+        self.segments = segments
+        self._index = index
+        self._arrays: dict[str, struc.AtomArray] = {}
+
+    def __getitem__(self, name: str) -> struc.AtomArray:
+        arr = self._arrays.get(name)
+        if arr is None:
+            idx = self._index[name]
+            if len(idx) and idx[-1] - idx[0] + 1 == len(idx) and np.all(np.diff(idx) == 1):
+                arr = self.aa[int(idx[0]):int(idx[-1]) + 1]  # contiguous: slice instead of fancy index
+            else:
+                arr = self.aa[idx]
+            self._arrays[name] = arr
+        return arr
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, name) -> bool:
+        return name in self._index
+
+    def indices(self, name: str) -> np.ndarray:
+        return self._index[name]
+
+    def n_atoms(self, name: str) -> int:
+        return len(self._index[name])
+
+    def coord(self, name: str) -> np.ndarray:
+        return self.aa.coord[self._index[name]]
+
+def build_chain_map(aa) -> AtomViews:
+    """Polymer atoms of each chain, keyed by sorted chain id; views into one ChainSegments."""
+    seg = chain_segments(aa)
+    index = {cid: seg.indices(i) for i, cid in enumerate(seg.chain_ids)}
+    return AtomViews(aa, index, segments=seg)
+
+def build_roles(cfg: MetadataConfig, chain_map: AtomViews) -> AtomViews:
+    """Each role is its chains' atom indices, concatenated in cfg.roles order."""
+    index: dict[str, np.ndarray] = {}
     for role_name, spec in cfg.roles.items():
-        picked = []
-        for cid in spec.chain_ids:
-            a = chain_map.get(cid)
-            if a is not None and len(a) > 0:
-                picked.append(a)
-        roles[role_name] = _concat(picked, template=template)
-    return roles
+        picked = [chain_map.indices(cid) for cid in spec.chain_ids if cid in chain_map]
+        index[role_name] = np.concatenate(picked) if picked else np.zeros(0, dtype=np.int64)
+    return AtomViews(chain_map.aa, index)
+
+def role_chain_ids(roles: AtomViews, chain_map: AtomViews, role: str) -> tuple[str, ...]:
+    """Chains making up ``role``, in chain_map order; roles are unions of whole chains (see build_roles)."""
+    chains = [cid for cid in chain_map if chain_map.n_atoms(cid)]
+    if not chains:
+        return ()
+    firsts = np.array([chain_map.indices(cid)[0] for cid in chains])
+    picked = np.isin(firsts, roles.indices(role))
+    return tuple(cid for cid, keep in zip(chains, picked) if keep)
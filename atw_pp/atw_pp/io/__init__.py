@@ -1,12 +1,32 @@
-from .cif import list_structures, safe_parse_structure
-from .params import load_param_map, attach_params, param_map_to_df
-from .paragraph import load_paragraph_preds
+from .cif import (
+    iter_structures,
+    list_structures,
+    load_input_list,
+    parse_shard,
+    safe_parse_structure,
+    shard_paths,
+    structure_stem,
+)
+from .cache import StructureCache
+from .params import load_param_map, attach_params, attach_param_columns, param_map_to_df
+from .paragraph import ParagraphIndex, load_paragraph_preds
+from .pae import load_arrays, load_pae
 
 __all__ = [
+    "iter_structures",
     "list_structures",
+    "load_input_list",
+    "parse_shard",
+    "shard_paths",
+    "structure_stem",
     "safe_parse_structure",
+    "StructureCache",
     "load_param_map",
     "attach_params",
+    "attach_param_columns",
     "param_map_to_df",
     "load_paragraph_preds",
+    "ParagraphIndex",
+    "load_arrays",
+    "load_pae",
 ]
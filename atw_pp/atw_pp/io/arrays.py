@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import struct
+import zipfile
+from pathlib import Path
+
+import numpy as np
+
+def _mmap_npy_at(path: Path, offset: int) -> np.ndarray | None:
+    """Memory-map the .npy payload starting at byte ``offset`` of ``path``; None if it cannot be mapped."""
+    with open(path, "rb") as fh:
+        fh.seek(offset)
+        version = np.lib.format.read_magic(fh)
+        if version == (1, 0):
+            shape, fortran, dtype = np.lib.format.read_array_header_1_0(fh)
+        else:
+            shape, fortran, dtype = np.lib.format.read_array_header_2_0(fh)
+        data_offset = fh.tell()
+    if dtype.hasobject or int(np.prod(shape)) == 0:
+        return None
+    return np.memmap(path, dtype=dtype, mode="r", offset=data_offset, shape=shape, order="F" if fortran else "C")
+
+def load_npy(path: Path, *, mmap: bool = True) -> np.ndarray:
+    return np.load(path, mmap_mode="r" if mmap else None, allow_pickle=False)
+
+def load_npz(path: Path, *, keys: tuple[str, ...] | None = None, mmap: bool = True) -> dict[str, np.ndarray]:
+    """
+    Read arrays from an .npz archive. Members stored uncompressed (np.savez) are
+    memory-mapped in place; compressed members (np.savez_compressed) are read normally.
+    """
+    out: dict[str, np.ndarray] = {}
+    with zipfile.ZipFile(path) as zf:
+        for info in zf.infolist():
+            name = info.filename[:-4] if info.filename.endswith(".npy") else info.filename
+            if keys is not None and name not in keys:
+                continue
+            arr = None
+            if mmap and info.compress_type == zipfile.ZIP_STORED:
+                # local file header: 30 fixed bytes, then file name and extra field
+                with open(path, "rb") as fh:
+                    fh.seek(info.header_offset)
+                    header = fh.read(30)
+                n_name, n_extra = struct.unpack("<HH", header[26:30])
+                arr = _mmap_npy_at(path, info.header_offset + 30 + n_name + n_extra)
+            if arr is None:
+                with zf.open(info) as fh:
+                    arr = np.lib.format.read_array(fh, allow_pickle=False)
+            out[name] = arr
+    return out
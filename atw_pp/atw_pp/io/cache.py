@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from importlib import metadata
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import biotite.structure as struc
+
+from .arrays import load_npz
+from ..manifest import sha256_file
+
+CACHE_FORMAT = 1
+
+def _atomworks_version() -> str:
+    try:
+        return metadata.version("atomworks")
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+@dataclass
+class StructureCache:
+    """
+    On-disk cache of parsed assemblies.
+
+    One uncompressed .npz per entry (coords, every annotation, bonds, box), keyed by
+    the file's sha256, the assembly id and the parse options, so it survives changes
+    to plugins, roles or cutoffs. Entries are memory-mapped on load and evicted
+    least-recently-used once the cache grows past ``max_bytes``, down to ``low_water``
+    of it so that one directory scan makes room for many entries.
+    """
+
+    root: Path
+    max_bytes: int = 50 * 1024**3
+    low_water: float = 0.9
+    _total: int | None = field(default=None, init=False, repr=False)
+
+    def key(self, path: Path, assembly_id: str, options: dict[str, Any]) -> str:
+        blob = json.dumps(
+            {
+                "sha256": sha256_file(path),
+                "assembly_id": assembly_id,
+                "options": options,
+                "atomworks": _atomworks_version(),
+                "format": CACHE_FORMAT,
+            },
+            sort_keys=True,
+        )
+        return hashlib.sha256(blob.encode()).hexdigest()
+
+    def _entry(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.npz"
+
+    def get(self, key: str) -> struc.AtomArray | None:
+        """The cached assembly, or None if there is no entry or it cannot be read back."""
+        f = self._entry(key)
+        if not f.exists():
+            return None
+        try:
+            arrays = load_npz(f)
+            meta = json.loads(bytes(arrays["__meta__"]).decode())
+            as_object = set(meta.get("object_annotations", ()))
+            aa = struc.AtomArray(int(meta["n_atoms"]))
+            aa.coord = arrays["coord"]
+            for name in meta["annotations"]:
+                values = arrays[f"annot__{name}"]
+                aa.set_annotation(name, values.astype(object) if name in as_object else values)
+            if "bonds" in arrays:
+                aa.bonds = struc.BondList(len(aa), np.asarray(arrays["bonds"]))
+            if "box" in arrays:
+                aa.box = np.asarray(arrays["box"])
+        except Exception:
+            return None  # truncated, foreign or stale entry: reparse
+        try:
+            os.utime(f)  # LRU: mtime is the last access
+        except OSError:
+            pass  # read-only cache: still a hit
+        return aa
+
+    def put(self, key: str, aa: struc.AtomArray) -> None:
+        """
+        Store ``aa`` under ``key``. Object-dtype annotations are stored as fixed-width
+        strings (entries are loaded without pickle); an assembly with an object annotation
+        holding anything but strings is not cached.
+        """
+        names = list(aa.get_annotation_categories())
+        annotations: dict[str, np.ndarray] = {}
+        as_object = []
+        for name in names:
+            values = aa.get_annotation(name)
+            if values.dtype.hasobject:
+                if not all(isinstance(v, str) for v in values):
+                    return
+                values = np.array(values.tolist(), dtype=str)
+                as_object.append(name)
+            annotations[f"annot__{name}"] = np.ascontiguousarray(values)
+
+        meta = {"n_atoms": len(aa), "annotations": names, "object_annotations": as_object}
+        arrays: dict[str, np.ndarray] = {
+            "__meta__": np.frombuffer(json.dumps(meta).encode(), dtype=np.uint8),
+            "coord": np.ascontiguousarray(aa.coord, dtype=np.float32),
+            **annotations,
+        }
+        if aa.bonds is not None:
+            arrays["bonds"] = aa.bonds.as_array()
+        if aa.box is not None:
+            arrays["box"] = np.asarray(aa.box)
+
+        f = self._entry(key)
+        f.parent.mkdir(parents=True, exist_ok=True)
+        tmp = f.with_name(f"{f.stem}.{os.getpid()}.tmp.npz")
+        np.savez(tmp, **arrays)
+        os.replace(tmp, f)
+
+        size = f.stat().st_size
+        if self._total is None:
+            self._total = self._scan_size()
+        else:
+            self._total += size
+        if self._total > self.max_bytes:
+            self.evict()
+
+    def _entries(self) -> list[os.DirEntry]:
+        if not self.root.exists():
+            return []
+        out = []
+        for sub in os.scandir(self.root):
+            if sub.is_dir():
+                out.extend(e for e in os.scandir(sub.path) if e.name.endswith(".npz") and ".tmp." not in e.name)
+        return out
+
+    def _scan_size(self) -> int:
+        return sum(e.stat().st_size for e in self._entries())
+
+    def evict(self) -> None:
+        """Drop least-recently-used entries until the cache is down to ``low_water * max_bytes``."""
+        entries = sorted(self._entries(), key=lambda e: e.stat().st_mtime_ns)
+        total = sum(e.stat().st_size for e in entries)
+        target = int(self.max_bytes * self.low_water)
+        for e in entries:
+            if total <= target:
+                break
+            try:
+                size = e.stat().st_size
+                os.remove(e.path)
+                total -= size
+            except FileNotFoundError:
+                pass  # evicted concurrently by another worker
+        self._total = total
@@ -1,21 +1,213 @@
 from __future__ import annotations
 
+import heapq
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
+from typing import Iterator, Sequence
+
+import pandas as pd
+import pyarrow.parquet as pq
 from atomworks.io import parse
 
-def safe_parse_structure(path: Path, assembly_id: str = "1"):
+from .cache import StructureCache
+
+PARSE_OPTIONS = {
+    "add_missing_atoms": False,
+    "fix_formal_charges": False,
+    "add_id_and_entity_annotations": True,
+}
+
+def safe_parse_structure(path: Path, assembly_id: str = "1", cache: StructureCache | None = None):
+    """
+    Assembly ``assembly_id`` of a structure file (any of STRUCTURE_EXTS: mmCIF, BinaryCIF, PDB,
+    plain or gzip-compressed, decompressed in memory), or None if it cannot be parsed.
+    """
+    key = None
+    if cache is not None:
+        try:
+            key = cache.key(path, assembly_id, PARSE_OPTIONS)
+            aa = cache.get(key)
+            if aa is not None:
+                return aa
+        except OSError:
+            key = None
     try:
         out = parse(
             filename=str(path),
             build_assembly=(assembly_id,),
-            add_missing_atoms=False,
-            fix_formal_charges=False,
-            add_id_and_entity_annotations=True,
+            **PARSE_OPTIONS,
         )
-        return out["assemblies"][assembly_id][0]
+        aa = out["assemblies"][assembly_id][0]
     except Exception:
         return None
+    if key is not None:
+        try:
+            cache.put(key, aa)
+        except OSError:
+            pass  # a full or read-only cache must not fail the run
+    return aa
+
+# readable formats in order of preference when one structure is stored in several
+# (BinaryCIF parses fastest; gzip is decompressed in memory by atomworks)
+MMCIF_EXTS = (".bcif", ".bcif.gz", ".cif", ".mmcif", ".cif.gz", ".mmcif.gz")
+PDB_EXTS = (".pdb", ".ent", ".pdb.gz", ".ent.gz")
+STRUCTURE_EXTS = (*MMCIF_EXTS, *PDB_EXTS)
+
+def structure_suffix(name: str | os.PathLike, exts: tuple[str, ...] = STRUCTURE_EXTS) -> str | None:
+    """The structure extension ``name`` ends with, lower case and with any ".gz" (e.g. ".cif.gz"), or None."""
+    lower = os.fspath(name).lower()
+    return max((e for e in exts if lower.endswith(e)), key=len, default=None)
+
+def structure_stem(path: str | os.PathLike) -> str:
+    """File name without its structure extension: "1abc.cif.gz" -> "1abc" (Path.stem for other files)."""
+    name = os.path.basename(os.fspath(path))
+    suffix = structure_suffix(name)
+    return name[: -len(suffix)] if suffix else Path(name).stem
+
+def _preferred(files: list[str]) -> list[str]:
+    """Drop files stored again in a preferred format in the same directory (x.bcif over x.cif / x.cif.gz, x.pdb over x.pdb.gz)."""
+    best: dict[tuple[str, bool], tuple[int, str]] = {}
+    for f in files:
+        suffix = structure_suffix(f)
+        mmcif = suffix in MMCIF_EXTS
+        rank = (MMCIF_EXTS if mmcif else PDB_EXTS).index(suffix)
+        key = (f[: -len(suffix)], mmcif)
+        if key not in best or rank < best[key][0]:
+            best[key] = (rank, f)
+    if len(best) == len(files):
+        return files
+    keep = {f for _, f in best.values()}
+    return [f for f in files if f in keep]
+
+def _scan_dir(path: str, exts: tuple[str, ...]) -> tuple[list[str], list[str]]:
+    """(structure files, subdirectories) of one directory; d_type decides, so no stat per entry."""
+    files, dirs = [], []
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        dirs.append(entry.path)
+                    elif structure_suffix(entry.name, exts) is not None and entry.is_file():
+                        files.append(entry.path)
+                except OSError:
+                    continue
+    except OSError:  # unreadable or vanished directory
+        pass
+    return _preferred(files), dirs
+
+def iter_structures(
+    input_dir: Path, *, exts: tuple[str, ...] = STRUCTURE_EXTS, workers: int = 8
+) -> Iterator[Path]:
+    """
+    Structure files under ``input_dir``, yielded as directories are scanned (os.scandir on
+    ``workers`` threads, filtering by extension during the walk; symlinked directories are
+    not followed, as with rglob). A structure present in several formats in one directory is
+    yielded once, in the first of MMCIF_EXTS / PDB_EXTS. Order is not deterministic; see
+    list_structures.
+    """
+    if workers <= 1:
+        stack = [str(input_dir)]
+        while stack:
+            files, dirs = _scan_dir(stack.pop(), exts)
+            yield from map(Path, files)
+            stack.extend(dirs)
+        return
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = {pool.submit(_scan_dir, str(input_dir), exts)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                files, dirs = fut.result()
+                pending.update(pool.submit(_scan_dir, d, exts) for d in dirs)
+                yield from map(Path, files)
+
+def list_structures(input_dir: Path, *, workers: int = 8) -> list[Path]:
+    """Sorted structure files under ``input_dir`` (see iter_structures)."""
+    return sorted(iter_structures(input_dir, workers=workers))
+
+def load_input_list(list_file: Path, *, root: Path | None = None) -> tuple[list[Path], list[int] | None]:
+    """
+    Structure paths (and sizes in bytes, if given) from a list file, so that no directory is walked:
+    Parquet / CSV / TSV with a ``path`` column and an optional ``size`` column, or plain text with one
+    path per line (blank lines and ``#`` comments skipped). Relative paths are taken relative to
+    ``root`` (default: the list file's directory). Order is kept, duplicates dropped; files are not
+    checked here (missing ones end up in bad_files.csv).
+    """
+    suffix = list_file.suffix.lower()
+    if suffix in (".parquet", ".pq", ".csv", ".tsv"):
+        if suffix in (".parquet", ".pq"):
+            cols = pq.read_schema(list_file).names
+            df = pd.read_parquet(list_file, columns=[c for c in ("path", "size") if c in cols])
+        else:
+            df = pd.read_csv(list_file, sep="\t" if suffix == ".tsv" else ",", usecols=lambda c: c in ("path", "size"))
+        if "path" not in df.columns:
+            raise ValueError(f"{list_file} has no 'path' column")
+        df = df.dropna(subset=["path"]).drop_duplicates("path")
+        names = df["path"].astype(str).tolist()
+        sizes = pd.to_numeric(df["size"], errors="coerce").fillna(-1).astype("int64").tolist() if "size" in df.columns else None
+    else:
+        with open(list_file) as fh:
+            lines = (line.strip() for line in fh)
+            names = list(dict.fromkeys(line for line in lines if line and not line.startswith("#")))
+        sizes = None
+
+    base = root if root is not None else list_file.resolve().parent
+    paths = [p if p.is_absolute() else base / p for p in map(Path, names)]
+    return paths, sizes
+
+def parse_shard(spec: str) -> tuple[int, int]:
+    """"i/N" -> (i, N), with 0 <= i < N."""
+    try:
+        i, n = (int(x) for x in spec.split("/"))
+    except ValueError:
+        raise ValueError(f"Shard must be given as i/N (e.g. 0/8), got '{spec}'") from None
+    if n < 1 or not 0 <= i < n:
+        raise ValueError(f"Shard index must satisfy 0 <= i < N, got '{spec}'")
+    return i, n
+
+def shard_paths(
+    paths: list[Path],
+    index: int,
+    count: int,
+    *,
+    root: Path | None = None,
+    sizes: Sequence[int] | None = None,
+) -> list[Path]:
+    """
+    The ``index``-th of ``count`` disjoint shards of ``paths``, balanced by file size.
+    Files go largest first to the shard with the fewest bytes so far (ties: lowest shard,
+    then path relative to ``root``), so every invocation over the same files agrees on the
+    partition without coordinating. Paths keep their input order within the shard.
+    ``sizes`` (e.g. from load_input_list; negative = unknown) saves a stat per file.
+    """
+    if count <= 1:
+        return list(paths)
+
+    def size(i: int) -> int:
+        if sizes is not None and sizes[i] >= 0:
+            return int(sizes[i])
+        try:
+            return paths[i].stat().st_size
+        except OSError:
+            return 0
+
+    def rel(p: Path) -> str:
+        if root is not None:
+            try:
+                return p.relative_to(root).as_posix()
+            except ValueError:
+                pass
+        return p.as_posix()
 
-def list_structures(input_dir: Path) -> list[Path]:
-    exts = (".cif", ".mmcif", ".pdb", ".ent")
-    return sorted(p for p in input_dir.rglob("*") if p.is_file() and p.suffix.lower() in exts)
\ No newline at end of file
+    sized = sorted(((size(i), rel(p), i) for i, p in enumerate(paths)), key=lambda x: (-x[0], x[1]))
+    loads = [(0, s) for s in range(count)]  # (bytes, shard) min-heap
+    mine = []
+    for size, _, i in sized:
+        load, s = heapq.heappop(loads)
+        if s == index:
+            mine.append(i)
+        heapq.heappush(loads, (load + size, s))
+    return [paths[i] for i in sorted(mine)]
@@ -0,0 +1,316 @@
+"""
+PAE / pLDDT / confidence loading for AF2, AF3 and Boltz outputs.
+
+  - .npy and uncompressed .npz are memory-mapped (io.arrays), compressed .npz members are read once.
+  - JSON (AF2 *_scores_*.json, AF3 confidences.json / *_full_data_*.json) is scanned
+    for the requested keys of the top-level object (nested objects and strings are skipped);
+    numeric arrays are parsed chunk by chunk straight into float arrays, never into nested
+    Python lists. Anything else falls back to json.load.
+  - With ``cache_dir``, every array parsed from JSON (or cast from another dtype) is
+    saved as .npy keyed by the file's size/mtime, the key and the dtype, and
+    memory-mapped on the next run.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+from typing import Any, BinaryIO, Iterable
+
+import numpy as np
+
+from .arrays import load_npy, load_npz
+
+PAE_KEYS = ("pae", "predicted_aligned_error")
+
+CHUNK_BYTES = 1 << 22
+_BRACKETS_TO_SPACE = bytes.maketrans(b"[]", b"  ")
+_NUMBER_START = set(b"0123456789-+.")
+_NUMBER_BYTES = b"0123456789-+.eE,[] \t\r\n"
+_TO_COLON = re.compile(rb"[ \t\r\n]*(:?)")
+
+def _cache_path(cache_dir: Path, path: Path, key: str, dtype: np.dtype) -> Path:
+    st = path.stat()
+    blob = f"{path.resolve()}|{st.st_size}|{st.st_mtime_ns}|{key}|{np.dtype(dtype).str}"
+    return cache_dir / f"{hashlib.sha256(blob.encode()).hexdigest()[:32]}.npy"
+
+def _save_npy(arr: np.ndarray, out: Path) -> None:
+    out.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out.with_name(f"{out.stem}.{os.getpid()}.tmp.npy")
+    np.save(tmp, arr)
+    os.replace(tmp, out)
+
+# ----- streaming JSON -----
+
+def _read_number_array(fh: BinaryIO, buf: bytes, dtype: np.dtype) -> tuple[np.ndarray, bytes]:
+    """Parse the numeric JSON array starting at ``buf[0] == '['``; return it and the unread rest of ``buf``."""
+    depth = 0
+    ndim = 0
+    n_open = 0
+    carry = b""
+    pieces: list[np.ndarray] = []
+    while True:
+        if not buf:
+            buf = fh.read(CHUNK_BYTES)
+            if not buf:
+                raise ValueError("truncated JSON array")
+        a = np.frombuffer(buf, dtype=np.uint8)
+        level = np.cumsum((a == ord("[")).astype(np.int64) - (a == ord("]"))) + depth
+        closed = np.flatnonzero(level == 0)
+        stop = int(closed[0]) + 1 if len(closed) else len(buf)
+        seg, buf = buf[:stop], buf[stop:]
+        ndim = max(ndim, int(level[:stop].max()))
+        n_open += seg.count(b"[")
+        depth = int(level[stop - 1])
+        if seg.translate(None, _NUMBER_BYTES):
+            raise ValueError("not a numeric JSON array")
+
+        # brackets become whitespace; a number cut by the chunk end is carried over
+        text = carry + seg.translate(_BRACKETS_TO_SPACE)
+        if depth > 0:
+            cut = text.rfind(b",")
+            text, carry = (text[:cut], text[cut + 1:]) if cut >= 0 else (b"", text)
+        if text.strip():
+            pieces.append(np.fromstring(text.decode("ascii"), dtype=np.float64, sep=",").astype(dtype, copy=False))
+        if depth == 0:
+            break
+
+    flat = np.concatenate(pieces) if pieces else np.zeros(0, dtype=dtype)
+    if ndim <= 1:
+        return flat, buf
+    if ndim > 2:
+        raise ValueError(f"only 1-D / 2-D numeric arrays are supported, got {ndim}-D")
+    n_rows = n_open - 1
+    if n_rows == 0 or flat.size % n_rows:
+        raise ValueError("ragged JSON array")
+    return flat.reshape(n_rows, flat.size // n_rows), buf
+
+def _read_raw_value(fh: BinaryIO, buf: bytes) -> tuple[Any, bytes]:
+    """Read a non-numeric-array JSON value (scalar, string, object, mixed array) with json.loads."""
+    out = b""
+    depth = 0
+    in_str = False
+    escaped = False
+    i = 0
+    while True:
+        if i >= len(buf):
+            out += buf
+            buf = fh.read(CHUNK_BYTES)
+            i = 0
+            if not buf:
+                return json.loads(out), b""
+        ch = buf[i]
+        if in_str:
+            if escaped:
+                escaped = False
+            elif ch == 0x5C:  # backslash
+                escaped = True
+            elif ch == 0x22:
+                in_str = False
+        elif ch == 0x22:
+            in_str = True
+        elif ch in b"[{":
+            depth += 1
+        elif ch in b"]}":
+            if depth == 0:
+                break
+            depth -= 1
+        elif ch == 0x2C and depth == 0:
+            break
+        i += 1
+    out += buf[:i]
+    return json.loads(out), buf[i:]
+
+def _json_levels(buf: bytes, depth: int, in_str: bool) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Per byte of ``buf``: the object/array nesting depth after it and whether it is inside a
+    string (an opening quote counts as inside, a closing one not), given the state before ``buf[0]``.
+    """
+    a = np.frombuffer(buf, dtype=np.uint8)
+    quote = a == ord('"')
+    if b"\\" in buf:
+        idx = np.arange(len(a))
+        run = idx - np.maximum.accumulate(np.where(a == ord("\\"), -1, idx))  # backslashes ending at each byte
+        quote[1:] &= run[:-1] % 2 == 0
+    strings = (np.cumsum(quote) + in_str) % 2 == 1
+    delta = (a == ord("{")).astype(np.int64) + (a == ord("[")) - (a == ord("}")) - (a == ord("]"))
+    delta[strings] = 0
+    return np.cumsum(delta) + depth, strings
+
+def _find_key(buf: bytes, pat: bytes, levels: np.ndarray, strings: np.ndarray, in_str: bool) -> tuple[int, int]:
+    """
+    First position of ``pat`` as a key of the top-level object and the offset just past its ':'
+    (-1 while the ':' may still be in the next chunk); (-1, -1) if there is none in ``buf``.
+    """
+    i = buf.find(pat)
+    while i >= 0:
+        opens = strings[i] and not (strings[i - 1] if i else in_str)
+        if opens and levels[i] == 1:
+            m = _TO_COLON.match(buf, i + len(pat))
+            if m.group(1):
+                return i, m.end()
+            if m.end() == len(buf):
+                return i, -1
+        i = buf.find(pat, i + 1)
+    return -1, -1
+
+def _read_value(fh: BinaryIO, buf: bytes, dtype: np.dtype) -> tuple[Any, bytes]:
+    """The JSON value at the start of ``buf`` (after whitespace) and the unread rest of ``buf``."""
+    buf = buf.lstrip()
+    while not buf:
+        buf = fh.read(CHUNK_BYTES)
+        if not buf:
+            raise ValueError("truncated JSON value")
+        buf = buf.lstrip()
+    if buf[:1] == b"[":
+        numeric, buf = _first_item_is_number(fh, buf)
+        if numeric:
+            return _read_number_array(fh, buf, dtype)
+    return _read_raw_value(fh, buf)
+
+def _first_item_is_number(fh: BinaryIO, buf: bytes) -> tuple[bool, bytes]:
+    """Whether the array at ``buf[0]`` starts with a number (or is empty); reads on past leading brackets."""
+    while True:
+        rest = buf.lstrip(b"[ \t\r\n")
+        if rest:
+            return rest[0] in _NUMBER_START or rest[0] == ord("]"), buf
+        more = fh.read(CHUNK_BYTES)
+        if not more:
+            return True, buf  # truncated: the numeric parser raises
+        buf += more
+
+def _scan_json_values(path: Path, keys: tuple[str, ...], dtype: np.dtype) -> dict[str, Any]:
+    wanted = {f'"{k}"'.encode(): k for k in keys}
+    out: dict[str, Any] = {}
+    tail = max(len(p) for p in wanted) if wanted else 0
+    with open(path, "rb") as fh:
+        buf = fh.read(CHUNK_BYTES)
+        depth, in_str = 0, False  # JSON state before buf[0]
+        eof = False
+        while wanted and buf:
+            levels = strings = None
+            hits = []
+            if any(p in buf for p in wanted):
+                levels, strings = _json_levels(buf, depth, in_str)
+                hits = [(*_find_key(buf, p, levels, strings, in_str), p) for p in wanted]
+                hits = [(i, j, p) for i, j, p in hits if i >= 0 and (j >= 0 or not eof)]
+            if hits:
+                i, j, pat = min(hits)
+                if j >= 0:
+                    out[wanted.pop(pat)], buf = _read_value(fh, buf[j:], dtype)
+                    depth, in_str = 1, False
+                    if not buf:
+                        buf = fh.read(CHUNK_BYTES)
+                    continue
+                cut = i  # the ':' may be in the next chunk: rescan from the key
+            else:
+                cut = max(len(buf) - tail, 0)  # keep a key cut by the chunk end
+                while cut and buf[cut - 1] == ord("\\"):
+                    cut -= 1  # never split an escape
+            if cut and levels is None and not in_str and b'"' not in buf[:cut]:
+                # no strings to skip (the inside of a numeric array): just count brackets
+                depth += sum(buf.count(c, 0, cut) for c in b"{[") - sum(buf.count(c, 0, cut) for c in b"}]")
+            elif cut:
+                if levels is None:
+                    levels, strings = _json_levels(buf[:cut], depth, in_str)
+                depth, in_str = int(levels[cut - 1]), bool(strings[cut - 1])
+            more = fh.read(CHUNK_BYTES)
+            if not more and not hits:
+                break
+            eof = not more
+            buf = buf[cut:] + more
+    return out
+
+def _as_array(value: Any, dtype: np.dtype) -> Any:
+    if not isinstance(value, list):
+        return value
+    try:
+        return np.asarray(value, dtype=np.float64).astype(dtype, copy=False)
+    except (TypeError, ValueError):
+        return value
+
+def read_json_values(path: Path, keys: Iterable[str], *, dtype=np.float32) -> dict[str, Any]:
+    """
+    Values of the top-level ``keys`` of a JSON object, read in one forward pass.
+    Numeric arrays come back as ``dtype`` ndarrays, everything else as json.loads would
+    return it. Keys that are not in the file are missing from the result.
+    Arrays the streaming parser does not take (mixed, ragged or deeper than 2-D) make it
+    fall back to json.load of the whole file.
+    """
+    dtype = np.dtype(dtype)
+    keys = tuple(keys)
+    try:
+        return _scan_json_values(Path(path), keys, dtype)
+    except ValueError:
+        pass
+    with open(path, "rb") as fh:
+        data = json.load(fh)
+    if not isinstance(data, dict):
+        return {}
+    return {k: _as_array(data[k], dtype) for k in keys if k in data}
+
+# ----- public loaders -----
+
+def load_arrays(
+    path: Path,
+    keys: Iterable[str],
+    *,
+    dtype=np.float32,
+    cache_dir: Path | None = None,
+) -> dict[str, Any]:
+    """
+    Requested arrays (and scalars, for JSON) from a .npy / .npz / .json confidence file.
+
+    Numeric arrays are returned as ``dtype`` (float32 by default; float16 halves memory
+    again). A .npy file holds a single array, returned under the first key.
+    """
+    path = Path(path)
+    dtype = np.dtype(dtype)
+    keys = tuple(keys)
+    suffix = path.suffix.lower()
+
+    def cast(key: str, arr: np.ndarray) -> np.ndarray:
+        if arr.dtype == dtype or not np.issubdtype(arr.dtype, np.number):
+            return arr
+        if cache_dir is None or arr.ndim < 2:
+            return arr.astype(dtype)
+        cached = _cache_path(cache_dir, path, key, dtype)
+        if not cached.exists():
+            _save_npy(arr.astype(dtype), cached)
+        return load_npy(cached)
+
+    if suffix == ".npy":
+        return {keys[0]: cast(keys[0], load_npy(path))}
+    if suffix == ".npz":
+        return {k: cast(k, v) for k, v in load_npz(path, keys=keys).items()}
+    if suffix != ".json":
+        raise ValueError(f"Unsupported confidence file type: {path}")
+
+    out: dict[str, Any] = {}
+    missing = list(keys)
+    if cache_dir is not None:
+        for k in keys:
+            cached = _cache_path(cache_dir, path, k, dtype)
+            if cached.exists():
+                arr = load_npy(cached)
+                out[k] = arr.item() if arr.ndim == 0 else arr
+                missing.remove(k)
+    if missing:
+        found = read_json_values(path, missing, dtype=dtype)
+        for k, v in found.items():
+            out[k] = v
+            if cache_dir is not None and (isinstance(v, (np.ndarray, int, float))):
+                _save_npy(np.asarray(v), _cache_path(cache_dir, path, k, dtype))
+    return out
+
+def load_pae(path: Path, *, dtype=np.float32, cache_dir: Path | None = None) -> np.ndarray:
+    """The PAE matrix of a confidence file (``pae`` or AF2's ``predicted_aligned_error``)."""
+    keys = PAE_KEYS if Path(path).suffix.lower() == ".json" else PAE_KEYS[:1]
+    found = load_arrays(path, keys, dtype=dtype, cache_dir=cache_dir)
+    for k in PAE_KEYS:
+        if k in found:
+            return found[k]
+    raise ValueError(f"No PAE matrix in {path}")
@@ -1,22 +1,106 @@
 from __future__ import annotations
 
 from pathlib import Path
+from typing import Iterable, Iterator
+
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 
 REQUIRED = {"pdb", "chain_id", "IMGT", "pred", "x", "y", "z"}
+OPTIONAL = {"path"}
+FLOAT_COLS = ("pred", "x", "y", "z")
+
+def _coerce(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.assign(**{c: df[c].astype(str) for c in ("pdb", "chain_id", "IMGT")})
+    if "path" in df.columns:
+        df["path"] = df["path"].astype(str)
+    for c in FLOAT_COLS:
+        df[c] = pd.to_numeric(df[c], errors="coerce").astype(np.float32)
+    return df
+
+def _iter_chunks(path: Path, columns: list[str], key: str, keep: pa.Array | None, chunksize: int) -> Iterator[pd.DataFrame]:
+    if Path(path).suffix.lower() == ".parquet":
+        pf = pq.ParquetFile(path)
+        for batch in pf.iter_batches(batch_size=chunksize, columns=columns):
+            if keep is not None:
+                batch = batch.filter(pc.is_in(batch.column(key).cast(pa.string()), value_set=keep))
+            yield batch.to_pandas()
+        return
+    keep_set = set(keep.to_pylist()) if keep is not None else None
+    text = {c: str for c in ("pdb", "chain_id", "IMGT", "path") if c in columns}
+    for chunk in pd.read_csv(path, usecols=columns, chunksize=chunksize, dtype=text):
+        if keep_set is not None:
+            chunk = chunk[chunk[key].isin(keep_set)]
+        yield chunk
 
-def load_paragraph_preds(csv_path: Path) -> pd.DataFrame:
-    df = pd.read_csv(csv_path)
-    missing = REQUIRED - set(df.columns)
+def load_paragraph_preds(
+    csv_path: Path,
+    *,
+    keep: Iterable[str] | None = None,
+    by: str = "pdb",
+    chunksize: int = 1_000_000,
+) -> pd.DataFrame:
+    """
+    Paragraph predictions from a CSV or Parquet file, read in chunks of ``chunksize`` rows
+    and pruned to the REQUIRED columns (+ ``path``). With ``keep``, only rows whose ``by``
+    column ("pdb" stem or "path") is in it are kept, so memory follows the structures of
+    the run rather than the size of the file. Scores and coordinates are float32.
+    """
+    if Path(csv_path).suffix.lower() == ".parquet":
+        header = pq.read_schema(csv_path).names
+    else:
+        header = list(pd.read_csv(csv_path, nrows=0).columns)
+    missing = REQUIRED - set(header)
     if missing:
         raise ValueError(f"Paragraph CSV missing columns: {sorted(missing)}")
+    if by not in REQUIRED | OPTIONAL:
+        raise ValueError(f"Unknown Paragraph key column '{by}'")
+    columns = [c for c in header if c in REQUIRED | OPTIONAL]
+
+    if by not in header:
+        keep = ()  # e.g. path mode without a path column: nothing can match
+    keep_arr = pa.array(sorted(set(map(str, keep))), type=pa.string()) if keep is not None else None
+    if keep_arr is not None and len(keep_arr) == 0:
+        return _coerce(pd.DataFrame({c: pd.Series(dtype=object) for c in columns}))
+
+    chunks = [_coerce(c) for c in _iter_chunks(csv_path, columns, by, keep_arr, chunksize)]
+    if not chunks:
+        return _coerce(pd.DataFrame({c: pd.Series(dtype=object) for c in columns}))
+    return pd.concat(chunks, ignore_index=True)
+
+class ParagraphIndex:
+    """
+    Paragraph predictions indexed once by structure key ("pdb" stem or "path").
+    Rows of one key are contiguous in the column arrays (original row order kept),
+    so a structure's predictions are a slice instead of a scan of the whole table.
+    Scores and coordinates are float32; ``valid`` flags rows with a score, coordinates, IMGT number and chain id.
+    """
+
+    def __init__(self, df: pd.DataFrame, by: str = "pdb"):
+        self.by = by
+        if by not in df.columns:
+            df = df.iloc[:0]
+        num = df[["pred", "x", "y", "z"]].apply(pd.to_numeric, errors="coerce")
+        valid = num.notna().all(axis=1).to_numpy() & df[["IMGT", "chain_id"]].notna().all(axis=1).to_numpy()
+
+        codes, uniq = pd.factorize(df[by].astype(str).to_numpy())
+        order = np.argsort(codes, kind="stable")
+        offsets = np.r_[0, np.cumsum(np.bincount(codes, minlength=len(uniq)))]
+
+        self.chain_id = df["chain_id"].astype(str).to_numpy()[order]
+        self.label = (pd.Series(self.chain_id) + ":" + pd.Series(df["IMGT"].astype(str).to_numpy()[order])).to_numpy()
+        self.pred = num["pred"].to_numpy(dtype=np.float32)[order]
+        self.xyz = num[["x", "y", "z"]].to_numpy(dtype=np.float32)[order]
+        self.valid = valid[order]
+        self._groups = {str(k): (int(offsets[i]), int(offsets[i + 1])) for i, k in enumerate(uniq)}
+
+    def __len__(self) -> int:
+        return len(self.pred)
 
-    out = df.copy()
-    out["pdb"] = out["pdb"].astype(str)
-    out["chain_id"] = out["chain_id"].astype(str)
-    out["IMGT"] = out["IMGT"].astype(str)
-    out["pred"] = pd.to_numeric(out["pred"], errors="coerce")
-    out["x"] = pd.to_numeric(out["x"], errors="coerce")
-    out["y"] = pd.to_numeric(out["y"], errors="coerce")
-    out["z"] = pd.to_numeric(out["z"], errors="coerce")
-    return out
+    def rows(self, key: str) -> slice | None:
+        """Row slice of ``key`` in the column arrays, or None if it has no predictions."""
+        span = self._groups.get(str(key))
+        return slice(*span) if span is not None else None
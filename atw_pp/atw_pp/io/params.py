@@ -1,8 +1,14 @@
 from __future__ import annotations
 
+from collections.abc import Mapping
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterable, Iterator
+
+import numpy as np
 import pandas as pd
+import pyarrow.parquet as pq
+
+from ..tables.sink import ColumnBuilder
 
 def attach_params(
     row: dict[str, Any],
@@ -21,28 +27,135 @@ def attach_params(
         out[kk] = v
     return out
 
-def load_param_map(param_csvs: list[Path] | None, mode: str = "merge") -> dict[str, dict[str, Any]]:
-    if not param_csvs:
-        return {}
+def attach_param_columns(
+    builder: ColumnBuilder,
+    params: dict[str, Any] | None,
+    *,
+    prefix: str = "param__",
+    on_conflict: str = "keep_row",
+) -> None:
+    """
+    attach_params for every row of a tables.sink.ColumnBuilder: one constant column per
+    param instead of one dict copy per row. With "keep_row", rows that set the column
+    themselves keep their value (None included), like attach_params.
+    """
+    if not params:
+        return
+    for k, v in params.items():
+        kk = f"{prefix}{k}" if prefix else str(k)
+        builder.fill(kk, v, keep=on_conflict == "keep_row")
 
-    dfs = [pd.read_csv(p) for p in param_csvs]
-    for df in dfs:
-        if "path" not in df:
-            raise ValueError("Param CSV missing required column 'path'")
-        df["path"] = df["path"].astype(str)
+class ParamStore(Mapping):
+    """
+    Param rows indexed by ``path``: path -> {column: value}, like the dict-of-dicts it
+    replaces, but held as one array per column behind a hash index. ``get`` is O(1) and
+    only builds the dict of the row asked for; ``to_df`` returns the whole table.
+    """
 
-    if mode == "append":
-        dfp = pd.concat(dfs, ignore_index=True).drop_duplicates("path", keep="last")
-    elif mode == "merge":
-        dfp = dfs[0]
-        for df in dfs[1:]:
-            dfp = dfp.merge(df, on="path", how="outer", suffixes=("", "_dup"))
+    def __init__(self, paths: pd.Index, columns: dict[str, np.ndarray]):
+        self.paths = paths
+        self.columns = columns
+
+    def row(self, path: str) -> int | None:
+        try:
+            return int(self.paths.get_loc(path))
+        except KeyError:
+            return None
+
+    def __getitem__(self, path: str) -> dict[str, Any]:
+        i = self.row(path)
+        if i is None:
+            raise KeyError(path)
+        return {c: v[i] for c, v in self.columns.items()}
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.paths)
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def __contains__(self, path) -> bool:
+        return path in self.paths
+
+    def to_df(self) -> pd.DataFrame:
+        return pd.DataFrame({"path": self.paths.to_numpy(), **self.columns})
+
+def _read_param_table(path: Path, columns: tuple[str, ...] | None, keep: set[str] | None) -> pd.DataFrame:
+    """
+    One param file (.csv or .parquet), limited to ``columns`` and to rows whose path is in ``keep``.
+    CSVs are parsed by pd.read_csv over the whole file, so values and dtypes are what pandas infers
+    (empty cells NaN, dates left as strings).
+    """
+    wanted = None if columns is None else ["path", *[c for c in columns if c != "path"]]
+    if Path(path).suffix.lower() == ".parquet":
+        names = pq.read_schema(path).names
+        if "path" not in names:
+            raise ValueError("Param CSV missing required column 'path'")
+        df = pq.read_table(path, columns=[c for c in wanted if c in names] if wanted else None).to_pandas()
     else:
+        header = pd.read_csv(path, nrows=0).columns
+        if "path" not in header:
+            raise ValueError("Param CSV missing required column 'path'")
+        df = pd.read_csv(path, usecols=(lambda c: c in wanted) if wanted else None)
+    df["path"] = df["path"].astype(str)
+    if keep is not None:
+        df = df[df["path"].isin(keep)]
+    return df.reset_index(drop=True)
+
+def _last_per_path(df: pd.DataFrame) -> pd.DataFrame:
+    """Drop repeated paths, keeping the last row of each."""
+    return df.drop_duplicates("path", keep="last")
+
+def _columns_of(df: pd.DataFrame) -> dict[str, np.ndarray]:
+    return {c: df[c].to_numpy() for c in df.columns if c != "path"}
+
+def load_param_map(
+    param_csvs: list[Path] | None,
+    mode: str = "merge",
+    *,
+    paths: Iterable[str] | None = None,
+    columns: Iterable[str] | None = None,
+) -> ParamStore:
+    """
+    Param CSV (or Parquet) files as a ParamStore keyed by ``path``.
+
+    mode "append" stacks the files and keeps the last row per path; "merge" outer-joins
+    them on path (a column already taken by an earlier file gets a "_dup" suffix).
+    ``paths`` limits rows to those structures and ``columns`` limits which columns are read.
+    """
+    if mode not in ("append", "merge"):
         raise ValueError("mode must be 'append' or 'merge'")
+    if not param_csvs:
+        return ParamStore(pd.Index([], dtype=object), {})
+
+    keep = set(map(str, paths)) if paths is not None else None
+    cols = tuple(columns) if columns is not None else None
+    tables = [_read_param_table(p, cols, keep) for p in param_csvs]
+
+    if mode == "append":
+        df = _last_per_path(pd.concat(tables, ignore_index=True))
+        return ParamStore(pd.Index(df["path"].to_numpy(), dtype=object), _columns_of(df))
+
+    tables = [_last_per_path(t) for t in tables]
+    if len(tables) == 1:
+        df = tables[0]
+        return ParamStore(pd.Index(df["path"].to_numpy(), dtype=object), _columns_of(df))
 
-    return dfp.set_index("path").to_dict(orient="index")
+    # outer join on path: sorted union of paths, missing cells NaN (int -> float), as DataFrame.merge
+    index = pd.Index(sorted(set().union(*(t["path"] for t in tables))), dtype=object)
+    out: dict[str, np.ndarray] = {}
+    for t in tables:
+        t = t.set_index("path")
+        for c in t.columns:
+            name = c
+            while name in out:
+                name = f"{name}_dup"
+            out[name] = t[c].reindex(index).to_numpy()
+    return ParamStore(index, out)
 
-def param_map_to_df(param_map: dict[str, dict[str, Any]]) -> pd.DataFrame:
+def param_map_to_df(param_map: Mapping[str, dict[str, Any]]) -> pd.DataFrame:
+    if isinstance(param_map, ParamStore):
+        return param_map.to_df()
     if not param_map:
         return pd.DataFrame(columns=["path"])
     return pd.DataFrame.from_dict(param_map, orient="index").reset_index(names="path").drop_duplicates("path")
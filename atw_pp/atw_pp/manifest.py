@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Iterable, Literal
+
+import pandas as pd
+
+from .config import MetadataConfig
+
+Fingerprint = Literal["stat", "sha256"]
+
+MANIFEST_FILE = "run_manifest.parquet"
+MANIFEST_COLS = ["path", "size", "mtime_ns", "sha256", "config_hash", "plugin_versions", "status"]
+
+def sha256_file(path: Path, *, block_size: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def file_fingerprint(path: Path, mode: Fingerprint = "stat") -> dict[str, Any]:
+    st = os.stat(path)
+    return {
+        "size": int(st.st_size),
+        "mtime_ns": int(st.st_mtime_ns),
+        "sha256": sha256_file(path) if mode == "sha256" else "",
+    }
+
+def config_hash(cfg: MetadataConfig, side_inputs: Iterable[Path] = ()) -> str:
+    """
+    Hash of everything besides the structure file that decides its output rows:
+    the config and the stat fingerprint of side inputs (param CSVs, Paragraph preds).
+    Cache locations do not change the rows and are left out.
+    """
+    cfg_dict = cfg.to_dict()
+    cfg_dict.pop("pae_cache", None)
+    payload = {
+        "cfg": cfg_dict,
+        "inputs": {str(p): file_fingerprint(p) for p in side_inputs},
+    }
+    blob = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode()).hexdigest()[:16]
+
+def plugin_versions(plugins: list) -> str:
+    return ";".join(f"{p.name}={getattr(p, 'version', '0')}" for p in plugins)
+
+def load_manifest(out_dir: Path) -> pd.DataFrame:
+    f = out_dir / MANIFEST_FILE
+    if not f.exists():
+        return pd.DataFrame(columns=MANIFEST_COLS)
+    return pd.read_parquet(f)
+
+def write_manifest(out_dir: Path, df: pd.DataFrame) -> None:
+    tmp = out_dir / (MANIFEST_FILE + ".tmp")
+    df[MANIFEST_COLS].to_parquet(tmp, index=False)
+    os.replace(tmp, out_dir / MANIFEST_FILE)
+
+def plan_incremental(
+    paths: list[Path],
+    manifest: pd.DataFrame,
+    *,
+    run_hash: str,
+    versions: str,
+    fingerprint: Fingerprint = "stat",
+) -> tuple[list[Path], pd.DataFrame, dict[str, dict[str, Any]]]:
+    """
+    Split ``paths`` into work to do and entries to keep from a previous run.
+
+    Returns (todo_paths, kept_manifest_rows, fingerprints by absolute path). An
+    entry is kept when path, size, mtime (or sha256), config hash and plugin
+    versions all match; files that disappeared are dropped from the manifest.
+    """
+    prev = {row["path"]: row for row in manifest.to_dict(orient="records")}
+    todo: list[Path] = []
+    kept: list[dict[str, Any]] = []
+    fps: dict[str, dict[str, Any]] = {}
+
+    for path in paths:
+        abs_path = str(path.resolve())
+        try:
+            fp = file_fingerprint(path, fingerprint)
+        except OSError:  # listed but missing / unreadable: processed, and reported as a parse failure
+            fps[abs_path] = {"size": -1, "mtime_ns": -1, "sha256": ""}
+            todo.append(path)
+            continue
+        fps[abs_path] = fp
+        old = prev.get(abs_path)
+        same = (
+            old is not None
+            and old["config_hash"] == run_hash
+            and old["plugin_versions"] == versions
+            and int(old["size"]) == fp["size"]
+            and (
+                old["sha256"] == fp["sha256"]
+                if fingerprint == "sha256"
+                else int(old["mtime_ns"]) == fp["mtime_ns"]
+            )
+        )
+        if same:
+            kept.append(old)
+        else:
+            todo.append(path)
+
+    return todo, pd.DataFrame(kept, columns=MANIFEST_COLS), fps
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from .manifest import MANIFEST_COLS, load_manifest, write_manifest
+from .profiling import TIMINGS_FILE
+from .run import PARAM_CONFLICT_KEY, PARAMS_FILE, TABLE_FILES, TABLES, write_wide_table
+from .tables.sink import concat_parquet_files, merge_parquet_files, unify_parquet_schemas
+
+def _check_shards(shard_dirs: list[Path], out_dir: Path) -> pd.DataFrame:
+    """The shards' manifests, concatenated; refuses overlapping shards and mixed configs."""
+    if not shard_dirs:
+        raise ValueError("No shard directories to merge")
+    if out_dir.resolve() in {d.resolve() for d in shard_dirs}:
+        raise ValueError(f"Output directory {out_dir} is one of the shards")
+    for d in shard_dirs:
+        if not (d / TABLE_FILES["structures"]).exists():
+            raise ValueError(f"{d} is not an atw_pp output directory (no {TABLE_FILES['structures']})")
+
+    manifests = [load_manifest(d).assign(__shard=str(d)) for d in shard_dirs]
+    manifest = pd.concat(manifests, ignore_index=True) if manifests else pd.DataFrame(columns=MANIFEST_COLS)
+
+    dup = manifest["path"].duplicated(keep=False)
+    if dup.any():
+        first = manifest.loc[dup, "path"].iloc[0]
+        where = sorted(manifest.loc[manifest["path"] == first, "__shard"])
+        raise ValueError(f"{int(dup.sum())} structures appear in more than one shard, e.g. {first} in {where}")
+    for col, what in (("config_hash", "configurations"), ("plugin_versions", "plugin versions")):
+        if manifest[col].nunique() > 1:
+            raise ValueError(f"Shards were built with different {what}: {sorted(manifest[col].unique())}")
+    return manifest.drop(columns="__shard")
+
+def _param_on_conflict(params: list[Path]) -> str:
+    """The param_on_conflict the shards' params_metadata.parquet files were written with."""
+    found = {}
+    for f in params:
+        value = (pq.read_schema(f).metadata or {}).get(PARAM_CONFLICT_KEY)
+        if value is None:
+            raise ValueError(f"{f} does not record param_on_conflict; rerun that shard")
+        found[value.decode()] = f
+    if len(found) > 1:
+        raise ValueError(f"Shards were built with different param_on_conflict: {sorted(found)}")
+    return next(iter(found))
+
+def _by_path(df: pd.DataFrame) -> pd.DataFrame:
+    """``df`` stably sorted by path as Path objects, the order list_structures gives."""
+    return df.sort_values("path", kind="stable", key=lambda s: s.map(Path)) if "path" in df.columns else df
+
+def merge_outputs(shard_dirs: list[Path], out_dir: Path, *, wide_batch: int = 0) -> dict[str, int]:
+    """
+    Combine the output directories of sharded runs (build_metadata(shard=...)) into ``out_dir``
+    without running any plugin: the long tables, params_metadata.parquet, timings.parquet,
+    bad_files.csv and run_manifest.parquet are combined under one schema, and all_metadata.parquet
+    is rebuilt from the merged tables with the shards' param_on_conflict (see run.write_wide_table).
+    The long tables are k-way merged by path (Path order, as list_structures sorts), one batch
+    per shard in memory; each shard of a run over a directory is already in that order, so the
+    merge matches one run over all the inputs. params_metadata.parquet, bad_files.csv and the
+    manifest are sorted the same way in memory; timings.parquet keeps shard order.
+    Returns the row count of each written file.
+    """
+    manifest = _check_shards(shard_dirs, out_dir)
+    params = [d / PARAMS_FILE for d in shard_dirs if (d / PARAMS_FILE).exists()]
+    param_on_conflict = _param_on_conflict(params) if params else "keep_row"
+    out_dir.mkdir(parents=True, exist_ok=True)
+    counts: dict[str, int] = {}
+
+    for table in TABLES:
+        name = TABLE_FILES[table]
+        files = [d / name for d in shard_dirs if (d / name).exists()]
+        counts[name] = merge_parquet_files(files, out_dir / name, key=Path)
+
+    df_params = None
+    if params:
+        schema = unify_parquet_schemas(params)
+        schema = schema.with_metadata({PARAM_CONFLICT_KEY: param_on_conflict.encode()})
+        counts[PARAMS_FILE] = concat_parquet_files(params, out_dir / PARAMS_FILE, schema=schema)
+        # one row per structure, in param-file order rather than path order: sorted whole
+        table = pq.read_table(out_dir / PARAMS_FILE)
+        order = _by_path(table.select(["path"]).to_pandas()).index.to_numpy()
+        pq.write_table(table.take(order), out_dir / PARAMS_FILE)
+        df_params = pd.read_parquet(out_dir / PARAMS_FILE)
+
+    timings = [d / TIMINGS_FILE for d in shard_dirs if (d / TIMINGS_FILE).exists()]
+    if timings:
+        counts[TIMINGS_FILE] = concat_parquet_files(timings, out_dir / TIMINGS_FILE)
+
+    bad = []
+    for d in shard_dirs:
+        f = d / "bad_files.csv"
+        try:
+            bad.append(pd.read_csv(f))
+        except (FileNotFoundError, pd.errors.EmptyDataError):
+            continue
+    df_bad = pd.concat(bad, ignore_index=True) if bad else pd.DataFrame()
+    df_bad = _by_path(df_bad)
+    df_bad.to_csv(out_dir / "bad_files.csv", index=False)
+    counts["bad_files.csv"] = len(df_bad)
+
+    write_manifest(out_dir, _by_path(manifest))
+    counts["run_manifest.parquet"] = len(manifest)
+
+    counts["all_metadata.parquet"] = write_wide_table(
+        out_dir, df_params, wide_batch=wide_batch, param_on_conflict=param_on_conflict
+    )
+    return counts
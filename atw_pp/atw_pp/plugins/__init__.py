@@ -4,12 +4,14 @@ from .identity import IdentityPlugin
 from .chain_continuity import ChainContinuityPlugin
 from .paragraph_paratope import ParagraphParatopePlugin
 from .interface_contacts import InterfaceContactsPlugin
+from .ipsae import IpsaePlugin
 
 BUILTIN_PLUGINS = {
     "identity": IdentityPlugin(),
     "chain_continuity": ChainContinuityPlugin(),
     "paragraph_paratope": ParagraphParatopePlugin(),
     "interface_contacts": InterfaceContactsPlugin(),
+    "ipsae": IpsaePlugin(),
 }
 
 __all__ = ["BUILTIN_PLUGINS"]
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from typing import Any, Iterable, Protocol, Literal
+from typing import Any, Iterable, Mapping, Protocol, Literal
 import biotite.structure as struc
 
 TableName = Literal["structures", "chains", "roles", "interfaces"]
@@ -12,8 +12,9 @@ class Context:
     assembly_id: str
     aa: struc.AtomArray
 
-    chains: dict[str, struc.AtomArray] = field(default_factory=dict)
-    roles: dict[str, struc.AtomArray] = field(default_factory=dict)
+    # core.selection.AtomViews in a run: AtomArrays built lazily, or .indices()/.coord() without copies
+    chains: Mapping[str, struc.AtomArray] = field(default_factory=dict)
+    roles: Mapping[str, struc.AtomArray] = field(default_factory=dict)
 
     data: dict[str, Any] = field(default_factory=dict)
     cache: dict[str, Any] = field(default_factory=dict)
@@ -25,11 +26,15 @@ class Plugin(Protocol):
     name: the name of the plugin
     prefix: used to prefix emitted row columns in the output
     table: the name of the table this plugin outputs rows for ("structures", "chains", "roles", "interfaces")
+    version: bump when the emitted values change; incremental runs recompute structures on a version change
+    schema (optional): {row key: dtype} for emitted columns, dtype one of tables.sink.ARROW_TYPES
+        ("float32", "float64", "int32", "int64", "bool", "string", "category"); undeclared columns are inferred
     yield {"path": ctx.path, "assembly_id": ctx.assembly_id, ...}
     """
     name: str
     prefix: str
     table: TableName
+    version: str
 
     def run(self, ctx: Context) -> Iterable[dict]:
         ...
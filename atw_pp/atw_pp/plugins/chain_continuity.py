@@ -7,6 +7,8 @@ class ChainContinuityPlugin:
     name = "chain_continuity"
     prefix = "qc"
     table = "chains"
+    version = "1"
+    schema = {"has_break": "bool", "n_breaks": "int32"}
 
     def run(self, ctx: Context):
         for chain_id, arr in ctx.chains.items():
@@ -6,33 +6,40 @@ class IdentityPlugin:
     name = "identity"
     prefix = "id"
     table = "structures"
+    version = "1"
+    schema = {"n_atoms_total": "int32", "has_nan_coord": "bool", "n_chains": "int32", "n_atoms": "int32"}
 
     def run(self, ctx: Context):
+        # per-atom NaN flag, indexed by the chain / role views so no atoms are copied
+        nan_atom = np.isnan(ctx.aa.coord).any(axis=1)
+
         yield {
             "__table__": "structures",
             "path": ctx.path,
             "assembly_id": ctx.assembly_id,
             "n_atoms_total": int(len(ctx.aa)),
-            "has_nan_coord": bool(np.isnan(ctx.aa.coord).any()) if len(ctx.aa) else True,
+            "has_nan_coord": bool(nan_atom.any()) if len(ctx.aa) else True,
             "n_chains": int(len(ctx.chains)),
         }
 
-        for chain_id, arr in ctx.chains.items():
+        for chain_id in ctx.chains:
+            idx = ctx.chains.indices(chain_id)
             yield {
                 "__table__": "chains",
                 "path": ctx.path,
                 "assembly_id": ctx.assembly_id,
                 "chain_id": str(chain_id),
-                "n_atoms": int(len(arr)),
-                "has_nan_coord": bool(np.isnan(arr.coord).any()) if len(arr) else True,
+                "n_atoms": int(len(idx)),
+                "has_nan_coord": bool(nan_atom[idx].any()) if len(idx) else True,
             }
 
-        for role_name, arr in ctx.roles.items():
+        for role_name in ctx.roles:
+            idx = ctx.roles.indices(role_name)
             yield {
                 "__table__": "roles",
                 "path": ctx.path,
                 "assembly_id": ctx.assembly_id,
                 "role": str(role_name),
-                "n_atoms": int(len(arr)),
-                "has_nan_coord": bool(np.isnan(arr.coord).any()) if len(arr) else True,
+                "n_atoms": int(len(idx)),
+                "has_nan_coord": bool(nan_atom[idx].any()) if len(idx) else True,
             }
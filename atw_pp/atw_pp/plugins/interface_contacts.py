@@ -1,36 +1,40 @@
 from __future__ import annotations
 
 from .base import Context
-from ..core.contacts import contact_stats_between_atom_sets
+from ..core.contacts import chain_contact_index
+from ..core.selection import role_chain_ids
 
 class InterfaceContactsPlugin:
     """
     Role-role interface contacts.
     Reads cfg.interface_pairs = (("antibody","antigen"), ("vh","antigen"), ...)
     Emits one row per pair into interfaces table.
+    Stats are assembled from per-chain-pair distances (core.contacts.ChainContactIndex,
+    kept in ctx.cache), so roles sharing chains do not rebuild spatial indices.
     """
     name = "interface_contacts"
     prefix = "iface"
     table = "interfaces"
+    version = "1"
+    schema = {"n_contact_atoms": "int32", "n_clash_atoms": "int32", "min_dist": "float64"}
 
     def run(self, ctx: Context):
         cfg = ctx.data.get("cfg")
         pairs = getattr(cfg, "interface_pairs", (("antibody", "antigen"),)) if cfg is not None else (("antibody", "antigen"),)
 
+        index = chain_contact_index(ctx)
+
         for left_role, right_role in pairs:
-            left = ctx.roles.get(left_role)
-            right = ctx.roles.get(right_role)
-            if left is None or right is None:
+            if left_role not in ctx.roles or right_role not in ctx.roles:
                 continue
-            if len(left) == 0 or len(right) == 0:
+            if ctx.roles.n_atoms(left_role) == 0 or ctx.roles.n_atoms(right_role) == 0:
                 continue
 
-            stats = contact_stats_between_atom_sets(
-                left.coord,
-                right.coord,
+            stats = index.contact_stats(
+                role_chain_ids(ctx.roles, ctx.chains, left_role),
+                role_chain_ids(ctx.roles, ctx.chains, right_role),
                 contact_cutoff=5.0,
                 clash_cutoff=1.0,
-                cell_size=6.0,
             )
 
             yield {
@@ -1,25 +1,121 @@
 """
-https://github.com/DunbrackLab/IPSAE/blob/main/ipsae.py
-https://github.com/adaptyvbio/nipah_ipsae_pipeline/blob/main/Boltz-IPSAE.ipynb
-
-The ipsae.py can be run in commandline (sys.argv).
-So I use subprocess.run(["python", ipsae.py, ...]) to call it,
-It will generate *_15_15.txt along the structure files.
-Plugin read the txt file and yield data into interfaces table.
-
-This script assumes the PAE file is next to the structure file,
-with names like pae_model_0.npz, model_0_pae.npz, pae.npz (fallback),
-or AF3 style confidences.json.
-If no PAE file found, skip without error.
+ipSAE / ipTM / pDockQ / pDockQ2 / LIS per chain pair, computed in-process
+(atw_pp.core.ipsae) from the already-parsed structure and the PAE file next to it.
+Nothing is written next to the inputs.
+
+The PAE file is looked up next to the structure:
+  - Boltz:  pae_{stem}.npz, {stem}_pae.npz, pae.npz
+            (+ plddt_*.npz and confidence_*.json for pLDDT / ipTM)
+  - AF3:    confidences.json, {stem with _model_ -> _full_data_}.json
+            (+ summary_confidences*.json for chain-pair ipTM)
+  - AF2:    {stem with _unrelaxed_/_relaxed_ -> _scores_}.json, {stem}.json
+The source follows the reference script: .json + .pdb -> AF2, .json + .cif -> AF3, .npz -> Boltz
+(stems and formats ignore .gz, and .bcif counts as .cif).
+If no PAE file is found, skip without error. PAE is read through atw_pp.io.pae
+(memory-mapped .npy/.npz, streamed JSON; cfg.pae_dtype, optional cfg.pae_cache).
+
+Rows go to the interfaces table, one "max" and one "min" row per chain pair and
+(pae_cutoff, dist_cutoff) in cfg.ipsae_cutoffs (the min row is the chain1 -> chain2
+asymmetric score, as before). All cutoff pairs are scored in one pass.
 """
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+import json
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any, Dict, Iterable
-import subprocess
-import pandas as pd
+
+import numpy as np
+
+from ..core.ipsae import SCORE_COLS, IpsaeTokens, ipsae_sweep, tokens_from_atoms
+from ..io.cif import structure_stem, structure_suffix
+from ..io.pae import PAE_KEYS, load_arrays, load_pae
+
+# residue counts among SCORE_COLS
+INT_SCORE_COLS = ("n0res", "n0chn", "n0dom", "nres1", "nres2", "dist1", "dist2")
+
+def find_pae_file(structure: Path) -> Path | None:
+    folder, stem = structure.parent, structure_stem(structure)
+    candidates = [
+        folder / f"pae_{stem}.npz",
+        folder / f"{stem}_pae.npz",
+        folder / "pae.npz",
+        folder / "confidences.json",
+    ]
+    if "_model_" in stem:
+        candidates.append(folder / f"{stem.replace('_model_', '_full_data_')}.json")
+    for tag in ("_unrelaxed_", "_relaxed_"):
+        if tag in stem:
+            candidates.append(folder / f"{stem.replace(tag, '_scores_')}.json")
+    candidates.append(folder / f"{stem}.json")
+    return next((p for p in candidates if p.exists()), None)
+
+def _load_json(path: Path) -> dict:
+    with open(path) as fh:
+        return json.load(fh)
+
+def _pair_iptm(table, chains: list[str], str_keys: bool) -> dict[tuple[str, str], float]:
+    out = {}
+    for n1, c1 in enumerate(chains):
+        for n2, c2 in enumerate(chains):
+            if c1 != c2:
+                out[(c1, c2)] = float(table[str(n1)][str(n2)] if str_keys else table[n1][n2])
+    return out
+
+def load_confidences(
+    pae_path: Path,
+    structure: Path,
+    tokens: IpsaeTokens,
+    *,
+    dtype=np.float32,
+    cache_dir: Path | None = None,
+) -> tuple[str, np.ndarray, np.ndarray, float | dict[tuple[str, str], float]]:
+    """
+    Return (source, residue PAE, CB pLDDT, ipTM) the way the reference script reads them.
+    PAE and pLDDT go through io.pae, so they arrive as ``dtype`` arrays without nested lists.
+    """
+    numres = len(tokens.chains)
+    mask = tokens.token_mask
+    chains = [str(c) for c in dict.fromkeys(tokens.chains.tolist())]
+
+    if pae_path.suffix == ".npz":
+        pae = load_pae(pae_path, dtype=dtype, cache_dir=cache_dir)[np.ix_(mask, mask)]
+        plddt_path = Path(str(pae_path).replace("pae", "plddt"))
+        if plddt_path.exists():
+            raw = np.asarray(load_arrays(plddt_path, ("plddt",))["plddt"])
+            cb_plddt = (100.0 * raw if np.max(raw) <= 1.0 else raw)[mask]
+        else:
+            cb_plddt = np.zeros(numres)
+        iptm: float | dict = {}
+        summary = Path(str(pae_path).replace("pae", "confidence").replace(".npz", ".json"))
+        if summary.exists():
+            iptm = _pair_iptm(_load_json(summary).get("pair_chains_iptm", {}), chains, str_keys=True)
+        return "boltz", pae, cb_plddt, iptm
+
+    if structure_suffix(structure) in (".pdb", ".pdb.gz"):
+        data = load_arrays(pae_path, (*PAE_KEYS, "plddt", "iptm"), dtype=dtype, cache_dir=cache_dir)
+        pae = next((data[k] for k in PAE_KEYS if k in data), None)
+        if pae is None:
+            raise ValueError(f"No PAE matrix in {pae_path}")
+        cb_plddt = np.asarray(data["plddt"]) if "plddt" in data else np.zeros(numres)
+        return "af2", pae, cb_plddt, float(data.get("iptm", -1.0))
+
+    data = load_arrays(pae_path, ("pae", "atom_plddts"), dtype=dtype, cache_dir=cache_dir)
+    pae = data["pae"][np.ix_(mask, mask)]
+    if "atom_plddts" in data:
+        cb_plddt = np.asarray(data["atom_plddts"])[tokens.cb_atom]
+    else:
+        cb_plddt = np.zeros(numres)
+    iptm = {}
+    name = pae_path.name
+    if "confidences" in name:
+        summary = pae_path.with_name(name.replace("confidences", "summary_confidences"))
+    else:
+        summary = pae_path.with_name(name.replace("full_data", "summary_confidences"))
+    if summary.exists():
+        iptm = _pair_iptm(_load_json(summary)["chain_pair_iptm"], chains, str_keys=False)
+    return "af3", pae, cb_plddt, iptm
 
 
 @dataclass(frozen=True, slots=True)
@@ -27,77 +123,52 @@ class IpsaePlugin:
     name: str = "ipsae"
     table: str = "interfaces"
     prefix: str = "ipsae"
+    version: str = "4"
+    schema: Dict[str, str] = field(
+        default_factory=lambda: {
+            "agg": "category",
+            **{c: "int32" if c in INT_SCORE_COLS else "float64" for c in SCORE_COLS},
+        }
+    )
 
-    ipsae_script: str = "../externals/ipsae/ipsae.py"
-    pae_cutoff: float = 15.0
-    dist_cutoff: float = 15.0
+    # used when cfg has no ipsae_cutoffs
+    cutoffs: tuple[tuple[float, float], ...] = ((15.0, 15.0),)
 
     emit_max: bool = True
     emit_min: bool = True
 
     def run(self, ctx) -> Iterable[Dict[str, Any]]:
         structure = Path(ctx.path)
-        folder = structure.parent
-        stem = structure.stem
-
-        # 1) find pae file next to structure (Boltz-style default)
-        pae_candidates = [
-            folder / f"pae_{stem}.npz",
-            folder / f"{stem}_pae.npz",
-            folder / "pae.npz",
-            folder / "confidences.json",  # AF3 style
-        ]
-        pae_path = next((p for p in pae_candidates if p.exists()), None)
+        pae_path = find_pae_file(structure)
         if pae_path is None:
             return
 
-        # 2) run external script (creates *_15_15.txt next to structure)
-        subprocess.run(
-            ["python", self.ipsae_script, str(pae_path), str(structure),
-             str(self.pae_cutoff), str(self.dist_cutoff)],
-            check=True
-        )
-
-        pae_s = f"{int(self.pae_cutoff):02d}"
-        dist_s = f"{int(self.dist_cutoff):02d}"
-        out_txt = structure.with_suffix("").as_posix() + f"_{pae_s}_{dist_s}.txt"
-        out_path = Path(out_txt)
-        if not out_path.exists():
-            return
+        cfg = ctx.data.get("cfg")
+        cutoffs = getattr(cfg, "ipsae_cutoffs", self.cutoffs) if cfg is not None else self.cutoffs
 
-        # 3) parse output (some versions are whitespace separated)
-        df = pd.read_csv(out_path, sep=r"\s+", engine="python")
-
-        # 4) choose score columns robustly
-        id_cols = {"Chn1", "Chn2", "PAE", "Dist", "Type", "Model"}
-        score_cols = [c for c in df.columns if c not in id_cols]
-
-        # 5) emit max + min per chainpair, matching notebook logic
-        max_rows = df[df["Type"] == "max"]
-        for _, row_max in max_rows.iterrows():
-            ch1, ch2 = row_max["Chn1"], row_max["Chn2"]
-            pair = f"{ch1}-{ch2}"
-
-            base = {
-                "__table__": "interfaces",
-                "path": ctx.path,
-                "assembly_id": ctx.assembly_id,
-                "pair": pair,
-            }
-
-            if self.emit_max:
-                yield {
-                    **base,
-                    "agg": "max",
-                    **{c: row_max.get(c) for c in score_cols},
+        tokens = tokens_from_atoms(ctx.aa)
+        dtype = getattr(cfg, "pae_dtype", "float32")
+        cache = getattr(cfg, "pae_cache", None)
+        source, pae, cb_plddt, iptm = load_confidences(
+            pae_path, structure, tokens, dtype=dtype, cache_dir=Path(cache) if cache else None
+        )
+        sweep = ipsae_sweep(tokens, pae, cb_plddt, cutoffs=cutoffs, iptm=iptm, source=source)
+
+        for (pae_cutoff, dist_cutoff), rows in sweep.items():
+            asym = {(r["Chn1"], r["Chn2"]): r for r in rows if r["Type"] == "asym"}
+            for r in rows:
+                if r["Type"] != "max":
+                    continue
+                ch1, ch2 = r["Chn1"], r["Chn2"]
+                base = {
+                    "__table__": "interfaces",
+                    "path": ctx.path,
+                    "assembly_id": ctx.assembly_id,
+                    "pair": f"{ch1}-{ch2}",
+                    "pae_cutoff": pae_cutoff,
+                    "dist_cutoff": dist_cutoff,
                 }
-
-            if self.emit_min:
-                mask = (df["Chn1"] == ch1) & (df["Chn2"] == ch2) & (df["Type"] != "max")
-                if mask.any():
-                    mins = df.loc[mask, score_cols].min(numeric_only=True)
-                    yield {
-                        **base,
-                        "agg": "min",
-                        **mins.to_dict(),
-                    }
+                if self.emit_max:
+                    yield {**base, "agg": "max", **{c: r[c] for c in SCORE_COLS}}
+                if self.emit_min:
+                    yield {**base, "agg": "min", **{c: asym[(ch1, ch2)][c] for c in SCORE_COLS}}
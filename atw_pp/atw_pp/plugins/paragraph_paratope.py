@@ -1,48 +1,67 @@
 from __future__ import annotations
 
-from pathlib import Path
 import numpy as np
 import pandas as pd
 
 from .base import Context
 from ..core.epitope import points_repr_from_points
+from ..io.cif import structure_stem
+from ..io.paragraph import ParagraphIndex
 
 class ParagraphParatopePlugin:
+    """
+    Paratope summaries from Paragraph predictions, per chain (chains table) and per
+    role in cfg.role_paratope_summaries (roles table).
+    Predictions come from ctx.data["paragraph_index"] (io.paragraph.ParagraphIndex, built
+    once per run); a bare ctx.data["paragraph_df"] is indexed on first use.
+    """
     name = "paragraph_paratope"
     prefix = "paragraph"
     table = "chains"
-
-    def _subset_df(self, ctx: Context, df: pd.DataFrame) -> pd.DataFrame:
-        cfg = ctx.data.get("cfg")
-        mode = getattr(cfg, "paragraph_id_mode", "stem") if cfg is not None else "stem"
-        if mode == "path":
-            if "path" not in df.columns:
-                return df.iloc[:0]
-            return df[df["path"].astype(str) == str(ctx.path)]
-        pdb_id = Path(ctx.path).stem
-        return df[df["pdb"].astype(str) == str(pdb_id)]
-
-    def _summarize(self, g: pd.DataFrame, cutoff: float, label_prefix: str, label_maker):
-        g = g.copy()
-        g["pred"] = pd.to_numeric(g["pred"], errors="coerce")
-        g["x"] = pd.to_numeric(g["x"], errors="coerce")
-        g["y"] = pd.to_numeric(g["y"], errors="coerce")
-        g["z"] = pd.to_numeric(g["z"], errors="coerce")
-        g = g.dropna(subset=["pred", "x", "y", "z", "IMGT", "chain_id"])
-        if g.empty:
+    version = "2"
+    schema = {
+        "cutoff": "float64",
+        "n_res_scored": "int32",
+        "score_mean_all_scored": "float64",
+        "score_max": "float64",
+        "paratope_size": "int32",
+        "paratope_labels": "string",
+        "paratope_centroid_x": "float64",
+        "paratope_centroid_y": "float64",
+        "paratope_centroid_z": "float64",
+        "paratope_rg": "float64",
+        "paratope_score_mean": "float64",
+    }
+
+    def __init__(self):
+        self._indexed: tuple[int, str, ParagraphIndex] | None = None
+
+    def _index(self, ctx: Context, by: str) -> ParagraphIndex | None:
+        index = ctx.data.get("paragraph_index")
+        if index is not None:
+            return index
+        df: pd.DataFrame | None = ctx.data.get("paragraph_df")
+        if df is None or df.empty:
+            return None
+        if self._indexed is None or self._indexed[:2] != (id(df), by):
+            self._indexed = (id(df), by, ParagraphIndex(df, by=by))
+        return self._indexed[2]
+
+    def _summarize(self, index: ParagraphIndex, rows: np.ndarray, cutoff: float, label_prefix: str):
+        rows = rows[index.valid[rows]]
+        pred = index.pred[rows].astype(np.float64)
+        if len(pred) == 0:
             return None
 
-        n_scored = int(len(g))
-        hit = g[g["pred"] >= cutoff].copy()
-
+        hit = pred >= cutoff
         base = {
             "cutoff": float(cutoff),
-            "n_res_scored": n_scored,
-            "score_mean_all_scored": float(g["pred"].mean()),
-            "score_max": float(g["pred"].max()),
+            "n_res_scored": int(len(pred)),
+            "score_mean_all_scored": float(pred.mean()),
+            "score_max": float(pred.max()),
         }
 
-        if hit.empty:
+        if not hit.any():
             return {
                 **base,
                 f"{label_prefix}_size": 0,
@@ -54,38 +73,42 @@ class ParagraphParatopePlugin:
                 f"{label_prefix}_score_mean": np.nan,
             }
 
-        P = hit[["x", "y", "z"]].to_numpy(dtype=float)
-        labels = [label_maker(r) for _, r in hit.iterrows()]
+        P = index.xyz[rows[hit]].astype(np.float64)
+        labels = index.label[rows[hit]].tolist()
         reprd = points_repr_from_points(P, labels, label_prefix=label_prefix)
 
         return {
             **base,
             **reprd,
-            f"{label_prefix}_score_mean": float(hit["pred"].mean()),
+            f"{label_prefix}_score_mean": float(pred[hit].mean()),
         }
 
     def run(self, ctx: Context):
         cfg = ctx.data.get("cfg")
-        df: pd.DataFrame | None = ctx.data.get("paragraph_df")
-        if cfg is None or df is None or df.empty:
+        if cfg is None:
+            return
+        path_mode = getattr(cfg, "paragraph_id_mode", "stem") == "path"
+        index = self._index(ctx, "path" if path_mode else "pdb")
+        if index is None:
             return
 
-        cutoff = float(cfg.paragraph_cutoff)
-        sub = self._subset_df(ctx, df)
-        if sub.empty:
+        span = index.rows(str(ctx.path) if path_mode else structure_stem(ctx.path))
+        if span is None:
             return
 
+        cutoff = float(cfg.paragraph_cutoff)
+        chains = index.chain_id[span]
+
         # ---- Chain-level outputs (chains table) ----
-        for chain_id, grp in sub.groupby("chain_id", sort=False):
+        # group offsets over this structure's rows, chains in order of first appearance
+        codes, chain_ids = pd.factorize(chains)
+        order = np.argsort(codes, kind="stable") + span.start
+        offsets = np.r_[0, np.cumsum(np.bincount(codes, minlength=len(chain_ids)))]
+        for i, chain_id in enumerate(chain_ids):
             if ctx.chains and str(chain_id) not in ctx.chains:
                 continue
 
-            s = self._summarize(
-                grp,
-                cutoff=cutoff,
-                label_prefix="paratope",
-                label_maker=lambda r: f"{r['chain_id']}:{r['IMGT']}",
-            )
+            s = self._summarize(index, order[offsets[i]:offsets[i + 1]], cutoff=cutoff, label_prefix="paratope")
             if s is None:
                 continue
 
@@ -107,19 +130,14 @@ class ParagraphParatopePlugin:
             spec = cfg.roles.get(role)
             if spec is None:
                 continue
-            chain_ids = set(map(str, spec.chain_ids))
+            chain_ids = list(map(str, spec.chain_ids))
             if not chain_ids:
                 continue
-            grp = sub[sub["chain_id"].astype(str).isin(chain_ids)]
-            if grp.empty:
+            rows = np.flatnonzero(np.isin(chains, chain_ids)) + span.start
+            if len(rows) == 0:
                 continue
 
-            s = self._summarize(
-                grp,
-                cutoff=cutoff,
-                label_prefix="paratope",
-                label_maker=lambda r: f"{r['chain_id']}:{r['IMGT']}",
-            )
+            s = self._summarize(index, rows, cutoff=cutoff, label_prefix="paratope")
             if s is None:
                 continue
 
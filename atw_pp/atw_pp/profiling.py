@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+TIMINGS_FILE = "timings.parquet"
+TIMING_COLS = ["path", "stage", "wall_s", "cpu_s", "rows", "n_atoms", "peak_rss_delta_mb"]
+TIMING_SCHEMA = {
+    "wall_s": "float64",
+    "cpu_s": "float64",
+    "rows": "int64",
+    "n_atoms": "int64",
+    "peak_rss_delta_mb": "float64",
+}
+
+def peak_rss_mb() -> float | None:
+    """High-water mark of this process's resident set size, in MB (None where unsupported)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024**2 if sys.platform == "darwin" else peak / 1024  # bytes on macOS, KB on Linux
+
+class StageTimer:
+    """
+    Wall time, CPU time and peak-RSS growth of the stages of one structure (parse,
+    chain_map, roles, one per plugin, ...), as rows of timings.parquet.
+    When disabled, ``stage`` only hands out a scratch record and nothing is kept.
+    """
+
+    __slots__ = ("path", "enabled", "n_atoms", "records")
+
+    def __init__(self, path: str, *, enabled: bool = True):
+        self.path = path
+        self.enabled = enabled
+        self.n_atoms: int | None = None
+        self.records: list[dict[str, Any]] = []
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[dict[str, Any]]:
+        """Time the block; callers may count emitted rows in the yielded record's ``rows``."""
+        rec: dict[str, Any] = {"path": self.path, "stage": name, "rows": 0}
+        if not self.enabled:
+            yield rec
+            return
+        rss0 = peak_rss_mb()
+        wall0, cpu0 = time.perf_counter(), time.process_time()
+        try:
+            yield rec
+        finally:
+            rss1 = peak_rss_mb()
+            rec["wall_s"] = time.perf_counter() - wall0
+            rec["cpu_s"] = time.process_time() - cpu0
+            rec["n_atoms"] = self.n_atoms
+            rec["peak_rss_delta_mb"] = rss1 - rss0 if rss0 is not None else None
+            self.records.append(rec)
+
+def print_timing_summary(df: pd.DataFrame, *, top: int = 10) -> None:
+    """Slowest stages / plugins (summed over structures) and slowest files of a timings table."""
+    if df.empty:
+        print("Profile: no structures timed")
+        return
+    total = df["wall_s"].sum()
+    by_stage = df.groupby("stage", sort=False).agg(
+        wall_s=("wall_s", "sum"),
+        mean_ms=("wall_s", "mean"),
+        cpu_s=("cpu_s", "sum"),
+        rows=("rows", "sum"),
+        peak_rss_delta_mb=("peak_rss_delta_mb", "max"),
+    )
+    by_stage["mean_ms"] *= 1000
+    by_stage["share"] = by_stage["wall_s"] / total if total > 0 else 0.0
+    by_stage = by_stage.sort_values("wall_s", ascending=False).head(top)
+
+    by_file = df.groupby("path", sort=False).agg(
+        wall_s=("wall_s", "sum"),
+        cpu_s=("cpu_s", "sum"),
+        n_atoms=("n_atoms", "max"),
+    )
+    by_file = by_file.sort_values("wall_s", ascending=False).head(top)
+
+    with pd.option_context("display.width", 160, "display.max_colwidth", 80, "display.float_format", "{:.3f}".format):
+        print(f"Profile: {df['path'].nunique()} structures, {total:.2f} s in timed stages")
+        print("Slowest stages:")
+        print(by_stage.to_string())
+        print("Slowest files:")
+        print(by_file.to_string())
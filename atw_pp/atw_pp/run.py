@@ -1,19 +1,37 @@
 from __future__ import annotations
 
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 
 from .config import MetadataConfig
-from .io.cif import list_structures, safe_parse_structure
-from .io.params import load_param_map, attach_params
-from .io.paragraph import load_paragraph_preds
+from .io.cif import list_structures, load_input_list, safe_parse_structure, shard_paths, structure_stem
+from .io.cache import StructureCache
+from .io.params import ParamStore, load_param_map, attach_params, attach_param_columns, param_map_to_df
+from .io.paragraph import ParagraphIndex, load_paragraph_preds
+from .manifest import (
+    Fingerprint,
+    MANIFEST_COLS,
+    config_hash,
+    load_manifest,
+    plan_incremental,
+    plugin_versions,
+    write_manifest,
+)
 from .core.annotations import ensure_unit_id_annotation
 from .core.selection import build_chain_map, build_roles
 from .plugins import BUILTIN_PLUGINS
+from .profiling import TIMINGS_FILE, TIMING_SCHEMA, StageTimer, print_timing_summary
 from .plugins.base import Context
-from .tables.wide import build_all_metadata_wide
+from .tables.sink import ColumnBuilder, ParquetTableSink, TableSinks, arrow_type
+from .tables.wide import build_all_metadata_wide, write_all_metadata_wide
 
 IDENTITY_COLS = {
     "path", "assembly_id",
@@ -22,138 +40,446 @@ IDENTITY_COLS = {
     "pair",
     "role_left", "role_right",
     "contact_cutoff", "clash_cutoff",
+    "pae_cutoff", "dist_cutoff",
 }
 
-def _prefix_row(row: dict[str, Any], prefix: str) -> dict[str, Any]:
-    out = {}
-    for k, v in row.items():
-        if k == "__table__":
-            continue
-        if k in IDENTITY_COLS:
-            out[k] = v
-        else:
-            out[f"{prefix}__{k}"] = v
+TABLES = ("structures", "chains", "roles", "interfaces")
+TABLE_FILES = {
+    "structures": "structures_metadata.parquet",
+    "chains": "chains_metadata.parquet",
+    "roles": "roles_metadata.parquet",
+    "interfaces": "interfaces_metadata.parquet",
+}
+PARAMS_FILE = "params_metadata.parquet"
+# Parquet schema metadata key of PARAMS_FILE recording the run's param_on_conflict (read back by merge)
+PARAM_CONFLICT_KEY = b"atw_pp.param_on_conflict"
+
+# (table -> columnar rows in emission order, bad_files row or None, timing rows) for one structure
+StructureResult = tuple[dict[str, ColumnBuilder], dict[str, Any] | None, list[dict[str, Any]]]
+
+class ColumnNames(dict):
+    """Plugin row key -> output column name (None for "__table__"), resolved once per key."""
+
+    def __init__(self, prefix: str):
+        super().__init__()
+        self.prefix = prefix
+
+    def __missing__(self, key: str) -> str | None:
+        name = None if key == "__table__" else key if key in IDENTITY_COLS else f"{self.prefix}__{key}"
+        self[key] = name
+        return name
+
+# one ColumnNames per plugin prefix and process
+_COLUMN_NAMES: dict[str, ColumnNames] = {}
+
+def column_names(prefix: str) -> ColumnNames:
+    """The row key -> column name mapping of plugins with ``prefix`` (shared per process)."""
+    names = _COLUMN_NAMES.get(prefix)
+    if names is None:
+        names = _COLUMN_NAMES[prefix] = ColumnNames(prefix)
+    return names
+
+def output_schema(plugins: list) -> dict[str, str]:
+    """Declared dtypes of the plugins' output columns (``schema`` attribute), by prefixed name."""
+    out: dict[str, str] = {}
+    for plg in plugins:
+        names = column_names(plg.prefix)
+        for key, dtype in getattr(plg, "schema", {}).items():
+            name = names[key]
+            if name is not None:
+                out[name] = dtype
     return out
 
+def _resolve_plugins(names: tuple[str, ...]) -> list:
+    plugins = []
+    for name in names:
+        if name not in BUILTIN_PLUGINS:
+            raise ValueError(f"Unknown plugin '{name}'. Available: {sorted(BUILTIN_PLUGINS)}")
+        plugins.append(BUILTIN_PLUGINS[name])
+    return plugins
+
+def _bad_row(abs_path: str, error: str, params: dict[str, Any] | None, cfg: MetadataConfig) -> dict[str, Any]:
+    return attach_params(
+        {"path": abs_path, "error": error},
+        params,
+        prefix=cfg.param_prefix,
+        on_conflict=cfg.param_on_conflict,
+    )
+
+def _read_bad_files(out_dir: Path, keep_paths: set[str]) -> list[dict[str, Any]]:
+    f = out_dir / "bad_files.csv"
+    if not keep_paths or not f.exists():
+        return []
+    try:
+        df = pd.read_csv(f)
+    except pd.errors.EmptyDataError:
+        return []
+    if "path" not in df.columns:
+        return []
+    return df[df["path"].astype(str).isin(keep_paths)].to_dict(orient="records")
+
+def _process_structure(
+    path: Path,
+    *,
+    cfg: MetadataConfig,
+    plugins: list,
+    param_map: ParamStore,
+    paragraph_index: ParagraphIndex | None,
+    parse_cache: StructureCache | None = None,
+    profile: bool = False,
+) -> StructureResult:
+    """Parse one structure, build its Context and run every plugin on it (timing each stage if ``profile``)."""
+    abs_path = str(path.resolve())
+    params_for_this = param_map.get(abs_path)
+    timer = StageTimer(abs_path, enabled=profile)
+
+    with timer.stage("parse"):
+        aa = safe_parse_structure(path, assembly_id=cfg.assembly_id, cache=parse_cache)
+        if aa is not None:
+            timer.n_atoms = len(aa)
+    if aa is None:
+        return {}, _bad_row(abs_path, "parse_failed", params_for_this, cfg), timer.records
+
+    with timer.stage("annotate"):
+        aa = ensure_unit_id_annotation(aa)
+
+    ctx = Context(path=abs_path, assembly_id=cfg.assembly_id, aa=aa)
+    ctx.data["cfg"] = cfg
+    ctx.data["params"] = params_for_this
+    if paragraph_index is not None:
+        ctx.data["paragraph_index"] = paragraph_index
+
+    with timer.stage("chain_map"):
+        ctx.chains = build_chain_map(aa)
+    with timer.stage("roles"):
+        ctx.roles = build_roles(cfg, ctx.chains)
+
+    rows: dict[str, ColumnBuilder] = {}
+    for plg in plugins:
+        names = column_names(plg.prefix)
+        with timer.stage(plg.name) as rec:
+            for raw in plg.run(ctx):
+                table = raw.get("__table__", plg.table)
+                builder = rows.get(table)
+                if builder is None:
+                    if table not in TABLES:
+                        raise ValueError(f"Plugin '{plg.name}' returned unknown table: {table}")
+                    builder = rows[table] = ColumnBuilder()
+                builder.append(raw, names)
+                rec["rows"] += 1
+    if cfg.param_attach == "table":
+        return rows, None, timer.records  # params go to params_metadata.parquet once
+    with timer.stage("attach_params"):
+        for builder in rows.values():
+            attach_param_columns(
+                builder,
+                params_for_this,
+                prefix=cfg.param_prefix,
+                on_conflict=cfg.param_on_conflict,
+            )
+    return rows, None, timer.records
+
+# ----- process-pool execution -----
+# Each worker receives the run state once (pool initializer) and keeps it in
+# this module-level dict, so tasks only ship a chunk of paths.
+_WORKER_STATE: dict[str, Any] = {}
+
+def _init_worker(
+    cfg: MetadataConfig,
+    plugins: list,
+    param_map: ParamStore,
+    paragraph_index: ParagraphIndex | None,
+    parse_cache: StructureCache | None,
+    profile: bool = False,
+) -> None:
+    _WORKER_STATE.update(
+        cfg=cfg,
+        plugins=plugins,
+        param_map=param_map,
+        paragraph_index=paragraph_index,
+        parse_cache=parse_cache,
+        profile=profile,
+    )
+
+def _failed_result(path: Path, error: str) -> StructureResult:
+    cfg: MetadataConfig = _WORKER_STATE["cfg"]
+    abs_path = str(path.resolve())
+    return {}, _bad_row(abs_path, error, _WORKER_STATE["param_map"].get(abs_path), cfg), []
+
+def _run_one(path: Path) -> StructureResult:
+    """_process_structure with the state set by _init_worker; a raising plugin becomes a bad_files row."""
+    try:
+        return _process_structure(path, **_WORKER_STATE)
+    except Exception as e:
+        return _failed_result(path, f"worker_failed: {type(e).__name__}: {e}")
+
+def _run_chunk(paths: list[Path]) -> list[StructureResult]:
+    return [_run_one(path) for path in paths]
+
+def _iter_parallel(
+    paths: list[Path],
+    *,
+    workers: int,
+    chunksize: int,
+    initargs: tuple,
+) -> Iterator[StructureResult]:
+    """Yield per-structure results in input order, computed on a process pool.
+
+    At most ``2 * workers`` chunks are in flight, so finished results never pile
+    up behind a slow chunk. If a worker dies hard (segfault, OOM kill) the pool
+    is rebuilt and the affected chunks are re-run one structure at a time, so only
+    the structure that actually crashes ends up in bad_files.csv.
+    """
+    _init_worker(*initargs)  # the parent also needs the state to build failure rows
+
+    def new_pool() -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs)
+
+    chunks = deque(paths[i : i + chunksize] for i in range(0, len(paths), chunksize))
+    pending: deque = deque()
+    pool = new_pool()
+    try:
+        while chunks or pending:
+            while chunks and len(pending) < 2 * workers:
+                chunk = chunks.popleft()
+                pending.append((chunk, pool.submit(_run_chunk, chunk)))
+
+            chunk, fut = pending.popleft()
+            try:
+                results = fut.result()
+            except BrokenProcessPool:
+                retry = [p for c in [chunk, *(c for c, _ in pending)] for p in c]
+                pending.clear()
+                pool.shutdown(wait=False, cancel_futures=True)
+                pool = new_pool()
+                for path in retry:
+                    try:
+                        yield pool.submit(_run_chunk, [path]).result()[0]
+                    except BrokenProcessPool:
+                        pool.shutdown(wait=False, cancel_futures=True)
+                        pool = new_pool()
+                        yield _failed_result(path, "worker_crashed")
+                continue
+            yield from results
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+def write_wide_table(
+    out_dir: Path,
+    df_params: pd.DataFrame | None,
+    *,
+    wide_batch: int = 0,
+    param_on_conflict: str = "keep_row",
+) -> int:
+    """all_metadata.parquet from the long tables in ``out_dir`` (in batches of ``wide_batch`` structures if > 0)."""
+    if wide_batch > 0:
+        return write_all_metadata_wide(
+            *(out_dir / TABLE_FILES[t] for t in TABLES),
+            out_dir / "all_metadata.parquet",
+            batch_paths=wide_batch,
+            df_params=df_params,
+            param_on_conflict=param_on_conflict,
+        )
+    df_all = build_all_metadata_wide(
+        *(pd.read_parquet(out_dir / TABLE_FILES[t]) for t in TABLES),
+        df_params=df_params,
+        param_on_conflict=param_on_conflict,
+    )
+    df_all.to_parquet(out_dir / "all_metadata.parquet", index=False)
+    return len(df_all)
+
 def build_metadata(
-    cif_dir: Path,
+    cif_dir: Path | None,
     out_dir: Path,
     *,
     cfg: MetadataConfig = MetadataConfig(),
     param_csvs: list[Path] | None = None,
     paragraph_preds: Path | None = None,
+    workers: int = 1,
+    chunksize: int = 16,
+    flush_every: int = 1000,
+    flush_mb: float = 256.0,
+    incremental: bool = False,
+    fingerprint: Fingerprint = "stat",
+    parse_cache: Path | None = None,
+    parse_cache_gb: float = 50.0,
+    wide_batch: int = 0,
+    profile: bool = False,
+    shard: tuple[int, int] | None = None,
+    input_list: Path | None = None,
+    scan_workers: int = 8,
 ) -> None:
-    
-    """For each CIF/PDB: 
+
+    """For each CIF/PDB:
     - build ctx (chains, roles)
     - run plugins (configured in cfg.plugins, plg.run(ctx))
     - plugins yield dict per row for tables: structures, chains, roles, interfaces
-    - collect rows into dataframes according to table
-    - save dataframes as parquet files
-    
+    - stream rows into per-table parquet files, flushed every `flush_every`
+      structures or once a table buffers `flush_mb` megabytes
+    - build all_metadata.parquet from the written tables
+
     Args:
-        cif_dir: Directory containing CIF/PDB files to process.
+        cif_dir: Directory containing CIF/PDB files to process (walked on `scan_workers` threads),
+            or the base of relative paths in `input_list`.
         out_dir: Directory to save output parquet files.
         cfg: Configuration for metadata extraction.
-        param_csvs: Optional list of CSV files containing additional parameters to attach.
-        paragraph_preds: Optional path to Paragraph prediction CSV file.
+        param_csvs: Optional list of CSV files containing additional parameters to attach
+            (to every row, or once per structure in params_metadata.parquet; see cfg.param_attach).
+        paragraph_preds: Optional path to Paragraph prediction CSV or Parquet file.
+        workers: Number of worker processes; 1 runs serially, 0 uses all CPUs.
+            Output order and content are the same as the serial run.
+        chunksize: Number of structures per task sent to a worker.
+        flush_every: Flush buffered rows to disk every N structures (0 = only by size).
+        flush_mb: Flush a table once its buffered rows reach roughly this many megabytes.
+        incremental: Reuse rows of structures unchanged since the previous run in
+            `out_dir` (same fingerprint, config hash and plugin versions, per
+            run_manifest.parquet) and only process new or changed files.
+        fingerprint: How a file is judged unchanged: "stat" (size + mtime) or "sha256" (size + content hash).
+        parse_cache: Optional directory caching parsed assemblies across runs (see io.cache.StructureCache).
+        parse_cache_gb: Size limit of the parse cache; least-recently-used entries are evicted beyond it.
+        wide_batch: Build all_metadata.parquet from the written tables in batches of this many
+            structures, so only one batch of the wide table is in memory (0 = all at once).
+        profile: Time every stage (parse, chain_map, roles, each plugin, ...) of every processed
+            structure into timings.parquet (wall/CPU time, rows, atoms, peak-RSS growth) and print
+            the slowest stages and files.
+        shard: (i, N) to process only the i-th of N size-balanced shards of the structures
+            under `cif_dir` (io.cif.shard_paths), e.g. one per array job; combine the
+            shards' output directories with merge.merge_outputs (atw-pp merge).
+        input_list: Text/CSV/TSV/Parquet list of structure paths (optionally with sizes) to
+            process instead of walking `cif_dir` (io.cif.load_input_list).
+        scan_workers: Threads walking `cif_dir` with os.scandir (1 = a single-threaded walk).
     """
-    
+
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    paths = list_structures(cif_dir)
-    print(f"Found {len(paths)} CIF files under: {cif_dir}")
+    sizes = None
+    if input_list is not None:
+        paths, sizes = load_input_list(input_list, root=cif_dir)
+        print(f"Read {len(paths)} structure paths from: {input_list}")
+    elif cif_dir is not None:
+        paths = list_structures(cif_dir, workers=scan_workers)
+        print(f"Found {len(paths)} CIF files under: {cif_dir}")
+    else:
+        raise ValueError("Either cif_dir or input_list is required")
+    if shard is not None:
+        n_found = len(paths)
+        paths = shard_paths(paths, *shard, root=cif_dir, sizes=sizes)
+        print(f"Shard {shard[0]}/{shard[1]}: {len(paths)} of {n_found} structures")
 
-    param_map = load_param_map(param_csvs, mode=cfg.csv_mode)
+    param_map = load_param_map(
+        param_csvs,
+        mode=cfg.csv_mode,
+        paths=(str(p.resolve()) for p in paths),
+        columns=cfg.param_columns,
+    )
     if param_map:
         print(f"Loaded param rows: {len(param_map)}")
 
-    paragraph_df = None
+    plugins = _resolve_plugins(cfg.plugins)
+
+    cache = None
+    if parse_cache is not None:
+        cache = StructureCache(parse_cache, max_bytes=int(parse_cache_gb * 1024**3))
+        print(f"Using parse cache: {parse_cache} (limit {parse_cache_gb:g} GB)")
+
+    side_inputs = [*(param_csvs or []), *([paragraph_preds] if paragraph_preds is not None else [])]
+    run_hash = config_hash(cfg, side_inputs)
+    versions = plugin_versions(plugins)
+    prev_manifest = load_manifest(out_dir) if incremental else pd.DataFrame(columns=MANIFEST_COLS)
+    todo, kept, fingerprints = plan_incremental(
+        paths, prev_manifest, run_hash=run_hash, versions=versions, fingerprint=fingerprint
+    )
+    keep_paths = set(kept["path"])
+    if incremental:
+        print(f"Incremental run: {len(keep_paths)} unchanged, {len(todo)} new or changed")
+
+    paragraph_index = None
     if paragraph_preds is not None:
-        paragraph_df = load_paragraph_preds(paragraph_preds)
+        # only the predictions of the structures this run processes
+        by = "path" if cfg.paragraph_id_mode == "path" else "pdb"
+        keep = [str(p.resolve()) if by == "path" else structure_stem(p) for p in todo]
+        paragraph_df = load_paragraph_preds(paragraph_preds, keep=keep, by=by)
         print(f"Loaded Paragraph preds: {len(paragraph_df)} rows from {paragraph_preds}")
+        paragraph_index = ParagraphIndex(paragraph_df, by=by)
+        del paragraph_df
 
-    # resolve plugins
-    plugins = []
-    for name in cfg.plugins:
-        if name not in BUILTIN_PLUGINS:
-            raise ValueError(f"Unknown plugin '{name}'. Available: {sorted(BUILTIN_PLUGINS)}")
-        plugins.append(BUILTIN_PLUGINS[name])
+    if workers <= 0:
+        workers = os.cpu_count() or 1
 
-    rows_struct: list[dict[str, Any]] = []
-    rows_chain: list[dict[str, Any]] = []
-    rows_role: list[dict[str, Any]] = []
-    rows_iface: list[dict[str, Any]] = []
-    bad_rows: list[dict[str, Any]] = []
-
-    for path in paths:
-        abs_path = str(path.resolve())
-        params_for_this = param_map.get(abs_path)
-
-        aa = safe_parse_structure(path, assembly_id=cfg.assembly_id)
-        if aa is None:
-            bad_rows.append(
-                attach_params(
-                    {"path": abs_path, "error": "parse_failed"},
-                    params_for_this,
-                    prefix=cfg.param_prefix,
-                    on_conflict=cfg.param_on_conflict,
-                )
-            )
-            continue
+    # serial and pool runs go through the same per-structure handling (_run_one)
+    initargs = (cfg, plugins, param_map, paragraph_index, cache, profile)
+    if workers == 1:
+        _init_worker(*initargs)
+        results: Iterator[StructureResult] = (_run_one(p) for p in todo)
+    else:
+        print(f"Running on {workers} worker processes (chunksize={chunksize})")
+        results = _iter_parallel(todo, workers=workers, chunksize=max(1, chunksize), initargs=initargs)
 
-        aa = ensure_unit_id_annotation(aa)
+    sinks = TableSinks(
+        out_dir, TABLE_FILES, flush_every=flush_every, flush_mb=flush_mb, schema=output_schema(plugins)
+    )
+    sinks.seed(keep_paths)
+    timings = None
+    if profile:
+        timings = ParquetTableSink(
+            out_dir / TIMINGS_FILE,
+            out_dir / ".parts" / "timings",
+            flush_mb=flush_mb,
+            schema={name: arrow_type(t) for name, t in TIMING_SCHEMA.items()},
+        )
+    bad_rows: list[dict[str, Any]] = _read_bad_files(out_dir, keep_paths)
+    manifest_rows: list[dict[str, Any]] = []
 
-        ctx = Context(path=abs_path, assembly_id=cfg.assembly_id, aa=aa)
-        ctx.data["cfg"] = cfg
-        ctx.data["params"] = params_for_this
-        if paragraph_df is not None:
-            ctx.data["paragraph_df"] = paragraph_df
+    # Long tables are flushed to disk as the run goes; whatever was processed
+    # before an error is still written out (and recorded in the manifest).
+    try:
+        for path, (table_rows, bad, timing_rows) in zip(todo, results):
+            if bad is not None:
+                bad_rows.append(bad)
+            if timings is not None:
+                for row in timing_rows:
+                    timings.add(row)
+            for table, rows in table_rows.items():
+                sinks.extend(table, rows)
+            sinks.end_structure()
 
-        ctx.chains = build_chain_map(aa)
-        ctx.roles = build_roles(cfg, ctx.chains)
+            abs_path = str(path.resolve())
+            manifest_rows.append({
+                "path": abs_path,
+                **fingerprints[abs_path],
+                "config_hash": run_hash,
+                "plugin_versions": versions,
+                "status": "bad" if bad is not None else "ok",
+            })
+    finally:
+        _WORKER_STATE.clear()
+        n_timings = timings.close() if timings is not None else 0
+        counts = sinks.close()
+        df_bad = pd.DataFrame(bad_rows)
+        df_bad.to_csv(out_dir / "bad_files.csv", index=False)
+        new_manifest = pd.DataFrame(manifest_rows, columns=MANIFEST_COLS)
+        write_manifest(out_dir, pd.concat([kept, new_manifest], ignore_index=True) if len(kept) else new_manifest)
 
-        for plg in plugins:
-            for raw in plg.run(ctx):
-                table = raw.get("__table__", plg.table)
-                pref = _prefix_row(raw, plg.prefix)
-                pref = attach_params(
-                    pref,
-                    params_for_this,
-                    prefix=cfg.param_prefix,
-                    on_conflict=cfg.param_on_conflict,
-                )
-
-                if table == "structures":
-                    rows_struct.append(pref)
-                elif table == "chains":
-                    rows_chain.append(pref)
-                elif table == "roles":
-                    rows_role.append(pref)
-                elif table == "interfaces":
-                    rows_iface.append(pref)
-                else:
-                    raise ValueError(f"Plugin '{plg.name}' returned unknown table: {table}")
-
-    df_struct = pd.DataFrame(rows_struct)
-    df_chain = pd.DataFrame(rows_chain)
-    df_role = pd.DataFrame(rows_role)
-    df_iface = pd.DataFrame(rows_iface)
-    df_bad = pd.DataFrame(bad_rows)
-
-    df_struct.to_parquet(out_dir / "structures_metadata.parquet", index=False)
-    df_chain.to_parquet(out_dir / "chains_metadata.parquet", index=False)
-    df_role.to_parquet(out_dir / "roles_metadata.parquet", index=False)
-    df_iface.to_parquet(out_dir / "interfaces_metadata.parquet", index=False)
-    df_bad.to_csv(out_dir / "bad_files.csv", index=False)
-
-    df_all = build_all_metadata_wide(df_struct, df_chain, df_role, df_iface)
-    df_all.to_parquet(out_dir / "all_metadata.parquet", index=False)
+    df_params = None
+    if cfg.param_attach == "table":
+        all_paths = keep_paths | {row["path"] for row in manifest_rows}
+        df_params = param_map_to_df(param_map)
+        df_params = df_params[df_params["path"].isin(all_paths)]
+        df_params = df_params.rename(columns={c: f"{cfg.param_prefix}{c}" for c in df_params.columns if c != "path"})
+        table = pa.Table.from_pandas(df_params, preserve_index=False)
+        meta = {**(table.schema.metadata or {}), PARAM_CONFLICT_KEY: cfg.param_on_conflict.encode()}
+        pq.write_table(table.replace_schema_metadata(meta), out_dir / PARAMS_FILE)
+
+    n_all = write_wide_table(out_dir, df_params, wide_batch=wide_batch, param_on_conflict=cfg.param_on_conflict)
 
     print("Saved:")
-    print("  ", out_dir / "structures_metadata.parquet", "rows=", len(df_struct))
-    print("  ", out_dir / "chains_metadata.parquet", "rows=", len(df_chain))
-    print("  ", out_dir / "roles_metadata.parquet", "rows=", len(df_role))
-    print("  ", out_dir / "interfaces_metadata.parquet", "rows=", len(df_iface))
-    print("  ", out_dir / "all_metadata.parquet", "rows=", len(df_all))
+    for table in TABLES:
+        print("  ", out_dir / TABLE_FILES[table], "rows=", counts[table])
+    if df_params is not None:
+        print("  ", out_dir / PARAMS_FILE, "rows=", len(df_params))
+    print("  ", out_dir / "all_metadata.parquet", "rows=", n_all)
     print("  ", out_dir / "bad_files.csv", "rows=", len(df_bad))
+    print("  ", out_dir / "run_manifest.parquet", "rows=", len(kept) + len(manifest_rows))
+    if timings is not None:
+        print("  ", out_dir / TIMINGS_FILE, "rows=", n_timings)
+        print_timing_summary(pd.read_parquet(out_dir / TIMINGS_FILE))
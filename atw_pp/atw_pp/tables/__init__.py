@@ -1,2 +1,3 @@
-from .wide import build_all_metadata_wide
-__all__ = ["build_all_metadata_wide"]
+from .wide import build_all_metadata_wide, write_all_metadata_wide
+from .sink import ParquetTableSink, TableSinks
+__all__ = ["build_all_metadata_wide", "write_all_metadata_wide", "ParquetTableSink", "TableSinks"]
@@ -0,0 +1,351 @@
+from __future__ import annotations
+
+import heapq
+import shutil
+from pathlib import Path
+from typing import Any, Callable, Iterable
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+# dtype names plugins may use in their ``schema`` (see plugins.base.Plugin)
+ARROW_TYPES: dict[str, pa.DataType] = {
+    "float32": pa.float32(),
+    "float64": pa.float64(),
+    "int32": pa.int32(),
+    "int64": pa.int64(),
+    "bool": pa.bool_(),
+    "string": pa.string(),
+    "category": pa.dictionary(pa.int32(), pa.string()),
+}
+
+def arrow_type(dtype: str | pa.DataType) -> pa.DataType:
+    if isinstance(dtype, pa.DataType):
+        return dtype
+    if dtype not in ARROW_TYPES:
+        raise ValueError(f"Unknown column dtype '{dtype}'. Available: {sorted(ARROW_TYPES)}")
+    return ARROW_TYPES[dtype]
+
+class ColumnBuilder:
+    """
+    Rows of one table accumulated as per-column lists. Columns first seen late are
+    back-filled with None, and short columns are padded only when the table is built,
+    so appending a row costs O(its own fields). The back-filled spans are kept in
+    ``gaps`` so rows that never set a column can be told apart from rows set to None.
+    """
+
+    __slots__ = ("columns", "gaps", "n_rows", "nbytes")
+
+    def __init__(self):
+        self.columns: dict[str, list[Any]] = {}
+        self.gaps: dict[str, list[tuple[int, int]]] = {}
+        self.n_rows = 0
+        self.nbytes = 0
+
+    def _pad(self, name: str, col: list[Any], n: int) -> None:
+        self.gaps.setdefault(name, []).append((len(col), n))
+        col.extend([None] * (n - len(col)))
+
+    def append(self, row: dict[str, Any], names: dict[str, str | None] | None = None) -> None:
+        """Add one row; ``names`` maps row keys to column names (None drops the key)."""
+        n = self.n_rows
+        cols = self.columns
+        nbytes = 64
+        for k, v in row.items():
+            name = names[k] if names is not None else k
+            if name is None:
+                continue
+            col = cols.get(name)
+            if col is None:
+                col = cols[name] = []
+            if len(col) < n:
+                self._pad(name, col, n)
+            col.append(v)
+            # cheap estimate of the in-memory size; strings dominate real tables
+            nbytes += len(v) if isinstance(v, str) else 8
+        self.n_rows = n + 1
+        self.nbytes += nbytes
+
+    def extend(self, other: ColumnBuilder) -> None:
+        n = self.n_rows
+        for name, values in other.columns.items():
+            col = self.columns.get(name)
+            if col is None:
+                col = self.columns[name] = []
+            if len(col) < n:
+                self._pad(name, col, n)
+            col.extend(values)
+        for name, spans in other.gaps.items():
+            self.gaps.setdefault(name, []).extend((lo + n, hi + n) for lo, hi in spans)
+        self.n_rows = n + other.n_rows
+        self.nbytes += other.nbytes
+
+    def fill(self, name: str, value: Any, *, keep: bool = False) -> None:
+        """Set column ``name`` to ``value`` on every row, or with ``keep`` only on rows that did not set it."""
+        col = self.columns.get(name)
+        if col is None or not keep:
+            self.columns[name] = [value] * self.n_rows
+        else:
+            absent = list(self.gaps.get(name, ()))
+            absent.append((len(col), self.n_rows))
+            col = col + [None] * (self.n_rows - len(col))
+            for lo, hi in absent:
+                col[lo:hi] = [value] * (hi - lo)
+            self.columns[name] = col
+        self.gaps.pop(name, None)
+
+    def to_table(self, schema: dict[str, pa.DataType] | None = None) -> pa.Table:
+        """Arrow table with declared column types from ``schema``; others are inferred (NaN -> null)."""
+        schema = schema or {}
+        arrays, names = [], []
+        for name, col in self.columns.items():
+            if len(col) < self.n_rows:
+                col = col + [None] * (self.n_rows - len(col))
+            typ = schema.get(name)
+            if typ is not None and pa.types.is_dictionary(typ):
+                arr = pa.array(col, type=typ.value_type, from_pandas=True).dictionary_encode()
+            else:
+                arr = pa.array(col, type=typ, from_pandas=True)
+            arrays.append(arr)
+            names.append(name)
+        return pa.Table.from_arrays(arrays, names=names)
+
+def _decode_dictionaries(schema: pa.Schema) -> pa.Schema:
+    return pa.schema([
+        pa.field(f.name, f.type.value_type, f.nullable) if pa.types.is_dictionary(f.type) else f for f in schema
+    ])
+
+def unify_parquet_schemas(files: Iterable[Path]) -> pa.Schema:
+    """Union of the part schemas; columns keep first-seen order, types are promoted (int -> float, null -> any)."""
+    schemas = [pq.read_schema(f).remove_metadata() for f in files]
+    try:
+        return pa.unify_schemas(schemas, promote_options="permissive")
+    except pa.ArrowTypeError:
+        # categorical in some parts only (e.g. rows carried over from an older run)
+        return pa.unify_schemas([_decode_dictionaries(s) for s in schemas], promote_options="permissive")
+
+def conform_table(table: pa.Table, schema: pa.Schema) -> pa.Table:
+    """Reorder/cast ``table`` to ``schema``, adding all-null columns it does not have."""
+    cols = []
+    for field in schema:
+        if field.name in table.column_names:
+            cols.append(table.column(field.name).cast(field.type))
+        else:
+            cols.append(pa.nulls(table.num_rows, type=field.type))
+    return pa.Table.from_arrays(cols, schema=schema)
+
+def concat_parquet_files(files: list[Path], out_path: Path, *, schema: pa.Schema | None = None) -> int:
+    """
+    Stream ``files`` into one Parquet file, one row group in memory at a time, under
+    ``schema`` (default: the merged part schemas).
+    """
+    if not files:
+        pd.DataFrame().to_parquet(out_path, index=False)
+        return 0
+    schema = schema or unify_parquet_schemas(files)
+    n_rows = 0
+    with pq.ParquetWriter(out_path, schema) as writer:
+        for f in files:
+            pf = pq.ParquetFile(f)
+            for i in range(pf.num_row_groups):
+                t = conform_table(pf.read_row_group(i), schema)
+                writer.write_table(t)
+                n_rows += t.num_rows
+    return n_rows
+
+class _MergeInput:
+    """
+    One input of merge_parquet_files: its current batch and the runs of equal ``by``
+    values in it (first rows and keys), consumed front to back.
+    """
+
+    def __init__(self, path: Path, index: int, schema: pa.Schema, by: str, key: Callable[[Any], Any], batch_size: int):
+        self.index = index
+        self._batches = pq.ParquetFile(path).iter_batches(batch_size=batch_size)
+        self._schema, self._by, self._key = schema, by, key
+        self.table: pa.Table | None = None
+        self._next_batch()
+
+    def _next_batch(self) -> None:
+        self.table = None
+        for batch in self._batches:
+            if batch.num_rows:
+                t = conform_table(pa.Table.from_batches([batch]), self._schema)
+                col = t[self._by].combine_chunks()
+                change = pc.fill_null(pc.not_equal(col.slice(1), col.slice(0, len(col) - 1)), True)
+                starts = [0, *(np.flatnonzero(change.to_numpy(zero_copy_only=False)) + 1).tolist()]
+                self.keys = [self._key(v) for v in col.take(starts).to_pylist()]
+                self.starts = [*starts, t.num_rows]
+                self.pos = 0
+                self.table = t
+                return
+
+    @property
+    def head(self) -> tuple[Any, int]:
+        return self.keys[self.pos], self.index
+
+    def pop_runs(self, bound: tuple[Any, int] | None) -> pa.Table:
+        """The leading runs that sort before ``bound`` (at least one; the whole batch if None)."""
+        n = len(self.keys) if bound is None else self.pos + 1
+        while n < len(self.keys) and (self.keys[n], self.index) < bound:
+            n += 1
+        lo, hi = self.starts[self.pos], self.starts[n]
+        out = self.table.slice(lo, hi - lo)
+        self.pos = n
+        if n == len(self.keys):
+            self._next_batch()
+        return out
+
+def merge_parquet_files(
+    files: list[Path],
+    out_path: Path,
+    *,
+    by: str = "path",
+    key: Callable[[Any], Any] = lambda v: v,
+    schema: pa.Schema | None = None,
+    batch_size: int = 65536,
+) -> int:
+    """
+    k-way merge of ``files``, each ordered by column ``by`` under ``key``, into one Parquet file
+    in that order (ties keep file order), streaming ``batch_size`` rows per file at a time.
+    Rows with equal ``by`` stay together. A file that is not ordered is still merged run by run,
+    but then the output is not ordered either.
+    """
+    schema = schema or (unify_parquet_schemas(files) if files else None)
+    if schema is None or by not in schema.names:
+        return concat_parquet_files(files, out_path, schema=schema)
+    inputs = [_MergeInput(f, i, schema, by, key, batch_size) for i, f in enumerate(files)]
+    heap = [m.head for m in inputs if m.table is not None]
+    heapq.heapify(heap)
+    n_rows = n_pending = 0
+    pending: list[pa.Table] = []
+    with pq.ParquetWriter(out_path, schema) as writer:
+        while heap:
+            m = inputs[heapq.heappop(heap)[1]]
+            pending.append(m.pop_runs(heap[0] if heap else None))
+            n_pending += pending[-1].num_rows
+            if m.table is not None:
+                heapq.heappush(heap, m.head)
+            if n_pending >= batch_size or not heap:
+                writer.write_table(pa.concat_tables(pending).combine_chunks())
+                n_rows += n_pending
+                pending, n_pending = [], 0
+    return n_rows
+
+class ParquetTableSink:
+    """
+    Buffers the rows of one output table and flushes them as Parquet part files.
+    close() stitches the parts into ``out_path`` (one row group per part), merging
+    schemas so columns first emitted late in the run are still kept.
+    """
+
+    def __init__(
+        self,
+        out_path: Path,
+        parts_dir: Path,
+        *,
+        flush_mb: float = 256.0,
+        schema: dict[str, pa.DataType] | None = None,
+    ):
+        self.out_path = out_path
+        self.parts_dir = parts_dir
+        self.flush_bytes = int(flush_mb * 1024 * 1024)
+        self.schema = schema or {}
+        self.parts: list[Path] = []
+        self._rows = ColumnBuilder()
+
+    def add(self, row: dict[str, Any], names: dict[str, str | None] | None = None) -> None:
+        self._rows.append(row, names)
+        if self._rows.nbytes >= self.flush_bytes:
+            self.flush()
+
+    def extend(self, rows: ColumnBuilder) -> None:
+        self._rows.extend(rows)
+        if self._rows.nbytes >= self.flush_bytes:
+            self.flush()
+
+    def seed(self, src: Path, keep_paths: set[str], *, batch_size: int = 65536) -> int:
+        """Copy rows of a previous output whose ``path`` is in ``keep_paths`` in as the first parts."""
+        if not src.exists() or not keep_paths:
+            return 0
+        pf = pq.ParquetFile(src)
+        if "path" not in pf.schema_arrow.names:
+            return 0
+        keep = pa.array(sorted(keep_paths), type=pf.schema_arrow.field("path").type)
+        n_rows = 0
+        for batch in pf.iter_batches(batch_size=batch_size):
+            t = pa.Table.from_batches([batch])
+            t = t.filter(pc.is_in(t["path"], value_set=keep))
+            if t.num_rows == 0:
+                continue
+            self.parts_dir.mkdir(parents=True, exist_ok=True)
+            part = self.parts_dir / f"part-{len(self.parts):05d}.parquet"
+            pq.write_table(t, part)
+            self.parts.append(part)
+            n_rows += t.num_rows
+        return n_rows
+
+    def flush(self) -> None:
+        if not self._rows.n_rows:
+            return
+        self.parts_dir.mkdir(parents=True, exist_ok=True)
+        part = self.parts_dir / f"part-{len(self.parts):05d}.parquet"
+        pq.write_table(self._rows.to_table(self.schema), part)
+        self.parts.append(part)
+        self._rows = ColumnBuilder()
+
+    def close(self) -> int:
+        self.flush()
+        n_rows = concat_parquet_files(self.parts, self.out_path)
+        shutil.rmtree(self.parts_dir, ignore_errors=True)
+        return n_rows
+
+class TableSinks:
+    """
+    One ParquetTableSink per output table; flushes all of them every ``flush_every`` structures.
+    ``schema`` maps column names to declared dtypes (names of ARROW_TYPES or Arrow types).
+    """
+
+    def __init__(
+        self,
+        out_dir: Path,
+        tables: dict[str, str],
+        *,
+        flush_every: int = 1000,
+        flush_mb: float = 256.0,
+        schema: dict[str, str | pa.DataType] | None = None,
+    ):
+        parts_root = out_dir / ".parts"
+        shutil.rmtree(parts_root, ignore_errors=True)  # leftovers of an interrupted run
+        types = {name: arrow_type(t) for name, t in (schema or {}).items()}
+        self.sinks = {
+            table: ParquetTableSink(out_dir / filename, parts_root / table, flush_mb=flush_mb, schema=types)
+            for table, filename in tables.items()
+        }
+        self.flush_every = flush_every
+        self._parts_root = parts_root
+        self._n_structures = 0
+
+    def seed(self, keep_paths: set[str]) -> dict[str, int]:
+        """Carry over rows of unchanged structures from the existing outputs (incremental runs)."""
+        return {table: sink.seed(sink.out_path, keep_paths) for table, sink in self.sinks.items()}
+
+    def add(self, table: str, row: dict[str, Any]) -> None:
+        self.sinks[table].add(row)
+
+    def extend(self, table: str, rows: ColumnBuilder) -> None:
+        self.sinks[table].extend(rows)
+
+    def end_structure(self) -> None:
+        self._n_structures += 1
+        if self.flush_every > 0 and self._n_structures % self.flush_every == 0:
+            for sink in self.sinks.values():
+                sink.flush()
+
+    def close(self) -> dict[str, int]:
+        counts = {table: sink.close() for table, sink in self.sinks.items()}
+        shutil.rmtree(self._parts_root, ignore_errors=True)
+        return counts
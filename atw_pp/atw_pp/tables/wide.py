@@ -1,35 +1,331 @@
 from __future__ import annotations
+import shutil
+from pathlib import Path
+
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from pandas.api.extensions import take
+
+from .sink import concat_parquet_files, unify_parquet_schemas
+
+# interface rows of a cutoff sweep (ipsae): qualifier column -> how it is spelled in the pivot key
+IFACE_QUALIFIERS = {"pae_cutoff": "pae{:g}", "dist_cutoff": "dist{:g}", "ipsae__agg": "{}"}
+
+# long table -> (pivoted key column, identity columns, wide column prefix, key qualifiers)
+PIVOTS = (
+    ("chain_id", ("path", "assembly_id", "chain_id"), "chain", {}),
+    ("role", ("path", "assembly_id", "role"), "role", {}),
+    # interfaces: pair = role_left__role_right, or ch1-ch2__pae{p}_dist{d}__{agg} for ipsae rows
+    ("pair", ("path", "assembly_id", "pair"), "iface", IFACE_QUALIFIERS),
+)
+
+def _qualify_key(df: pd.DataFrame, col: str, qualifiers: dict[str, str]) -> pd.DataFrame:
+    """
+    Fold the ``qualifiers`` columns into ``col`` where a row has them all, so every cutoff set
+    and aggregate of a pair gets its own wide columns ("A-B__pae15_dist15__max"); the qualifier
+    columns are dropped.
+    """
+    present = [q for q in qualifiers if q in df.columns]
+    if not present:
+        return df
+    qualified = df[present].notna().all(axis=1).to_numpy()
+    key = df[col].astype(object).to_numpy(copy=True)
+    if qualified.any():
+        sub = df.loc[qualified, present]
+        parts = [sub[q].map(qualifiers[q].format).astype(str) for q in present]
+        cutoffs = [p for q, p in zip(present, parts) if q != "ipsae__agg"]
+        suffix = cutoffs[0].str.cat(cutoffs[1:], sep="_") if cutoffs else None
+        if "ipsae__agg" in present:
+            agg = parts[present.index("ipsae__agg")]
+            suffix = agg if suffix is None else suffix.str.cat(agg, sep="__")
+        key[qualified] = (df.loc[qualified, col].astype(str) + "__" + suffix).to_numpy()
+    return df.drop(columns=present).assign(**{col: key})
+
+def _pivot_table(df: pd.DataFrame, *, index: str, col: str, value_cols: list[str], prefix: str) -> pd.DataFrame:
+    p = df.pivot_table(index=index, columns=col, values=value_cols, aggfunc="first")
+    p.columns = [f"{prefix}_{cid}__{feat}" for feat, cid in p.columns]
+    return p.reset_index()
+
+def _empty_first_object():
+    """What groupby.first returns for an object group without values (differs across pandas versions)."""
+    return pd.Series([None], dtype=object).groupby(np.zeros(1)).first().iloc[0]
+
+def _pivot_codes(df: pd.DataFrame, *, index: str, col: str, value_cols: list[str], prefix: str) -> pd.DataFrame | None:
+    """
+    pivot_table(aggfunc="first") by integer codes: (path, col) cells are encoded as ints,
+    the first non-null row of every (cell, feature) is found in one sorted pass, and numeric
+    features are gathered as (path x col) blocks, one per dtype.
+    Mirrors pivot_table's rules: groups with no values are dropped, rows and columns are
+    sorted, a feature is upcast (int -> float, bool -> object) as soon as one cell of the
+    grid is empty, and all-NaN output columns are dropped.
+    Returns None when pivot_table should be used instead (nothing to pivot).
+    """
+    rcodes, runiq = df[index].factorize(sort=True)
+    ccodes, cuniq = df[col].factorize(sort=True)
+    nr, nc = len(runiq), len(cuniq)
+    order = np.flatnonzero((rcodes >= 0) & (ccodes >= 0))
+    cells = rcodes[order].astype(np.int64) * nc + ccodes[order]
+    srt = np.argsort(cells, kind="stable")
+    order, cells = order[srt], cells[srt]
+    if len(cells) == 0:
+        return None
+
+    # per distinct cell u: has[u, f] = feature f has a value; first[u, f] = its first row
+    m, nf = len(order), len(value_cols)
+    starts = np.flatnonzero(np.r_[True, cells[1:] != cells[:-1]])
+    ucells = cells[starts]
+    notna = df[value_cols].notna().to_numpy()[order]
+    unique = len(starts) == m  # one row per cell (the usual case): the cell's row is the first row
+    if unique:
+        has, first = notna, None
+    else:
+        pos = np.minimum.reduceat(np.where(notna, np.arange(m)[:, None], m), starts, axis=0)
+        has = pos < m
+        first = np.where(has, order[np.minimum(pos, m - 1)], -1)
+
+    present_u = has.any(axis=1)
+    if not present_u.any():
+        return None
+    cell_u = np.full(nr * nc, -1, dtype=np.int64)
+    cell_u[ucells[present_u]] = np.flatnonzero(present_u)
+    present = (cell_u >= 0).reshape(nr, nc)
+    keep_r = np.flatnonzero(present.any(axis=1))
+    keep_c = np.flatnonzero(present.any(axis=0))
+    nkr, k = len(keep_r), len(keep_c)
+
+    # kept (path, col) grid, row-major: grid cell g = r * k + j
+    u = cell_u[(keep_r[:, None] * nc + keep_c[None, :]).ravel()]
+    exists = u >= 0
+    uu = np.maximum(u, 0)
+    grid_full = bool(exists.all())
+    value = has[uu] & exists[:, None]  # (grid cells, features)
+    keep = value.reshape(nkr, k, nf).any(axis=0)  # (cols, features): drop all-NaN output columns
+    if unique:
+        src = np.where(exists, order[uu], 0)
+    else:
+        src = np.where(value, first[uu], -1)
+    names = [[f"{prefix}_{cuniq[j]}__{v}" for v in value_cols] for j in keep_c]
+
+    by_dtype: dict[object, list[int]] = {}
+    for i, v in enumerate(value_cols):
+        by_dtype.setdefault(df[v].dtype, []).append(i)
+
+    frames = [pd.DataFrame({index: runiq.take(keep_r)})]
+    for dtype, fi in by_dtype.items():
+        fi = np.asarray(fi)
+        if isinstance(dtype, np.dtype) and dtype.kind in "fiub":
+            X = df[[value_cols[i] for i in fi]].to_numpy()
+            vals = X[src] if unique else X[np.maximum(src[:, fi], 0), np.arange(len(fi))]
+            if not grid_full:
+                # same promotion as pivot_table's unstack: int -> float64, bool -> object
+                vals = vals.astype(take(X[:1, 0], np.array([-1]), allow_fill=True).dtype)
+            missing = ~value[:, fi]
+            if missing.any():
+                vals[missing] = np.nan
+            kp = keep[:, fi].ravel()
+            cols = [names[j][i] for j in range(k) for i in fi]
+            frames.append(pd.DataFrame(vals.reshape(nkr, k * len(fi))[:, kp], columns=[c for c, x in zip(cols, kp) if x]))
+            continue
+
+        out: dict[str, pd.Series] = {}
+        for i in fi:
+            v = value_cols[i]
+            arr = df[v].array if isinstance(dtype, pd.api.extensions.ExtensionDtype) else df[v].to_numpy()
+            vals = take(arr, np.where(value[:, i], src if unique else src[:, i], -1), allow_fill=True)
+            if isinstance(vals, np.ndarray) and vals.dtype == object:
+                # groups that exist but hold no value: groupby.first's own missing value (None), not NaN
+                empty = exists & ~value[:, i]
+                if empty.any():
+                    vals[empty] = _empty_first_object()
+            for j in np.flatnonzero(keep[:, i]):
+                # explicit dtype: keep object columns object (no string inference)
+                out[names[j][i]] = pd.Series(vals[j::k], dtype=vals.dtype, copy=False)
+        frames.append(pd.DataFrame(out))
+
+    p = pd.concat(frames, axis=1)
+    return p[[index] + [names[j][i] for i in np.argsort(value_cols, kind="stable") for j in range(k) if keep[j, i]]]
 
 def _pivot(df: pd.DataFrame, *, index: str, col: str, drop_cols: tuple[str, ...], prefix: str) -> pd.DataFrame:
     value_cols = [c for c in df.columns if c not in drop_cols]
     if not value_cols:
         return pd.DataFrame({index: df[index].drop_duplicates()})
-    p = df.pivot_table(index=index, columns=col, values=value_cols, aggfunc="first")
-    p.columns = [f"{prefix}_{cid}__{feat}" for feat, cid in p.columns]
-    return p.reset_index()
+    p = _pivot_codes(df, index=index, col=col, value_cols=value_cols, prefix=prefix)
+    if p is None:
+        p = _pivot_table(df, index=index, col=col, value_cols=value_cols, prefix=prefix)
+    return p
 
 def build_all_metadata_wide(
     df_struct: pd.DataFrame,
     df_chain: pd.DataFrame | None,
     df_role: pd.DataFrame | None,
     df_iface: pd.DataFrame | None,
+    *,
+    df_params: pd.DataFrame | None = None,
+    param_on_conflict: str = "keep_row",
 ) -> pd.DataFrame:
     base = df_struct[["path"]].drop_duplicates().copy()
     struct = df_struct.drop_duplicates("path")
     base = base.merge(struct, on="path", how="left")
 
-    if df_chain is not None and not df_chain.empty and {"path", "chain_id"}.issubset(df_chain.columns):
-        ch = _pivot(df_chain, index="path", col="chain_id", drop_cols=("path", "assembly_id", "chain_id"), prefix="chain")
-        base = base.merge(ch, on="path", how="left")
-
-    if df_role is not None and not df_role.empty and {"path", "role"}.issubset(df_role.columns):
-        rl = _pivot(df_role, index="path", col="role", drop_cols=("path", "assembly_id", "role"), prefix="role")
-        base = base.merge(rl, on="path", how="left")
+    for df, (col, drop_cols, prefix, qualifiers) in zip((df_chain, df_role, df_iface), PIVOTS):
+        if df is not None and not df.empty and {"path", col}.issubset(df.columns):
+            df = _qualify_key(df, col, qualifiers)
+            base = base.merge(_pivot(df, index="path", col=col, drop_cols=drop_cols, prefix=prefix), on="path", how="left")
 
-    # interfaces: pivot by pair (role_left__role_right)
-    if df_iface is not None and not df_iface.empty and {"path", "pair"}.issubset(df_iface.columns):
-        iface = _pivot(df_iface, index="path", col="pair", drop_cols=("path", "assembly_id", "pair"), prefix="iface")
-        base = base.merge(iface, on="path", how="left")
+    # params kept in their own table (cfg.param_attach == "table"): one join per run
+    if df_params is not None and "path" in df_params.columns:
+        clash = [c for c in df_params.columns if c != "path" and c in base.columns]
+        if param_on_conflict == "keep_row":
+            df_params = df_params.drop(columns=clash)
+        else:
+            base = base.drop(columns=clash)
+        base = base.merge(df_params.drop_duplicates("path"), on="path", how="left")
 
     return base
+
+_BATCH = "__batch"
+_ROW = "__row"
+# files write_dataset keeps open at once; beyond it the least recently used is closed
+# (a batch then spans several files, which _read_partition reads back in row order)
+_MAX_OPEN_FILES = 512
+
+def _partition_by_path(
+    src: Path | None,
+    dst: Path,
+    paths: pd.Index,
+    *,
+    batch_paths: int,
+    key_col: str | None,
+    qualifiers: dict[str, str] | None = None,
+) -> tuple[list[str], list] | None:
+    """
+    Stream a long table into hive partitions ``dst/__batch=<i>`` (batch i = structures
+    ``paths[i * batch_paths:(i + 1) * batch_paths]``), tagging rows with their original position.
+    Returns (value columns, distinct pivot keys as _qualify_key spells them), or None when the
+    table is missing or not pivotable.
+    """
+    if src is None or not src.exists():
+        return None
+    pf = pq.ParquetFile(src)
+    names = pf.schema_arrow.names
+    if "path" not in names or (key_col is not None and key_col not in names):
+        return None
+
+    keys: set = set()
+    schema = pf.schema_arrow.remove_metadata().append(pa.field(_BATCH, pa.int32())).append(pa.field(_ROW, pa.int64()))
+
+    def batches():
+        offset = 0
+        for b in pf.iter_batches(batch_size=65536):
+            pos = paths.get_indexer(b.column("path").to_numpy(zero_copy_only=False))
+            batch = np.where(pos >= 0, pos // batch_paths, -1).astype(np.int32)
+            rows = np.arange(offset, offset + b.num_rows, dtype=np.int64)
+            offset += b.num_rows
+            if key_col is not None:
+                qual = [q for q in qualifiers or {} if q in names]
+                if qual:
+                    kdf = b.select([key_col, *qual]).to_pandas()
+                    keys.update(_qualify_key(kdf, key_col, qualifiers)[key_col].unique().tolist())
+                else:
+                    keys.update(pc.unique(b.column(key_col)).to_pylist())
+            b = pa.RecordBatch.from_arrays([*b.columns, pa.array(batch), pa.array(rows)], schema=schema)
+            yield b.filter(pa.array(batch >= 0))  # rows of unknown structures drop out, as in the left merge
+
+    n_batches = max(1, -(-len(paths) // batch_paths))
+    ds.write_dataset(
+        batches(),
+        dst,
+        schema=schema,
+        format="parquet",
+        partitioning=[_BATCH],
+        partitioning_flavor="hive",
+        existing_data_behavior="overwrite_or_ignore",
+        max_partitions=n_batches,  # one record batch may touch every batch (default cap: 1024)
+        max_open_files=min(n_batches, _MAX_OPEN_FILES),
+    )
+    names = [c for c in names if c not in (qualifiers or {})]
+    return names, sorted(k for k in keys if k is not None)
+
+def _read_partition(src: Path, i: int) -> pd.DataFrame | None:
+    part = src / f"{_BATCH}={i}"
+    if not part.exists():
+        return None
+    df = pq.read_table(part).to_pandas()
+    return df.sort_values(_ROW, kind="stable").drop(columns=_ROW).reset_index(drop=True)
+
+def write_all_metadata_wide(
+    struct_file: Path,
+    chain_file: Path | None,
+    role_file: Path | None,
+    iface_file: Path | None,
+    out_path: Path,
+    *,
+    batch_paths: int = 50_000,
+    df_params: pd.DataFrame | None = None,
+    param_on_conflict: str = "keep_row",
+) -> int:
+    """
+    build_all_metadata_wide out of core: the long Parquet tables are split into batches of
+    ``batch_paths`` structures in one streaming pass each, every batch is pivoted and written
+    as a part, and the parts are merged into ``out_path`` under one schema.
+    Peak memory is bounded by a batch; rows and columns come out in the same order as the
+    in-memory build (columns missing from a batch are null there). Returns the row count.
+    """
+    work = out_path.parent / ".wide_parts"
+    shutil.rmtree(work, ignore_errors=True)
+    paths = pd.Index(pq.read_table(struct_file, columns=["path"]).column("path").to_pandas().drop_duplicates())
+    n_batches = -(-len(paths) // batch_paths)
+
+    # column order of the in-memory build: structures, then each pivot by (feature, key), then params
+    param_cols = [c for c in df_params.columns if c != "path"] if df_params is not None else []
+    srcs = (struct_file, chain_file, role_file, iface_file)
+    tables = []
+    order: list[str] = []
+    for t, (src, spec) in enumerate(zip(srcs, (None, *PIVOTS))):
+        found = _partition_by_path(
+            src,
+            work / str(t),
+            paths,
+            batch_paths=batch_paths,
+            key_col=spec[0] if spec else None,
+            qualifiers=spec[3] if spec else None,
+        )
+        tables.append(work / str(t) if found is not None else None)
+        if found is None:
+            continue
+        names, keys = found
+        if spec is None:
+            order += [c for c in names if param_on_conflict == "keep_row" or c not in param_cols]
+        else:
+            _, drop_cols, prefix, _ = spec
+            feats = sorted(c for c in names if c not in drop_cols)
+            order += [f"{prefix}_{k}__{f}" for f in feats for k in keys]
+    order += param_cols
+
+    parts = []
+    try:
+        for i in range(n_batches):
+            dfs = [_read_partition(src, i) if src is not None else None for src in tables]
+            params = None
+            if df_params is not None:
+                params = df_params[df_params["path"].isin(paths[i * batch_paths:(i + 1) * batch_paths])]
+            wide = build_all_metadata_wide(*dfs, df_params=params, param_on_conflict=param_on_conflict)
+            part = work / f"part-{i:05d}.parquet"
+            wide.to_parquet(part, index=False)
+            parts.append(part)
+            del dfs, wide
+
+        schema = None
+        if parts:
+            rank: dict[str, int] = {}
+            for name in order:
+                rank.setdefault(name, len(rank))
+            unified = unify_parquet_schemas(parts)
+            schema = pa.schema(sorted(unified, key=lambda f: rank.get(f.name, len(rank))))
+        return concat_parquet_files(parts, out_path, schema=schema)
+    finally:
+        shutil.rmtree(work, ignore_errors=True)